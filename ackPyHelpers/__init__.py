@@ -5,7 +5,7 @@
 __author__ = "AckWare"
 __version__ = "1.0.0"
 
-__all__ = ['LogHelper', 'GithubRelease', 'FileHelpers', 'RunProcessHelper', 'Version', 'DateTimeHelpers', 'SqliteConnHelper', 'staticinit']
+__all__ = ['LogHelper', 'GithubRelease', 'FileHelpers', 'RunProcessHelper', 'Version', 'DateTimeHelpers', 'SqliteConnHelper', 'DownloadHelper', 'staticinit']
 
 import sys
 
@@ -39,3 +39,4 @@ def __static_init__(cls):
 from .version import Version
 from .datetimeHelpers import DateTimeHelpers
 from .sqliteHelpers import SqliteConnHelper
+from .downloadHelper import DownloadHelper
@@ -0,0 +1,138 @@
+#!python3
+# -*- coding: utf-8 -*-
+
+import os, pathlib, hashlib, json, logging, urllib.request, urllib.error
+from .githubRelease import GithubRelease
+
+class DownloadHelper:
+	"""
+	helper class for downloading files without holding them in memory: the download is streamed in fixed-size
+	chunks to a '.part' file next to the target, then renamed into place once it's complete (and checked), so the
+	target is never left half written. if a '.part' file is already there from an earlier try of the same download, it
+	asks the server for just the rest of it (an HTTP Range request, with an If-Range of the ETag/Last-Modified saved
+	when the part file was started, in a '.part.json' next to it), and starts over if the server doesn't do ranges, or
+	if the file's changed since then. a part file that isn't from the same url (and expectedSize) is thrown away.
+
+	example:
+	release = GithubRelease.GetLatestRelease("ryanoasis", "nerd-fonts")
+	path = DownloadHelper.DownloadAsset(release.assets[0], pathlib.Path("/tmp/downloads"))
+	"""
+
+	_chunkSize = 1024*1024
+
+	@staticmethod
+	def DownloadFile(url: str, targetFile: pathlib.Path, expectedSize: int|None = None, checksum: str|None = None,
+						hashName: str = "sha256", resume: bool = True) -> pathlib.Path:
+		"""
+		downloads the url to targetFile, replacing it if it exists; if expectedSize is given, the download has to be that
+		many bytes, and if checksum is given (as a hex string), the download's hash (hashName = any hashlib name) has to match.
+		if neither is given, the size the server says it is (Content-Length/Content-Range) is checked instead, if it says.
+		"""
+		partFile = targetFile.with_name(targetFile.name + ".part")
+		partInfoFile = targetFile.with_name(targetFile.name + ".part.json")
+		targetFile.parent.mkdir(parents=True, exist_ok=True)
+		partInfo = DownloadHelper._getResumablePartInfo(url, partFile, partInfoFile, expectedSize) if resume else None
+		startAt = partFile.stat().st_size if partInfo else 0
+
+		req = urllib.request.Request(url)
+		if startAt > 0:
+			logging.debug(f"resuming download of url |{url}| at byte {startAt}")
+			req.add_header("Range", f"bytes={startAt}-")
+			# so if it's not the same file any more (e.g. a 'latest' url that's now a newer version), we get the whole new one instead:
+			req.add_header("If-Range", partInfo["etag"] or partInfo["lastModified"])
+		else:
+			logging.debug(f"downloading url |{url}|")
+		try:
+			with urllib.request.urlopen(req) as resp:
+				if startAt > 0 and resp.status != 206:
+					logging.debug(f"server did not return a partial response for url |{url}| (status = {resp.status}), starting over")
+					startAt = 0
+				serverSize = DownloadHelper._getServerSize(resp, startAt)
+				if startAt == 0:
+					DownloadHelper._writePartInfo(partInfoFile, { "url": url, "expectedSize": expectedSize,
+														"etag": resp.headers.get("ETag", ""), "lastModified": resp.headers.get("Last-Modified", "") })
+				with open(partFile, "ab" if startAt > 0 else "wb") as f:
+					for chunk in iter(lambda: resp.read(DownloadHelper._chunkSize), b''):
+						f.write(chunk)
+		except urllib.error.HTTPError as ex:
+			# a 416 means the range starts at/past the end, i.e. the part file might already be all there; but unless we
+			# have something to check it against, we can't tell that, so just start over:
+			if ex.code != 416 or startAt == 0:
+				raise
+			if expectedSize is None and not checksum:
+				logging.debug(f"server says download of url |{url}| was already complete, but there's nothing to check it against; starting over")
+				return DownloadHelper.DownloadFile(url, targetFile, expectedSize, checksum, hashName, resume=False)
+			logging.debug(f"server says download of url |{url}| was already complete")
+			serverSize = None
+
+		actualSize = partFile.stat().st_size
+		checkSize = expectedSize if expectedSize is not None else serverSize
+		if checkSize is not None and actualSize != checkSize:
+			if actualSize > checkSize:
+				DownloadHelper._removePartFiles(partFile, partInfoFile)	# no point resuming from this
+			# if it's short, leave the part file so the next try can pick up where it left off
+			raise ValueError(f'download of url "{url}" is {actualSize} bytes, but expected {checkSize} bytes')
+		if checksum:
+			actualChecksum = DownloadHelper._getFileHash(partFile, hashName)
+			if actualChecksum.lower() != checksum.lower():
+				DownloadHelper._removePartFiles(partFile, partInfoFile)
+				raise ValueError(f'download of url "{url}" has {hashName} "{actualChecksum}", but expected "{checksum}"')
+		os.replace(partFile, targetFile)
+		partInfoFile.unlink(missing_ok=True)
+		return targetFile
+
+	@staticmethod
+	def DownloadAsset(asset: GithubRelease.GithubReleaseAsset, targetFolder: pathlib.Path, checksum: str|None = None,
+						hashName: str = "sha256", resume: bool = True) -> pathlib.Path:
+		"""downloads the Github release asset to a file with the asset's name in targetFolder, checking it against the asset's size"""
+		return DownloadHelper.DownloadFile(asset.downloadUrl, targetFolder / asset.name, asset.size, checksum, hashName, resume)
+
+	@staticmethod
+	def _getResumablePartInfo(url: str, partFile: pathlib.Path, partInfoFile: pathlib.Path, expectedSize: int|None) -> dict|None:
+		"""
+		the info saved when the part file was started, if it's for the same download and the server gave us something
+		to make sure it's still the same file (a strong ETag or a Last-Modified); otherwise, any old part file is removed
+		"""
+		if not partFile.exists():
+			return None
+		try:
+			with open(partInfoFile, "r", encoding="utf-8") as f:
+				partInfo = json.load(f)
+		except (OSError, ValueError):
+			partInfo = None
+		if partInfo and partInfo.get("url") == url and partInfo.get("expectedSize") == expectedSize and partFile.stat().st_size > 0 and \
+				(expectedSize is None or partFile.stat().st_size <= expectedSize):
+			etag = partInfo.get("etag") or ""
+			partInfo["etag"] = "" if etag.startswith("W/") else etag		# If-Range only works with strong ETags
+			if partInfo["etag"] or partInfo.get("lastModified"):
+				return partInfo
+		logging.debug(f"not resuming from part file |{partFile}|: it's not from this download, or we can't tell if it is")
+		DownloadHelper._removePartFiles(partFile, partInfoFile)
+		return None
+
+	@staticmethod
+	def _writePartInfo(partInfoFile: pathlib.Path, partInfo: dict) -> None:
+		with open(partInfoFile, "w", encoding="utf-8") as f:
+			json.dump(partInfo, f)
+
+	@staticmethod
+	def _removePartFiles(partFile: pathlib.Path, partInfoFile: pathlib.Path) -> None:
+		partFile.unlink(missing_ok=True)
+		partInfoFile.unlink(missing_ok=True)
+
+	@staticmethod
+	def _getServerSize(resp, startAt: int) -> int|None:
+		"""the full size of the file, according to the server (Content-Range for a partial response, else Content-Length)"""
+		if startAt > 0:
+			total = (resp.headers.get("Content-Range") or "").rpartition("/")[2]
+			return int(total) if total.isdigit() else None
+		length = resp.headers.get("Content-Length")
+		return int(length) if length and length.isdigit() else None
+
+	@staticmethod
+	def _getFileHash(file: pathlib.Path, hashName: str) -> str:
+		hasher = hashlib.new(hashName)
+		with open(file, 'rb', buffering=0) as f:
+			for chunk in iter(lambda: f.read(DownloadHelper._chunkSize), b''):
+				hasher.update(chunk)
+		return hasher.hexdigest()
@@ -1,7 +1,7 @@
 #!python3
 # -*- coding: utf-8 -*-
 
-import os, pathlib, shutil, hashlib, stat
+import os, sys, pathlib, shutil, hashlib, stat
 from typing import Any, Iterable, Callable
 from .loghelper import LogHelper
 
@@ -62,6 +62,15 @@ def FindOnPath(exe: str) -> pathlib.Path|None:
 			return pathlib.Path(exepath)
 		return None
 
+	@staticmethod
+	def GetUserCacheFolder(*subFolders: str) -> pathlib.Path:
+		"""the user's cache folder (%LocalAppData% on Windows, else $XDG_CACHE_HOME or ~/.cache), plus any subFolders; doesn't create it"""
+		if sys.platform == "win32":
+			base = os.environ.get("LOCALAPPDATA", os.path.expanduser("~/AppData/Local"))
+		else:
+			base = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+		return pathlib.Path(base).joinpath(*subFolders)
+
 	@staticmethod
 	def MultiGlob(folder: pathlib.Path, globs: list[str], caseSensitive: bool|None = None) -> Iterable[pathlib.Path]:
 		for g in globs:
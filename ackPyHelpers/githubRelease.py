@@ -1,7 +1,8 @@
 #!python3
 # -*- coding: utf-8 -*-
 
-import urllib.request, json, logging
+import urllib.request, urllib.error, json, logging, os, pathlib, hashlib, time
+from .fileHelpers import FileHelpers
 
 class GithubRelease:
 	"""
@@ -13,10 +14,19 @@ class GithubRelease:
 	from githubHelper import GithubRelease
 	latest = GithubRelease.GetLatestRelease("microsoft", "vscode")
 	release = GithubRelease.GetReleaseForTag("microsoft", "vscode", "1.82.0")
+
+	responses are cached on disk (see ConfigureCache() for where and for how long): within the TTL, the cached
+	copy is used without asking Github at all; after that, the request sends the cached ETag/Last-Modified, and
+	if Github says nothing's changed (a 304, which doesn't count against the API rate limit), the cached copy
+	is used again. if Github can't be reached (or answers with an error), or offline mode is on, any cached copy is used, however old.
 	"""
 
 	_latestReleaseUrlTemplate: str = "https://api.github.com/repos/{0}/{1}/releases/latest"
 	_releaseUrlTemplate: str = "https://api.github.com/repos/{0}/{1}/releases/tags/{2}"
+	_cacheEnabled: bool = True
+	_cacheFolder: pathlib.Path|None = None
+	_cacheTtlSecs: float = 15 * 60
+	_offline: bool = False
 
 	class GithubReleaseAsset:
 		"contains information about a release asset (i.e. a file)"
@@ -97,17 +107,100 @@ def __repr__(self) -> str:
 	def GetLatestRelease(owner: str, repo: str) -> "GithubRelease":# -> Self:	#only for 3.11+ ?? so not yet...
 		"retrieves the latest release information for the specified owner and repository"
 		url = GithubRelease._latestReleaseUrlTemplate.format(owner, repo)
-		logging.debug(f"getting url |{url}|")
-		with urllib.request.urlopen(url) as resp:
-			return GithubRelease(resp.read())
+		return GithubRelease(GithubRelease._getUrl(url))
 
 	@staticmethod
 	def GetReleaseForTag(owner: str, repo: str, tag: str) -> "GithubRelease":# -> Self:	#only for 3.11+ ?? so not yet...
 		"retrieves the release information for the specified owner, repository and tag"
 		url = GithubRelease._releaseUrlTemplate.format(owner, repo, tag)
+		return GithubRelease(GithubRelease._getUrl(url))
+
+	@staticmethod
+	def ConfigureCache(enabled: bool = True, cacheFolder: pathlib.Path|None = None, ttlSecs: float|None = None, offline: bool = False) -> None:
+		"""
+		configures the response cache: cacheFolder defaults to a 'githubReleases' folder in the user's cache folder
+		(e.g. ~/.cache or %LocalAppData%); ttlSecs is how long a cached response is used before checking with Github
+		again (defaults to 15 minutes); if offline is True, only cached responses are used, and it's an error if
+		there isn't one
+		"""
+		GithubRelease._cacheEnabled = enabled
+		GithubRelease._cacheFolder = cacheFolder
+		if ttlSecs is not None:
+			GithubRelease._cacheTtlSecs = ttlSecs
+		GithubRelease._offline = offline
+
+	@staticmethod
+	def _getUrl(url: str) -> bytes:
+		if not GithubRelease._cacheEnabled:
+			logging.debug(f"getting url |{url}|")
+			with urllib.request.urlopen(url) as resp:
+				return resp.read()
+
+		cacheFile = GithubRelease._getCacheFolder() / f"{hashlib.sha1(url.encode()).hexdigest()}.json"
+		cached = GithubRelease._readCacheFile(cacheFile)
+		if cached is not None and (GithubRelease._offline or time.time() - cached["fetched"] < GithubRelease._cacheTtlSecs):
+			logging.debug(f"using cached response for url |{url}| from file |{cacheFile}|")
+			return cached["body"].encode()
+		if GithubRelease._offline:
+			raise FileNotFoundError(f'offline mode is enabled, but there is no cached response for url "{url}"')
+
+		req = urllib.request.Request(url)
+		if cached is not None:
+			if cached["etag"]: req.add_header("If-None-Match", cached["etag"])
+			if cached["lastModified"]: req.add_header("If-Modified-Since", cached["lastModified"])
 		logging.debug(f"getting url |{url}|")
-		with urllib.request.urlopen(url) as resp:
-			return GithubRelease(resp.read())
+		try:
+			with urllib.request.urlopen(req) as resp:
+				body = resp.read()
+				etag = resp.headers.get("ETag", "")
+				lastModified = resp.headers.get("Last-Modified", "")
+		except urllib.error.HTTPError as ex:
+			if cached is None:
+				raise
+			if ex.code != 304:
+				# e.g. rate limited, or Github having a bad day; same as not being able to reach it:
+				logging.warning(f'could not get url "{url}" (HTTP {ex.code} {ex.reason}); using cached response from {time.ctime(cached["fetched"])}')
+				return cached["body"].encode()
+			logging.debug(f"url |{url}| not modified, using cached response")
+			cached["fetched"] = time.time()
+			GithubRelease._writeCacheFile(cacheFile, cached)
+			return cached["body"].encode()
+		except urllib.error.URLError as ex:
+			if cached is None:
+				raise
+			logging.warning(f'could not get url "{url}" ({ex.reason}); using cached response from {time.ctime(cached["fetched"])}')
+			return cached["body"].encode()
+		GithubRelease._writeCacheFile(cacheFile, { "url": url, "fetched": time.time(), "etag": etag, "lastModified": lastModified, "body": body.decode() })
+		return body
+
+	@staticmethod
+	def _getCacheFolder() -> pathlib.Path:
+		if GithubRelease._cacheFolder is None:
+			GithubRelease._cacheFolder = FileHelpers.GetUserCacheFolder("ackPyHelpers", "githubReleases")
+		return GithubRelease._cacheFolder
+
+	@staticmethod
+	def _readCacheFile(cacheFile: pathlib.Path) -> dict|None:
+		try:
+			with open(cacheFile, "r", encoding="utf-8") as f:
+				return json.load(f)
+		except FileNotFoundError:
+			return None
+		except (OSError, ValueError) as ex:
+			logging.debug(f"ignoring unreadable cache file |{cacheFile}|: {ex}")
+			return None
+
+	@staticmethod
+	def _writeCacheFile(cacheFile: pathlib.Path, data: dict) -> None:
+		try:
+			cacheFile.parent.mkdir(parents=True, exist_ok=True)
+			# write to a temp file and rename it, so another process reading it never sees half a file:
+			tmpFile = cacheFile.with_name(f"{cacheFile.name}.{os.getpid()}.tmp")
+			with open(tmpFile, "w", encoding="utf-8") as f:
+				json.dump(data, f)
+			os.replace(tmpFile, cacheFile)
+		except OSError as ex:
+			logging.debug(f"could not write cache file |{cacheFile}|: {ex}")
 
 	@property
 	def id(self) -> int:
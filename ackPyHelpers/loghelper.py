@@ -1,7 +1,8 @@
 #!python3
 # -*- coding: utf-8 -*-
 
-import sys
+import sys, re, time, json, queue, threading, atexit, pathlib
+from typing import Any, Callable, Iterable, TextIO
 if sys.platform == "win32":
 	import ctypes
 	from ctypes import wintypes, byref, POINTER
@@ -17,7 +18,173 @@ class LogHelper:
 	the values of posargs and kwargs are callable objects (like a lambda), they will be called and
 	the returned value used for the formatting. This allows for delayed evaluation, e.g. for the
 	Verbose() method, if verbose logging is not enabled, the callable will not be invoked.
+
+	for hot loops, where even the call to Verbose() and building the message adds up, check IsVerbose()
+	first, or grab the function from GetVerboseWriter() once and call that: it's a no-op if verbose logging
+	is not enabled, and otherwise takes a %-style (printf style) message with args that are only formatted
+	when the message is actually written.
+
+	by default, every message is print()ed right away; to write somewhere else, or to batch up the writes, pass
+	one of the sinks below (ConsoleSink, BufferedSink, ThreadedSink, FileSink) to Init(). messages still in a
+	sink get written when the process exits, or call Flush() (e.g. before print()ing something directly).
+
+	for collecting timings, etc, Init() can also turn on structured mode, where each message is written as a
+	single line of json instead, with the level, the message, its format args and timestamps. any method can
+	also be passed extra fields for that with a dict (or a callable returning one) in the 'logFields' kwarg
+	(these are ignored in regular mode), and Timed() will log how long a block of code took:
+
+		LogHelper.Init(sink=LogHelper.FileSink(logPath), structured=True)
+		with LogHelper.Timed("hashFile", file=str(f)) as t:
+			...
+			t.fields["bytes"] = size
 	"""
+	class ConsoleSink:
+		"""the default output sink: print()s each message right away"""
+		def write(self, line: str) -> None:
+			print(line)
+
+		def flush(self) -> None:
+			sys.stdout.flush()
+
+		def close(self) -> None:
+			self.flush()
+
+	class BufferedSink:
+		"""
+		collects messages and writes them to the stream (defaults to stdout) in batches: when maxLines are waiting,
+		or when flushSecs have gone by since the last write (that's only checked when a message comes in, so
+		use a ThreadedSink around it if the tail end can't wait for the next message or exit)
+		"""
+		def __init__(self, stream: TextIO|None = None, maxLines: int = 500, flushSecs: float = 0.5) -> None:
+			self._stream = stream
+			self._maxLines = maxLines
+			self._flushSecs = flushSecs
+			self._lines: list[str] = []
+			self._lastFlush = time.monotonic()
+
+		def write(self, line: str) -> None:
+			self._lines.append(line)
+			if len(self._lines) >= self._maxLines or time.monotonic() - self._lastFlush >= self._flushSecs:
+				self.flush()
+
+		def flush(self) -> None:
+			stream = self._stream if self._stream is not None else sys.stdout	# look up stdout when writing, in case it's been redirected
+			if self._lines:
+				self._lines.append("")	# for the last newline
+				stream.write("\n".join(self._lines))
+				self._lines.clear()
+			stream.flush()
+			self._lastFlush = time.monotonic()
+
+		def close(self) -> None:
+			self.flush()
+
+	class FileSink(BufferedSink):
+		"""writes messages to a file, in batches like BufferedSink; by default, strips out the ANSI color codes"""
+		_ansiRegex = re.compile(r"\033\[[0-9;]*m")
+
+		def __init__(self, filePath: pathlib.Path, stripAnsi: bool = True, append: bool = False, maxLines: int = 500, flushSecs: float = 2.0) -> None:
+			super().__init__(open(filePath, "a" if append else "w", encoding="utf-8"), maxLines, flushSecs)
+			self._stripAnsi = stripAnsi
+
+		def write(self, line: str) -> None:
+			super().write(LogHelper.FileSink._ansiRegex.sub("", line) if self._stripAnsi else line)
+
+		def close(self) -> None:
+			if not self._stream.closed:
+				self.flush()
+				self._stream.close()
+
+	class ThreadedSink:
+		"""
+		hands messages off through a queue to a background thread that writes them to another sink (defaults
+		to a BufferedSink on stdout), so the caller never waits on the terminal/pipe/file; whenever the queue
+		empties out, the other sink is flushed, so output doesn't sit around while the caller is busy
+		"""
+		_flushMarker = object()
+
+		def __init__(self, sink: "LogHelper.ConsoleSink|LogHelper.BufferedSink|None" = None, maxQueued: int = 10000) -> None:
+			self._sink = sink if sink is not None else LogHelper.BufferedSink()
+			self._queue: queue.Queue = queue.Queue(maxsize=maxQueued)	# bounded, so a runaway producer eventually waits instead of eating memory
+			self._thread = threading.Thread(target=self._run, name="LogHelper.ThreadedSink", daemon=True)
+			self._thread.start()
+
+		def write(self, line: str) -> None:
+			self._queue.put(line)
+
+		def flush(self) -> None:
+			"""blocks until everything queued so far has been written"""
+			if self._thread.is_alive():
+				self._queue.put(LogHelper.ThreadedSink._flushMarker)
+				self._queue.join()
+
+		def close(self) -> None:
+			if self._thread.is_alive():
+				self._queue.put(None)
+				self._thread.join()
+				self._sink.close()
+
+		def _run(self) -> None:
+			while True:
+				item = self._queue.get()
+				try:
+					if item is None:
+						return
+					if item is not LogHelper.ThreadedSink._flushMarker:
+						self._sink.write(item)
+					if item is LogHelper.ThreadedSink._flushMarker or self._queue.empty():
+						self._sink.flush()
+				finally:
+					self._queue.task_done()
+
+	class CaptureSink:
+		"""
+		just collects the messages so they can be handed off somewhere else, e.g. from a worker process back to the
+		main one, which can then write them out (in order) with LogHelper.WriteLines()
+		"""
+		def __init__(self) -> None:
+			self._lines: list[str] = []
+
+		def write(self, line: str) -> None:
+			self._lines.append(line)
+
+		def flush(self) -> None:
+			pass
+
+		def close(self) -> None:
+			pass
+
+		def takeLines(self) -> list[str]:
+			"""returns the messages collected so far and clears them out"""
+			lines = self._lines
+			self._lines = []
+			return lines
+
+	class _Timed:
+		def __init__(self, name: str, fields: dict[str, Any]) -> None:
+			self.name = name
+			self.fields = fields
+			self._start = 0.0
+			self._elapsedMs = 0.0
+
+		def __enter__(self) -> "LogHelper._Timed":
+			self._start = time.perf_counter()
+			return self
+
+		def __exit__(self, exc_type, exc_value, traceback) -> bool:
+			self._elapsedMs = (time.perf_counter() - self._start) * 1000
+			if LogHelper._structured or LogHelper._verboseEnabled:
+				fields = dict(self.fields, name=self.name, elapsed_ms=round(self._elapsedMs, 3))
+				if exc_type is not None:
+					fields["error"] = exc_type.__name__
+				LogHelper._writeMessage("{0} took {1:.1f} ms", LogHelper.Style.Normal, LogHelper.Fore.LightBlackEx, "TIMING",
+							self.name, self._elapsedMs, logFields=fields)
+			return False	# propagate any exceptions
+
+		@property
+		def elapsedMs(self) -> float:
+			return self._elapsedMs
+
 	class AnsiFore():
 		Black = "\033[30m"
 		Red = "\033[31m"
@@ -87,16 +254,50 @@ class NoAnsiStyle:
 	XSmallDivider = "·" * 80
 
 	_verboseEnabled = False
+	_structured = False
+	_verboseWriter: Callable[..., None] = None	# set below, after class is defined
+	_sink: "LogHelper.ConsoleSink|LogHelper.BufferedSink|LogHelper.ThreadedSink" = None	# set below, after class is defined
 
 	@staticmethod
-	def Init(verbose : bool = False) -> None:
+	def Init(verbose : bool = False, sink: "LogHelper.ConsoleSink|LogHelper.BufferedSink|LogHelper.ThreadedSink|None" = None, structured: bool = False) -> None:
 		LogHelper._verboseEnabled = verbose
+		LogHelper._structured = structured
+		LogHelper._verboseWriter = LogHelper._writeVerbosePct if verbose else LogHelper._noop
+		if sink is not None and sink is not LogHelper._sink:
+			LogHelper._sink.close()
+			LogHelper._sink = sink
+		# (structured mode doesn't need this: the json lines never get the colors, just the message itself)
 		if not LogHelper._isAnsiSupported():
 			# if ansi escapes not supported:
 			# TODO: this isn't the right way; need to see what colorama is doing...
 			LogHelper.Fore = LogHelper.NoAnsiFore()
 			LogHelper.Back = LogHelper.NoAnsiBack()
 			LogHelper.Style = LogHelper.NoAnsiStyle()
+		else:
+			# in case an earlier Init() turned them off:
+			LogHelper.Fore = LogHelper.AnsiFore()
+			LogHelper.Back = LogHelper.AnsiBack()
+			LogHelper.Style = LogHelper.AnsiStyle()
+
+	@staticmethod
+	def Flush() -> None:
+		"""makes sure everything logged so far has been written out by the current sink"""
+		LogHelper._sink.flush()
+
+	@staticmethod
+	def Close() -> None:
+		"""flushes and closes the current sink, and goes back to the default ConsoleSink; this is called automatically at exit"""
+		LogHelper._sink.close()
+		LogHelper._sink = LogHelper.ConsoleSink()
+
+	@staticmethod
+	def Timed(name: str, /, **fields) -> "LogHelper._Timed":
+		"""
+		returns a context manager that logs how long its block took, as a TIMING message with fields for the name
+		and elapsed_ms, plus any fields passed in here or added to its .fields along the way; in regular mode, this
+		is only written if verbose logging is enabled
+		"""
+		return LogHelper._Timed(name, fields)
 
 	@staticmethod
 	def Log(message : str, /, *posargs, **kwargs) -> None:
@@ -110,6 +311,37 @@ def Verbose(message : str, /, *posargs, **kwargs) -> None:
 			return
 		LogHelper._writeMessage(message, LogHelper.Style.Normal, LogHelper.Fore.Yellow, "VERBOSE", *posargs, **kwargs)
 
+	@staticmethod
+	def IsVerbose() -> bool:
+		"""returns whether verbose logging is enabled; for guarding expensive message building in hot loops"""
+		return LogHelper._verboseEnabled
+
+	@staticmethod
+	def IsStructured() -> bool:
+		"""whether messages are being written as json lines (see Init())"""
+		return LogHelper._structured
+
+	@staticmethod
+	def WriteLines(lines: Iterable[str]) -> None:
+		"""writes already formatted messages (e.g. from a CaptureSink) to the current sink as-is"""
+		for line in lines:
+			LogHelper._sink.write(line)
+
+	@staticmethod
+	def GetVerboseWriter() -> Callable[..., None]:
+		"""
+		returns a function for writing VERBOSE messages: if verbose logging is not enabled, this is a cached
+		no-op function; otherwise, the message is a %-style string and any args (which can be callables, same
+		as above) are only formatted when it's written. grab it once and call it in the loop:
+
+			logVerbose = LogHelper.GetVerboseWriter()
+			for f in files:
+				logVerbose("processing file |%s|", f)
+
+		NOTE: if Init() is called again, need to get the writer again.
+		"""
+		return LogHelper._verboseWriter
+
 	@staticmethod
 	def Info(message : str, /, *posargs, **kwargs) -> None:
 		"""prints an INFO-level message to the console"""
@@ -212,20 +444,54 @@ def _isAnsiSupported() -> bool:
 			getConsoleMode(h, byref(mode))
 		return bool(mode.value & 0x0004)
 
+	@staticmethod
+	def _noop(*posargs, **kwargs) -> None:
+		pass
+
+	@staticmethod
+	def _writeVerbosePct(message : str, /, *posargs) -> None:
+		newMessage = message
+		newPosArgs = None
+		if posargs:
+			newPosArgs = tuple(a() if callable(a) else a for a in posargs)
+			newMessage = message % newPosArgs
+		if LogHelper._structured:
+			LogHelper._sink.write(LogHelper._toJsonLine("VERBOSE", message, newMessage, newPosArgs, None, None))
+		else:
+			LogHelper._writeMessage(newMessage, LogHelper.Style.Normal, LogHelper.Fore.Yellow, "VERBOSE")
+
 	@staticmethod
 	def _writeMessage(message : str, style : str, color : str, prefix : str, /, *posargs, **kwargs) -> None:
-		newPosArgs = [] if posargs else posargs
-		for a in posargs:
-			newPosArgs.append(a() if callable(a) else a)
-		newKwArgs = {} if kwargs else kwargs
-		for k in kwargs:
-			val = kwargs[k]
-			newKwArgs[k] = val() if callable(val) else val
+		fields = kwargs.pop("logFields", None) if kwargs else None
 		newMessage = message
-		if newPosArgs or newKwArgs:
+		newPosArgs = newKwArgs = None
+		if posargs or kwargs:
+			# only build new args when there's something to format:
+			newPosArgs = [a() if callable(a) else a for a in posargs]
+			newKwArgs = { k: (v() if callable(v) else v) for k, v in kwargs.items() }
 			newMessage = message.format(*newPosArgs, **newKwArgs)
 
-		if prefix:
-			print(f"{style}{color}{prefix}: {newMessage}{LogHelper.Style.ResetAll}")
+		if LogHelper._structured:
+			if callable(fields): fields = fields()
+			LogHelper._sink.write(LogHelper._toJsonLine(prefix.upper() if prefix else "MESSAGE", message, newMessage, newPosArgs, newKwArgs, fields))
+		elif prefix:
+			LogHelper._sink.write(f"{style}{color}{prefix}: {newMessage}{LogHelper.Style.ResetAll}")
 		else:
-			print(f"{style}{color}{newMessage}{LogHelper.Style.ResetAll}")
+			LogHelper._sink.write(f"{style}{color}{newMessage}{LogHelper.Style.ResetAll}")
+
+	@staticmethod
+	def _toJsonLine(level: str, message: str, formattedMessage: str, posargs: "list|tuple|None", kwargs: dict|None, fields: dict|None) -> str:
+		# ts is monotonic, for timing things within a run; time is wall clock, for lining up separate runs:
+		record = { "ts": time.monotonic(), "time": time.time(), "level": level, "msg": formattedMessage }
+		if posargs or kwargs:
+			record["fmt"] = message
+			if posargs: record["args"] = posargs
+			if kwargs: record["kwargs"] = kwargs
+		if fields:
+			for k, v in fields.items():
+				record.setdefault(k, v)
+		return json.dumps(record, ensure_ascii=False, default=str)
+
+LogHelper._verboseWriter = LogHelper._noop
+LogHelper._sink = LogHelper.ConsoleSink()
+atexit.register(LogHelper.Close)
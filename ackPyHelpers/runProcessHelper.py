@@ -1,7 +1,11 @@
 #!python3
 # -*- coding: utf-8 -*-
 
-import os, subprocess
+import os, sys, subprocess, concurrent.futures, threading, time, hashlib
+from collections import namedtuple
+from typing import Iterable
+if sys.platform != "win32":
+	import resource
 
 class RunProcessHelper:
 	"""
@@ -11,22 +15,57 @@ class RunProcessHelper:
 	result = RunProcessHelper.runProcess(["uname", "-v"])
 	print(f"exit code = {result.exitCode}")
 	print(f"stdout = {result.stdout}")
+
+	to run a bunch of commands, with a limited number of them running at once:
+	results = RunProcessHelper.runProcesses([["optipng", f] for f in files], maxConcurrent=4, timeout=120, output=RunProcessHelper.OutputDiscard)
+	results come back in the same order as the commands.
+
+	to see where the time goes, call enableProfiling() first; then every command run gets a ProcessRecord
+	(see getProfileRecords()), and getProfileReport() summarizes them by executable. the cpu times come from
+	the rusage deltas for child processes, so they're only exact when one command runs at a time; with
+	runProcesses(), other commands finishing at the same time can get counted in (the totals still add up).
 	"""
 
+	OutputCapture = "capture"	# capture stdout and stderr as text into the results (the default)
+	OutputDiscard = "discard"	# throw away the output; results' stdout and stderr will be empty
+	OutputStream = "stream"		# let the output go straight to this process's stdout and stderr; results' stdout and stderr will be empty
+
+	ProcessRecord = namedtuple("ProcessRecord", ["executable", "argsHash", "wallSecs", "userCpuSecs", "sysCpuSecs", "exitCode", "outputSize", "timedOut"])
+
+	_profilingEnabled = False
+	_profileRecords: list["RunProcessHelper.ProcessRecord"] = []
+	_profileLock = threading.Lock()
+
 	class RunProcessResults:
 		def __init__(self) -> None:
 			self._exitCode = 0
 			self._stdout = ''
 			self._stderr = ''
+			self._timedOut = False
 
 		@staticmethod
 		def _parseResult(processResult: subprocess.CompletedProcess) -> "RunProcessHelper.RunProcessResults":	# -> Self:
 			result = RunProcessHelper.RunProcessResults()
 			result._exitCode = processResult.returncode
-			result._stdout = processResult.stdout
-			result._stderr = processResult.stderr
+			result._stdout = processResult.stdout if processResult.stdout is not None else ''
+			result._stderr = processResult.stderr if processResult.stderr is not None else ''
 			return result
 
+		@staticmethod
+		def _parseTimeout(timeoutErr: subprocess.TimeoutExpired) -> "RunProcessHelper.RunProcessResults":	# -> Self:
+			result = RunProcessHelper.RunProcessResults()
+			result._exitCode = -1
+			result._timedOut = True
+			result._stdout = RunProcessHelper.RunProcessResults._decode(timeoutErr.stdout)
+			result._stderr = RunProcessHelper.RunProcessResults._decode(timeoutErr.stderr)
+			return result
+
+		@staticmethod
+		def _decode(output: bytes|str|None) -> str:
+			# on timeout, whatever output we got may come back as bytes, even in text mode:
+			if output is None: return ''
+			return output.decode(errors="replace") if isinstance(output, bytes) else output
+
 		@property
 		def exitCode(self) -> int:
 			return self._exitCode
@@ -39,6 +78,11 @@ def stdout(self) -> str:
 		def stderr(self) -> str:
 			return self._stderr
 
+		@property
+		def timedOut(self) -> bool:
+			"whether the process was killed because it ran past the timeout (exitCode will be -1)"
+			return self._timedOut
+
 		def getCombinedStdoutStderr(self) -> str:
 			result = ''
 			if self._stdout and self._stderr:
@@ -50,6 +94,102 @@ def getCombinedStdoutStderr(self) -> str:
 			return result
 
 	@staticmethod
-	def runProcess(args: list[str]) -> "RunProcessHelper.RunProcessResults":
-		proc = subprocess.run(args, capture_output=True, text=True)
+	def runProcess(args: list[str], timeout: float|None = None, output: str = OutputCapture) -> "RunProcessHelper.RunProcessResults":
+		"""
+		runs the command and waits for it to finish; if timeout (in seconds) is given and the process runs longer than that,
+		it's killed and the results' timedOut will be True
+		"""
+		if not RunProcessHelper._profilingEnabled:
+			return RunProcessHelper._runProcess(args, timeout, output)
+		startUsage = RunProcessHelper._getChildrenCpuSecs()
+		startWall = time.perf_counter()
+		result = RunProcessHelper._runProcess(args, timeout, output)
+		wallSecs = time.perf_counter() - startWall
+		endUsage = RunProcessHelper._getChildrenCpuSecs()
+		RunProcessHelper._addProfileRecord(args, result, wallSecs, startUsage, endUsage)
+		return result
+
+	@staticmethod
+	def _runProcess(args: list[str], timeout: float|None, output: str) -> "RunProcessHelper.RunProcessResults":
+		if output == RunProcessHelper.OutputCapture:
+			kwargs = { "capture_output": True, "text": True }
+		elif output == RunProcessHelper.OutputDiscard:
+			kwargs = { "stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL }
+		elif output == RunProcessHelper.OutputStream:
+			kwargs = {}
+		else:
+			raise ValueError(f'invalid output option: "{output}"')
+		try:
+			proc = subprocess.run(args, timeout=timeout, **kwargs)
+		except subprocess.TimeoutExpired as ex:
+			return RunProcessHelper.RunProcessResults._parseTimeout(ex)
 		return RunProcessHelper.RunProcessResults._parseResult(proc)
+
+	@staticmethod
+	def runProcesses(argsList: Iterable[list[str]], maxConcurrent: int|None = None, timeout: float|None = None,
+						output: str = OutputCapture) -> list["RunProcessHelper.RunProcessResults"]:
+		"""
+		runs all of the commands, with up to maxConcurrent (defaults to the cpu count) of them running at once, and
+		returns their results in the same order as the commands; timeout and output apply to each command, same as runProcess()
+		"""
+		argsList = list(argsList)
+		if not argsList:
+			return []
+		maxConcurrent = min(maxConcurrent if maxConcurrent else (os.cpu_count() or 1), len(argsList))
+		# threads are fine for this: they just sit waiting on the child processes:
+		with concurrent.futures.ThreadPoolExecutor(max_workers=maxConcurrent) as executor:
+			return list(executor.map(lambda args: RunProcessHelper.runProcess(args, timeout, output), argsList))
+
+	@staticmethod
+	def enableProfiling(enable: bool = True) -> None:
+		"""turns on (or off) recording a ProcessRecord for each command that's run"""
+		RunProcessHelper._profilingEnabled = enable
+
+	@staticmethod
+	def getProfileRecords() -> list["RunProcessHelper.ProcessRecord"]:
+		with RunProcessHelper._profileLock:
+			return list(RunProcessHelper._profileRecords)
+
+	@staticmethod
+	def clearProfileRecords() -> None:
+		with RunProcessHelper._profileLock:
+			RunProcessHelper._profileRecords.clear()
+
+	@staticmethod
+	def getProfileReport() -> str:
+		"""returns a table of the profile records totaled up by executable, with the ones that took the most time first"""
+		totals: dict[str, list] = {}
+		for r in RunProcessHelper.getProfileRecords():
+			# count, wall, max wall, user cpu, sys cpu, failures, output size:
+			t = totals.setdefault(r.executable, [0, 0.0, 0.0, 0.0, 0.0, 0, 0])
+			t[0] += 1
+			t[1] += r.wallSecs
+			t[2] = max(t[2], r.wallSecs)
+			t[3] += r.userCpuSecs if r.userCpuSecs is not None else 0.0
+			t[4] += r.sysCpuSecs if r.sysCpuSecs is not None else 0.0
+			t[5] += 1 if r.exitCode != 0 else 0
+			t[6] += r.outputSize
+		lines = [f"{'executable':<24} {'count':>7} {'wall secs':>10} {'avg secs':>9} {'max secs':>9} {'user cpu':>9} {'sys cpu':>9} {'failed':>7} {'output':>10}"]
+		for exe, t in sorted(totals.items(), key=lambda kv: kv[1][1], reverse=True):
+			lines.append(f"{exe:<24} {t[0]:>7} {t[1]:>10.2f} {t[1] / t[0]:>9.3f} {t[2]:>9.3f} {t[3]:>9.2f} {t[4]:>9.2f} {t[5]:>7} {t[6]:>10}")
+		return os.linesep.join(lines)
+
+	@staticmethod
+	def _getChildrenCpuSecs() -> tuple[float, float]|None:
+		if sys.platform == "win32":
+			return None
+		usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+		return usage.ru_utime, usage.ru_stime
+
+	@staticmethod
+	def _addProfileRecord(args: list[str], result: "RunProcessHelper.RunProcessResults", wallSecs: float,
+							startUsage: tuple[float, float]|None, endUsage: tuple[float, float]|None) -> None:
+		userCpu = sysCpu = None
+		if startUsage is not None and endUsage is not None:
+			userCpu = endUsage[0] - startUsage[0]
+			sysCpu = endUsage[1] - startUsage[1]
+		argsHash = hashlib.sha1("\0".join(str(a) for a in args[1:]).encode(errors="replace")).hexdigest()[:16]
+		record = RunProcessHelper.ProcessRecord(os.path.basename(str(args[0])), argsHash, wallSecs, userCpu, sysCpu,
+												result.exitCode, len(result.stdout) + len(result.stderr), result.timedOut)
+		with RunProcessHelper._profileLock:
+			RunProcessHelper._profileRecords.append(record)
@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 
 import sys, os, pathlib, argparse, time
+from types import SimpleNamespace
 import logging
 from populateSystemData import OSDetails
 
@@ -12,7 +13,21 @@ def main():
 	args = _initArgParser().parse_args()
 	_initLogging(args.verbose)
 
-	deets = OSDetails.GetDetails()
+	if args.daemon or args.stopDaemon:
+		from populateSystemData import OSDetailsDaemon
+		if args.stopDaemon:
+			return 0 if OSDetailsDaemon.Stop() else 1
+		OSDetailsDaemon.Serve()
+		return 0
+
+	deets = None
+	if args.useDaemon:
+		from populateSystemData import OSDetailsDaemon
+		values = OSDetailsDaemon.Query()
+		if values is not None:
+			deets = SimpleNamespace(**values)
+	if not deets:
+		deets = OSDetails.GetDetails(useSnapshot=not args.noSnapshot)
 	noColors = args.noColors
 	print("")
 	if args.showAllProps:
@@ -54,6 +69,10 @@ def _initArgParser() -> argparse.ArgumentParser:
 	parser = argparse.ArgumentParser()
 	parser.add_argument("-a", "--showAllProps", action="store_true", help="show all properties rather than short list")
 	parser.add_argument("-n", "--noColors", action="store_true", help="no colors or ANSI formating")
+	parser.add_argument("-s", "--noSnapshot", action="store_true", help="don't use (or update) the saved snapshot of the OS details; figure everything out again")
+	parser.add_argument("-u", "--useDaemon", action="store_true", help="get the details from the daemon (see --daemon) if it's running, else figure them out like usual")
+	parser.add_argument("--daemon", action="store_true", help="run as a daemon that answers requests for the details on a Unix socket (doesn't return until stopped)")
+	parser.add_argument("--stopDaemon", action="store_true", help="stop the running daemon")
 	parser.add_argument("-v", "--verbose", action="store_true", help="enable verbose logging")
 	return parser
 
@@ -0,0 +1,93 @@
+#!python3
+# -*- coding: utf-8 -*-
+
+import sys, argparse, pathlib, tempfile, time
+import mutagen.flac
+from ackPyHelpers import LogHelper
+from benchMusicTags import writeEmptyFlac
+from setMusicFileProperties import MusicFolderHandler, LibraryCatalog
+
+def main() -> int:
+	args = initArgParser().parse_args()
+	LogHelper.Init(verbose=args.verbose)
+
+	failures = []
+	with tempfile.TemporaryDirectory(prefix="benchLibraryCatalog") as tmp:
+		tmpFolder = pathlib.Path(tmp)
+		sourceRoot, targetRoot, dbPath = tmpFolder / "src", tmpFolder / "trg", tmpFolder / "catalog.sqlite"
+		albums = createAlbums(sourceRoot, targetRoot, args.albums, args.tracks)
+		total = args.albums * args.tracks
+
+		# copying the tags makes every target file change, so the first export reads them all:
+		copyAllAlbums(albums)
+		exported, unchanged, secs = refresh(dbPath, targetRoot, args.jobs)
+		print(f"first export:               {exported:>5} exported, {unchanged:>5} unchanged  {secs:>8,.3f} secs")
+		if exported != total:
+			failures.append(f"first export read {exported} file(s), expected {total}")
+
+		# copying again when everything's already in sync shouldn't touch any files (not even their ctime), so the
+		# catalog shouldn't need to read any of them again:
+		copyAllAlbums(albums)
+		exported, unchanged, secs = refresh(dbPath, targetRoot, args.jobs)
+		print(f"export after re-copy:       {exported:>5} exported, {unchanged:>5} unchanged  {secs:>8,.3f} secs")
+		if exported != 0 or unchanged != total:
+			failures.append(f"export after an in-sync copy read {exported} file(s), expected 0")
+
+		# but a real change still has to be picked up:
+		changedFile = next(albums[0][1].glob("*.flac"))
+		changedFile.chmod(0o644)
+		flac = mutagen.flac.FLAC(changedFile)
+		flac["TITLE"] = ["changed"]
+		flac.save()
+		exported, unchanged, secs = refresh(dbPath, targetRoot, args.jobs)
+		print(f"export after changing one:  {exported:>5} exported, {unchanged:>5} unchanged  {secs:>8,.3f} secs")
+		if exported != 1:
+			failures.append(f"export after changing one file read {exported} file(s), expected 1")
+
+	for f in failures:
+		print(f"FAILED: {f}")
+	return 1 if failures else 0
+
+def createAlbums(sourceRoot: pathlib.Path, targetRoot: pathlib.Path, albumCount: int, trackCount: int) -> list[tuple[pathlib.Path, pathlib.Path]]:
+	"""writes matching source/target album folders of tiny FLAC files; the target files start out with different tags"""
+	albums = []
+	for a in range(1, albumCount + 1):
+		sourceFolder = sourceRoot / f"Album {a:03}"
+		targetFolder = targetRoot / f"Album {a:03}"
+		sourceFolder.mkdir(parents=True)
+		targetFolder.mkdir(parents=True)
+		for t in range(1, trackCount + 1):
+			name = f"{t:02} Track {t}.flac"
+			writeFlac(sourceFolder / name, { "ALBUM": [f"Album {a}"], "ALBUMARTIST": ["Artist"], "ARTIST": ["Artist"], "TITLE": [f"Track {t}"],
+											"TRACKNUMBER": [str(t)], "DISCNUMBER": ["1"], "DATE": ["1999"], "ENCODER": ["junk"] })
+			writeFlac(targetFolder / name, { "TITLE": [f"old {t}"], "ENCODER": ["other junk"], "COMMENT": ["whatever"] })
+		albums.append((sourceFolder, targetFolder))
+	return albums
+
+def writeFlac(path: pathlib.Path, tags: dict[str, list[str]]) -> None:
+	writeEmptyFlac(path)
+	flac = mutagen.flac.FLAC(path)
+	for name, values in tags.items():
+		flac[name] = values
+	flac.save()
+
+def copyAllAlbums(albums: list[tuple[pathlib.Path, pathlib.Path]]) -> None:
+	for sourceFolder, targetFolder in albums:
+		MusicFolderHandler(targetFolderPath=targetFolder, sourceFolderPath=sourceFolder).CopyFolderProperties(noRenames=True)
+
+def refresh(dbPath: pathlib.Path, rootFolder: pathlib.Path, jobs: int) -> tuple[int, int, float]:
+	start = time.perf_counter()
+	with LibraryCatalog(dbPath) as catalog:
+		exported, unchanged, _, _ = catalog.refresh(rootFolder, jobs)
+	return exported, unchanged, time.perf_counter() - start
+
+def initArgParser() -> argparse.ArgumentParser:
+	parser = argparse.ArgumentParser(description="checks that re-copying tags to an already in-sync (synthetic) library doesn't make exportLibrary read the files again, and times the exports")
+	parser.add_argument("-a", "--albums", type=int, default=20, help="number of albums to create")
+	parser.add_argument("-t", "--tracks", type=int, default=10, help="number of tracks per album")
+	parser.add_argument("-J", "--jobs", type=int, default=1, help="number of files to read at a time (in separate processes) when exporting")
+	parser.add_argument("-v", "--verbose", action="store_true", help="enable verbose logging")
+	return parser
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,45 @@
+#!python3
+# -*- coding: utf-8 -*-
+
+import sys, os, argparse, timeit, contextlib, pathlib
+from ackPyHelpers import LogHelper
+
+def main() -> int:
+	args = initArgParser().parse_args()
+	count: int = args.count
+
+	value = pathlib.Path("/usr/share/icons/breeze/actions/22/document-open.svg")
+	# the output for the enabled cases goes to devnull, so we're measuring the logging overhead, not the terminal:
+	with open(os.devnull, "w", encoding="utf-8") as devnull:
+		results: list[tuple[str, str, float]] = []
+		for verbose in [False, True]:
+			LogHelper.Init(verbose)
+			logVerbose = LogHelper.GetVerboseWriter()
+			level = "verbose on" if verbose else "verbose off"
+			cases = {
+				"Verbose(f-string)": lambda: LogHelper.Verbose(f"processing file |{value.name}| in folder |{value.parent}|"),
+				"Verbose(format, args)": lambda: LogHelper.Verbose("processing file |{0}| in folder |{1}|", value.name, value.parent),
+				"Verbose(format, lambda)": lambda: LogHelper.Verbose("processing file |{0}| in folder |{1}|", lambda: value.name, lambda: value.parent),
+				"if IsVerbose(): Verbose(f-string)": lambda: LogHelper.Verbose(f"processing file |{value.name}| in folder |{value.parent}|") if LogHelper.IsVerbose() else None,
+				"GetVerboseWriter()(%-style, args)": lambda: logVerbose("processing file |%s| in folder |%s|", value.name, value.parent),
+				"GetVerboseWriter()(%-style, lambda)": lambda: logVerbose("processing file |%s| in folder |%s|", lambda: value.name, lambda: value.parent),
+				"Info(f-string)": lambda: LogHelper.Info(f"processing file |{value.name}| in folder |{value.parent}|"),
+			}
+			with contextlib.redirect_stdout(devnull):
+				for name, func in cases.items():
+					secs = min(timeit.repeat(func, number=count, repeat=args.repeat))
+					results.append((level, name, secs))
+
+	print(f"per-call overhead, best of {args.repeat} x {count:,} calls:")
+	for level, name, secs in results:
+		print(f"  {level:<12} {name:<38} {secs / count * 1e9:>10,.1f} ns")
+	return 0
+
+def initArgParser() -> argparse.ArgumentParser:
+	parser = argparse.ArgumentParser(description="micro-benchmark for the per-call overhead of the LogHelper methods, with verbose logging on and off")
+	parser.add_argument("-c", "--count", type=int, default=100_000, help="number of calls per measurement")
+	parser.add_argument("-r", "--repeat", type=int, default=5, help="number of measurements to take the best of")
+	return parser
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,83 @@
+#!python3
+# -*- coding: utf-8 -*-
+
+import sys, argparse, pathlib, random, struct, tempfile, time
+import mutagen.flac
+from musicFileProperties import MusicFileProperties, TagNames
+
+def main() -> int:
+	args = initArgParser().parse_args()
+
+	with tempfile.TemporaryDirectory(prefix="benchMusicTags") as tmp:
+		files = createSyntheticFiles(pathlib.Path(tmp), args.distinct, args.seed)
+		start = time.process_time()
+		# the files are shared round robin, so we get a big "library" without having to write it all out:
+		musicFiles = [MusicFileProperties(files[i % len(files)], metadataOnly=True) for i in range(args.files)]
+		loadSecs = time.process_time() - start
+
+	tagCount = sum(1 for _ in musicFiles[0].getNativeTagNames())
+	print(f"{args.files:,} files ({args.distinct} distinct synthetic FLAC tag sets, ~{tagCount} tags each); cpu time, best of {args.repeat}:")
+	print(f"  {'load (metadataOnly)':<24} {loadSecs:>8,.3f} secs  {loadSecs / args.files * 1e6:>8,.1f} us/file")
+	cases = {
+		"getTagValues()": lambda mf: list(mf.getTagValues()),
+		"a few properties": lambda mf: (mf.AlbumTitle, mf.TrackArtist, mf.TrackTitle, mf.TrackNumber, mf.Composer),
+	}
+	for name, func in cases.items():
+		secs = min(timeIt(func, musicFiles) for _ in range(args.repeat))
+		print(f"  {name:<24} {secs:>8,.3f} secs  {secs / args.files * 1e6:>8,.1f} us/file")
+	return 0
+
+def timeIt(func, musicFiles: list[MusicFileProperties]) -> float:
+	# cpu time, so it's not so much at the mercy of whatever else the machine is doing:
+	start = time.process_time()
+	for mf in musicFiles:
+		func(mf)
+	return time.process_time() - start
+
+def createSyntheticFiles(folder: pathlib.Path, count: int, seed: int) -> list[pathlib.Path]:
+	"""writes count tiny FLAC files (no audio, just the headers) with a random mix of tags"""
+	rng = random.Random(seed)
+	template = folder / "template.flac"
+	writeEmptyFlac(template)
+	mf = MusicFileProperties(template)
+	# the vorbis names for everything we know how to map, and whether the values get split (e.g. 'A; B'):
+	candidates = []
+	for tn in filter(lambda t: not t.startswith("_"), dir(TagNames)):
+		native = mf.mapToNativeTagName(tn)
+		if native and tn != TagNames.Cover:
+			candidates.append((native[0], tn, len(mf.getValidSplitCharsForTag(tn)) > 0))
+	mf = None
+
+	files = []
+	for i in range(count):
+		f = folder / f"{i:05}.flac"
+		f.write_bytes(template.read_bytes())
+		flac = mutagen.flac.FLAC(f)
+		for native, tn, splits in rng.sample(candidates, k=min(len(candidates), rng.randint(12, 30))):
+			if tn in (TagNames.TrackNumber, TagNames.TrackCount, TagNames.DiscNumber, TagNames.DiscCount, TagNames.YearReleased):
+				flac[native] = [str(rng.randint(1, 30))]
+			elif splits and rng.random() < 0.3:
+				flac[native] = [f"{tn} value {rng.randint(1, 999)}; other {tn} / third"]
+			else:
+				flac[native] = [f"{tn} value {rng.randint(1, 999)}"] * rng.choice([1, 1, 1, 2])
+		flac.save()
+		files.append(f)
+	return files
+
+def writeEmptyFlac(path: pathlib.Path) -> None:
+	# just a STREAMINFO block: 4096 sample blocks, 44.1kHz, stereo, 16 bit, 3 minutes
+	sampleRate, channels, bitsPerSample, totalSamples = 44100, 2, 16, 44100 * 180
+	streamInfo = struct.pack(">HH", 4096, 4096) + b"\0" * 6
+	streamInfo += ((sampleRate << 44) | ((channels - 1) << 41) | ((bitsPerSample - 1) << 36) | totalSamples).to_bytes(8, "big") + b"\0" * 16
+	path.write_bytes(b"fLaC" + bytes([0x80]) + len(streamInfo).to_bytes(3, "big") + streamInfo)
+
+def initArgParser() -> argparse.ArgumentParser:
+	parser = argparse.ArgumentParser(description="micro-benchmark for reading the tags from a big (synthetic) library of files with MusicFileProperties")
+	parser.add_argument("-n", "--files", type=int, default=10_000, help="number of files to read the tags for")
+	parser.add_argument("-d", "--distinct", type=int, default=200, help="number of different synthetic files to write (the files are shared round robin)")
+	parser.add_argument("-r", "--repeat", type=int, default=3, help="number of measurements to take the best of")
+	parser.add_argument("-s", "--seed", type=int, default=42, help="random seed for the synthetic tags")
+	return parser
+
+if __name__ == "__main__":
+	sys.exit(main())
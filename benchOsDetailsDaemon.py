@@ -0,0 +1,75 @@
+#!python3
+# -*- coding: utf-8 -*-
+
+import sys, argparse, pathlib, json, tempfile, threading, time
+from populateSystemData import OSDetails, OSDetailsDaemon
+
+def main() -> int:
+	args = initArgParser().parse_args()
+	if sys.platform == "win32":
+		print("the OSDetails daemon needs Unix sockets")
+		return 2
+
+	with tempfile.TemporaryDirectory(prefix="benchOsDetailsDaemon") as tmp:
+		socketPath = pathlib.Path(tmp) / "osDetails.sock"
+		if OSDetailsDaemon.Query(socketPath) is not None:
+			print("error: got an answer before the daemon was started")
+			return 1
+		server = threading.Thread(target=OSDetailsDaemon.Serve, args=(socketPath,), daemon=True)
+		server.start()
+		if not waitForDaemon(socketPath, 5.0):
+			print(f'error: daemon did not start listening on socket "{socketPath}"')
+			return 1
+
+		failures = []
+		# what the daemon answers should be exactly what we'd figure out ourselves:
+		expected = json.loads(json.dumps(OSDetails.GetDetails().toDict()))
+		values = OSDetailsDaemon.Query(socketPath)
+		if values != expected:
+			failures.append(f"'json' request returned {values}, expected {expected}")
+		for name in OSDetails.PropertyNames:
+			value = OSDetailsDaemon._request(name, socketPath, 0.5)
+			expectedValue = f"{expected[name] if expected.get(name) is not None else ''}\n"
+			if value != expectedValue:
+				failures.append(f"'{name}' request returned {value!r}, expected {expectedValue!r}")
+		value = OSDetailsDaemon._request("noSuchProperty", socketPath, 0.5)
+		if not value or not value.startswith("error:"):
+			failures.append(f"unknown request returned {value!r}, expected an error")
+
+		times = []
+		for _ in range(args.queries):
+			start = time.perf_counter()
+			OSDetailsDaemon.Query(socketPath)
+			times.append(time.perf_counter() - start)
+
+		if not OSDetailsDaemon.Stop(socketPath):
+			failures.append("'quit' request was not answered")
+		server.join(5.0)
+		if server.is_alive():
+			failures.append("daemon did not stop")
+		elif socketPath.exists():
+			failures.append("daemon did not remove its socket")
+		if OSDetailsDaemon.Query(socketPath) is not None:
+			failures.append("got an answer after the daemon was stopped")
+
+	times.sort()
+	print(f"{args.queries:,} 'json' round trips on a local socket: min {times[0] * 1e6:,.0f} us   median {times[len(times) // 2] * 1e6:,.0f} us   max {times[-1] * 1e6:,.0f} us")
+	for f in failures:
+		print(f"FAILED: {f}")
+	return 1 if failures else 0
+
+def waitForDaemon(socketPath: pathlib.Path, timeout: float) -> bool:
+	deadline = time.monotonic() + timeout
+	while time.monotonic() < deadline:
+		if socketPath.exists() and OSDetailsDaemon._ping(socketPath):
+			return True
+		time.sleep(0.01)
+	return False
+
+def initArgParser() -> argparse.ArgumentParser:
+	parser = argparse.ArgumentParser(description="checks the OSDetails daemon round trip on a local socket (start, query, compare, stop) and times the queries")
+	parser.add_argument("-n", "--queries", type=int, default=1000, help="number of timed queries")
+	return parser
+
+if __name__ == "__main__":
+	sys.exit(main())
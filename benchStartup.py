@@ -0,0 +1,82 @@
+#!python3
+# -*- coding: utf-8 -*-
+
+import sys, os, argparse, subprocess, time, statistics, pathlib
+
+PyScriptRoot = pathlib.Path(os.path.dirname(os.path.abspath(__file__)))
+
+def main() -> int:
+	args = initArgParser().parse_args()
+	scripts: list[str] = args.scripts if args.scripts else ["ackfetch.py", "showSomeProps.py"]
+
+	if os.environ.get("PYTHONDONTWRITEBYTECODE"):
+		print("warning: PYTHONDONTWRITEBYTECODE is set, so every run includes compiling the modules")
+	# baseline is just starting the interpreter, so we can see what the scripts themselves are adding:
+	commands: list[tuple[str, list[str]]] = [("(python -c pass)", [sys.executable, "-c", "pass"])]
+	for script in scripts:
+		scriptPath = pathlib.Path(script)
+		if not scriptPath.is_absolute():
+			scriptPath = PyScriptRoot / scriptPath
+		commands.append((scriptPath.name, [sys.executable, str(scriptPath)] + args.scriptArgs))
+
+	overBudget = []
+	print(f"wall time, {args.runs} runs each (after {args.warmup} warmup run(s)):")
+	for name, cmd in commands:
+		times = runTimed(cmd, args.runs, args.warmup)
+		median = statistics.median(times)
+		flag = ""
+		if args.budget and not name.startswith("(") and median > args.budget:
+			flag = f"  <== over budget of {args.budget:,.1f} ms"
+			overBudget.append(name)
+		print(f"  {name:<20} min {min(times):>8,.1f} ms   median {median:>8,.1f} ms   max {max(times):>8,.1f} ms{flag}")
+
+	if args.top > 0:
+		for name, cmd in commands[1:]:
+			print("")
+			print(f"slowest imports for {name} (-X importtime, cumulative):")
+			for cumulative, selfTime, module in getImportTimes(cmd)[:args.top]:
+				print(f"  {cumulative / 1000:>8,.1f} ms  (self {selfTime / 1000:>6,.1f} ms)  {module}")
+
+	if overBudget:
+		print("")
+		print(f"over budget: {', '.join(overBudget)}")
+		return 1
+	return 0
+
+def runTimed(cmd: list[str], runs: int, warmup: int) -> list[float]:
+	results = []
+	for i in range(warmup + runs):
+		start = time.perf_counter()
+		subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+		elapsed = (time.perf_counter() - start) * 1000
+		if i >= warmup:
+			results.append(elapsed)
+	return results
+
+def getImportTimes(cmd: list[str]) -> list[tuple[int, int, str]]:
+	"returns (cumulative usecs, self usecs, module name), slowest first"
+	proc = subprocess.run([cmd[0], "-X", "importtime"] + cmd[1:], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+	results = []
+	for line in proc.stderr.splitlines():
+		# lines look like 'import time:       475 |       6246 |     re'
+		if not line.startswith("import time:"):
+			continue
+		parts = line[len("import time:"):].split("|")
+		if len(parts) != 3 or not parts[0].strip().isdigit():
+			continue	# the header line
+		results.append((int(parts[1]), int(parts[0]), parts[2].rstrip()))
+	results.sort(key=lambda r: r[0], reverse=True)
+	return results
+
+def initArgParser() -> argparse.ArgumentParser:
+	parser = argparse.ArgumentParser(description="measures the startup time of the interactive scripts (ackfetch, showSomeProps, etc), optionally failing if they go over a time budget")
+	parser.add_argument("scripts", nargs="*", help="the scripts to run (relative to this folder); defaults to ackfetch.py and showSomeProps.py")
+	parser.add_argument("-n", "--runs", type=int, default=20, help="number of timed runs of each script")
+	parser.add_argument("-w", "--warmup", type=int, default=2, help="number of untimed runs first (to get the file cache, pycache, snapshots, etc warmed up)")
+	parser.add_argument("-b", "--budget", type=float, default=0, help="fail (exit code 1) if a script's median time is over this many milliseconds")
+	parser.add_argument("-t", "--top", type=int, default=10, help="show this many of the slowest imports for each script (0 to skip)")
+	parser.add_argument("-a", "--scriptArgs", nargs=argparse.REMAINDER, default=[], help="arguments to pass to each script (must be last)")
+	return parser
+
+if __name__ == "__main__":
+	sys.exit(main())
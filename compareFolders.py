@@ -1,7 +1,7 @@
 #!python3
 # -*- coding: utf-8 -*-
 
-import sys, os, pathlib, argparse, time, concurrent.futures
+import sys, os, pathlib, argparse, concurrent.futures
 from tracemalloc import start
 from ackPyHelpers import LogHelper, FileHelpers, DateTimeHelpers
 try:
@@ -17,7 +17,9 @@
 
 def main():
 	args = initArgParser().parse_args()
-	LogHelper.Init(verbose=(args.verbose if 'verbose' in args else False))
+	jsonLog = args.jsonLog if 'jsonLog' in args else None
+	LogHelper.Init(verbose=(args.verbose if 'verbose' in args else False),
+				sink=(LogHelper.ThreadedSink(LogHelper.FileSink(pathlib.Path(jsonLog))) if jsonLog else None), structured=bool(jsonLog))
 	args.func(args)	# will call the handler that was added
 
 def validateCommandHandler(args : argparse.Namespace):
@@ -30,9 +32,9 @@ def validateCommandHandler(args : argparse.Namespace):
 		for x in exclusions:
 			LogHelper.Verbose(x)
 
-	totalStartTs = time.perf_counter()
 	totalHashSecs = 0
-	with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+	# the timings get written (as TIMING messages) if verbose, or always to the --jsonLog:
+	with LogHelper.Timed("validate") as totalTimer, concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
 		for sourceFile in sourceBase.glob("**/*"):
 			if sourceFile.is_dir(): continue
 			if isExcluded(sourceFile, exclusions):
@@ -42,19 +44,18 @@ def validateCommandHandler(args : argparse.Namespace):
 			targetFile = targetBase / filebase
 			LogHelper.Verbose('checking source "{0}" to target "{1}"', sourceFile, targetFile)
 			if targetFile.is_file():
-				startTs = time.perf_counter()
-				if args.noParallel:
-					sourceHash = getHash(sourceFile)
-					targetHash = getHash(targetFile)
-				else:
-					sourceFuture = executor.submit(getHash, sourceFile)
-					targetFuture = executor.submit(getHash, targetFile)
-					concurrent.futures.wait([sourceFuture, targetFuture])	# do i need this? the result() calls will block anyway...
-					sourceHash = sourceFuture.result()
-					targetHash = targetFuture.result()
-				secsTaken = time.perf_counter() - startTs
-				totalHashSecs += secsTaken
-				LogHelper.Verbose('calculating hashes took {0} secs', secsTaken)
+				with LogHelper.Timed("hashFiles", file=filebase.as_posix()) as timer:
+					if args.noParallel:
+						sourceHash = getHash(sourceFile)
+						targetHash = getHash(targetFile)
+					else:
+						sourceFuture = executor.submit(getHash, sourceFile)
+						targetFuture = executor.submit(getHash, targetFile)
+						concurrent.futures.wait([sourceFuture, targetFuture])	# do i need this? the result() calls will block anyway...
+						sourceHash = sourceFuture.result()
+						targetHash = targetFuture.result()
+					timer.fields["bytes"] = sourceFile.stat().st_size
+				totalHashSecs += timer.elapsedMs / 1000
 				if sourceHash != targetHash:
 					LogHelper.Warning('hash mismatch for files{0}  source: [{3}] {1}{0}  target: [{4}] {2}',
 						os.linesep, sourceFile.as_posix(), targetFile.as_posix(),
@@ -67,7 +68,7 @@ def validateCommandHandler(args : argparse.Namespace):
 					LogHelper.Warning('target file "{0}" does not exist', targetFile)
 				else:
 					LogHelper.Verbose('target file "{0}" does not exist', targetFile)
-	LogHelper.Verbose('finished; total hash time taken = {0} secs, total overall time taken = {1} secs', totalHashSecs, (time.perf_counter() - totalStartTs))
+		totalTimer.fields["hash_ms"] = round(totalHashSecs * 1000, 3)
 
 def findDupesCommandHandler(args : argparse.Namespace):
 	sourceBase = checkBaseFolder(args.sourceFolder)
@@ -122,6 +123,7 @@ def initArgParser() -> argparse.ArgumentParser:
 	cmd1.add_argument("-x", "--exclude", action="append", help="there is a default list of file paterrns to exclude; use this to specify additional exclusions")
 	cmd1.add_argument("-t", "--warnNoTarget", action="store_true", help="warn if the target file does not exist; by default, these are just logged as verbose messages")
 	cmd1.add_argument("-p", "--noParallel", action="store_true", help="disable parallel hashing")
+	cmd1.add_argument("-j", "--jsonLog", help="write the log to this file as json lines (one object per message, with timing fields) instead of to the console")
 	cmd1.add_argument("-v", "--verbose", action="store_true", help="enable verbose logging")
 	cmd1.set_defaults(func=validateCommandHandler)
 
@@ -24,6 +24,7 @@ def main():
 	mainCmd.add_argument("-b", "--backup", action="store_true", help="back up existing PNGs and ICOs instead of overwriting them by appending the file's timestamp")
 	mainCmd.add_argument("-tmp", "--tempFolder", default=str(Constants.WorkingFolder), help="override temp folder location")
 	mainCmd.add_argument("-w", "--whatIf", action="store_true", help="enable test mode")
+	mainCmd.add_argument("-pr", "--profile", action="store_true", help="record how long the external tools take, and show a summary by tool at the end")
 	mainCmd.add_argument("-v", "--verbose", action="store_true", help="enable verbose logging")
 	mainCmd.set_defaults(func=processCreateIconsCommand)
 
@@ -53,7 +54,12 @@ def processCreateIconsCommand(args : argparse.Namespace):
 	Helpers.OptimizePngs = not args.noOptimize
 	tempPath = pathlib.Path(args.tempFolder)
 	iconsToCopy = IconsToCopy(Constants.IconsSourceBasePath, Constants.PngsOutputPath, Constants.IconsOutputPath, tempPath)
+	RunProcessHelper.enableProfiling(args.profile)
 	iconsToCopy.process(args.createIcosOnly, args.copyPngsOnly, args.theme, args.type, (args.name if args.name else []))
+	if args.profile:
+		LogHelper.MessageMagenta(Constants.MediumDivider)
+		LogHelper.MessageMagenta("external tools profile:")
+		LogHelper.MessageMagenta(RunProcessHelper.getProfileReport())
 
 def processRenameBackupsCommand(args : argparse.Namespace):
 	Helpers.LogVerbose('processing renameBackups command')
@@ -182,8 +188,8 @@ def __exit__(self, excep_type, excep_value, traceback):
 			return False	# propagate any exceptions
 
 	@staticmethod
-	def LogVerbose(msg : str):	# could get rid of this but there's a lot using it...
-		LogHelper.Verbose(msg)
+	def LogVerbose(msg : str, *posargs):	# could get rid of this but there's a lot using it...
+		LogHelper.GetVerboseWriter()(msg, *posargs)
 
 	@staticmethod
 	def VerifyFolderExists(folder : pathlib.Path):
@@ -791,18 +797,20 @@ def _findSourceFileInfo(self, searchLookupData : SourceFileSearchLookupData, inp
 		baseFilepath = (themeFolder / inputName)
 		sourceFilepath = self._findFile(baseFilepath, searchLookupData.isUpscale)
 		target = None
+		# this gets called a LOT, so use the lazy verbose writer (no-op if not verbose, and no formatting or relative paths built if so):
+		logVerbose = LogHelper.GetVerboseWriter()
 		if not sourceFilepath:
-			Helpers.LogVerbose(f"    targetSize {searchLookupData.targetName}: no supported files found for '{Helpers.GetRelativePath(baseFilepath)}'; skipping")
+			logVerbose("    targetSize %s: no supported files found for '%s'; skipping", searchLookupData.targetName, lambda: Helpers.GetRelativePath(baseFilepath))
 		elif sourceFilepath.is_symlink():
-			Helpers.LogVerbose(f"    targetSize {searchLookupData.targetName}: file '{Helpers.GetRelativePath(sourceFilepath)}' is a symlink")
+			logVerbose("    targetSize %s: file '%s' is a symlink", searchLookupData.targetName, lambda: Helpers.GetRelativePath(sourceFilepath))
 			# if this is a link to a link to a link to ..., the .resolve() will take care of all that:
 			target = sourceFilepath.resolve()
 		elif PseudoLinkHelper.IsPseudoLink(sourceFilepath):
-			Helpers.LogVerbose(f"    targetSize {searchLookupData.targetName}: file '{Helpers.GetRelativePath(sourceFilepath)}' looks like a pseudo-link file")
+			logVerbose("    targetSize %s: file '%s' looks like a pseudo-link file", searchLookupData.targetName, lambda: Helpers.GetRelativePath(sourceFilepath))
 			target = PseudoLinkHelper.ResolvePseudoLink(sourceFilepath)
 		else:
 			#Helpers.LogVerbose(f"    file '{sourceFilepath}' is not a link")
-			Helpers.LogVerbose(f"    targetSize {searchLookupData.targetName}: file '{Helpers.GetRelativePath(sourceFilepath)}' is a real file")
+			logVerbose("    targetSize %s: file '%s' is a real file", searchLookupData.targetName, lambda: Helpers.GetRelativePath(sourceFilepath))
 			target = sourceFilepath
 		return (sourceFilepath, target)
 
@@ -3,16 +3,15 @@
 import sys
 if sys.version_info < (3, 9):
 	sys.exit("python version 3.9 or higher if required")
-import os, re, pathlib, urllib.request, json, argparse, tarfile, zipfile
-from typing import Iterator#, Self#, List, Dict#, Any, Pattern, Tuple
-from io import BytesIO
+import os, re, pathlib, json, argparse, shutil, tarfile, zipfile, tempfile, hashlib, concurrent.futures
+from typing import Iterator, BinaryIO#, Self#, List, Dict#, Any, Pattern, Tuple
 if sys.platform == "win32":
 	import fontTools.ttLib
 	import ctypes
 	from ctypes import wintypes
 	import winreg
 
-from ackPyHelpers import LogHelper, GithubRelease, RunProcessHelper
+from ackPyHelpers import LogHelper, GithubRelease, RunProcessHelper, DownloadHelper, FileHelpers
 
 def main() -> int:
 	# https://www.nerdfonts.com/font-downloads
@@ -47,18 +46,28 @@ def main() -> int:
 	LogHelper.Message2(f"installing version {ghRelease.tag} of NerdFonts")
 	LogHelper.Message2("################################################")
 	fontsToInstall = initFontsToInstall(ghRelease)
-	removeOldFonts(osHelper)
-	for nfd in fontsToInstall.fonts:
-		installFont(nfd, osHelper)
-	# create version file:
+	removeOldDownloads(ghRelease.tag)
+	if args.clean:
+		removeOldFonts(osHelper)
+	manifest = FontsManifest(osHelper.fontsFldr)
+	installFonts(fontsToInstall.fonts, osHelper, args.jobs, manifest)
+	manifest.removeStaleFiles(osHelper)
+	manifest.save()
+	# replace version file:
+	cleanUpOldFile("@version_*", osHelper)
 	(osHelper.fontsFldr / currVerStr).touch()
-	rebuildFontCache(osHelper)
+	if manifest.changed:
+		rebuildFontCache(osHelper)
+	else:
+		LogHelper.Message("no font files changed, so not rebuilding font cache")
 
 def initArgParser() -> argparse.ArgumentParser:
 	parser = argparse.ArgumentParser()
 	parser.add_argument("-v", "--verbose", action="store_true", help="enable verbose logging")
 	parser.add_argument("-t", "--test", action="store_true", help="enable test mode (won't actually install fonts)")
 	parser.add_argument("-f", "--force", action="store_true", help="force download and install, even if we already have latest version")
+	parser.add_argument("-c", "--clean", action="store_true", help="remove all currently installed NerdFonts first, rather than only replacing the files that changed")
+	parser.add_argument("-j", "--jobs", type=int, default=4, help="number of font archives to download at the same time (default 4; 1 = download each one right before installing it)")
 	return parser
 
 class OSHelper:
@@ -189,6 +198,8 @@ def __init__(self, assetName : str, patternsToExtract : list[str]):
 			self._patterns.append(re.compile(p))
 		self._downloadUrl : str = ""
 		self._downloadType : str = ""
+		self._downloadSize : int|None = None
+		self._releaseTag : str = ""
 
 	@property
 	def assetName(self) -> str:
@@ -202,14 +213,30 @@ def downloadUrl(self) -> str:
 	def downloadType(self) -> str:
 		return self._downloadType
 
-	def updateDownloadUrl(self, url : str, type : str) -> None:
+	@property
+	def downloadSize(self) -> int|None:
+		return self._downloadSize
+
+	@property
+	def releaseTag(self) -> str:
+		return self._releaseTag
+
+	@property
+	def downloadFilename(self) -> str:
+		return f"{self._assetName}.tar.xz" if self._downloadType == NerdFontDefn.DownloadTypeTarXz else f"{self._assetName}.zip"
+
+	def updateDownloadUrl(self, url : str, type : str, size : int|None = None, releaseTag : str = "") -> None:
 		# prefer .tar.xz:
 		if type == NerdFontDefn.DownloadTypeTarXz:
 			self._downloadUrl = url
 			self._downloadType = type
+			self._downloadSize = size
+			self._releaseTag = releaseTag
 		elif type == NerdFontDefn.DownloadTypeZip and not self._downloadUrl:
 			self._downloadUrl = url
 			self._downloadType = type
+			self._downloadSize = size
+			self._releaseTag = releaseTag
 
 	def shouldExtract(self, filename : str) -> bool:
 		for r in self._patterns:
@@ -232,7 +259,7 @@ def addFontDefn(self, fontName : str, fontFilenameBases : list[str]):
 				patternsToExtract.append(f"{f}-.+\\.(?:t|o)tf")
 			self._fonts[fontName] = NerdFontDefn(fontName, patternsToExtract)
 
-	def processAsset(self, asset : GithubRelease.GithubReleaseAsset):
+	def processAsset(self, asset : GithubRelease.GithubReleaseAsset, releaseTag : str):
 		# currently, at least, none of the font names have dots, so split at first dot into font name and extension
 		dotPos = asset.name.find(".")
 		if (dotPos >= 0):
@@ -240,9 +267,9 @@ def processAsset(self, asset : GithubRelease.GithubReleaseAsset):
 			if fontname in self._fonts:
 				extension = asset.name[dotPos:].lower()
 				if extension == ".tar.xz":
-					self._fonts[fontname].updateDownloadUrl(asset.downloadUrl, NerdFontDefn.DownloadTypeTarXz)
+					self._fonts[fontname].updateDownloadUrl(asset.downloadUrl, NerdFontDefn.DownloadTypeTarXz, asset.size, releaseTag)
 				elif extension == ".zip":
-					self._fonts[fontname].updateDownloadUrl(asset.downloadUrl, NerdFontDefn.DownloadTypeZip)
+					self._fonts[fontname].updateDownloadUrl(asset.downloadUrl, NerdFontDefn.DownloadTypeZip, asset.size, releaseTag)
 
 def checkPrereqs(osHelper : OSHelper) -> bool:
 	#if not shutil.which("wget"):
@@ -283,7 +310,7 @@ def initFontsToInstall(ghRelease : GithubRelease) -> NerdFontCollection:
 		#fontsToInstall.addFontDefn("ShareTechMono", ["ShureTechMonoNerdFont"])
 		#fontsToInstall.addFontDefn("XXXXXXXX", ["XXXXXXXX"])
 	for a in ghRelease.assets:
-		fontsToInstall.processAsset(a)
+		fontsToInstall.processAsset(a, ghRelease.tag)
 	return fontsToInstall
 
 def removeOldFonts(osHelper : OSHelper) -> None:
@@ -299,47 +326,185 @@ def cleanUpOldFile(fontNameGlob : str, osHelper : OSHelper) -> None:
 			osHelper.uninstallFont(f)
 		f.unlink()
 
-def installFont(fontDfn : NerdFontDefn, osHelper : OSHelper) -> None:
+def installFonts(fonts : list[NerdFontDefn], osHelper : OSHelper, jobs : int, manifest : "FontsManifest") -> None:
+	toInstall = []
+	for nfd in fonts:
+		if checkFontDefn(nfd):
+			toInstall.append(nfd)
+		else:
+			manifest.keepMatching(nfd)	# don't want to remove what's already there because of a problem with the release
+	if jobs <= 1:
+		for nfd in toInstall:
+			installFont(nfd, downloadFont(nfd), osHelper, manifest)
+		return
+	# start all the downloads, and install each font, in order, as soon as its download is done, while the rest keep downloading:
+	executor = concurrent.futures.ThreadPoolExecutor(max_workers=jobs)
+	try:
+		downloads = [executor.submit(downloadFont, nfd) for nfd in toInstall]
+		for nfd, download in zip(toInstall, downloads):
+			installFont(nfd, download.result(), osHelper, manifest)
+	finally:
+		executor.shutdown(wait=True, cancel_futures=True)
+
+def checkFontDefn(fontDfn : NerdFontDefn) -> bool:
 	if not fontDfn.downloadUrl or not fontDfn.downloadType:
 		LogHelper.Warning(f"font \"{fontDfn.assetName}\" is missing either url and/or type: url = |{fontDfn.downloadUrl}|, type = |{fontDfn.downloadType}|")
-		return
+		return False
+	if fontDfn.downloadType not in [NerdFontDefn.DownloadTypeTarXz, NerdFontDefn.DownloadTypeZip]:
+		LogHelper.Warning(f"font \"{fontDfn.assetName}\" has unrecognized type: |{fontDfn.downloadType}|")
+		return False
+	return True
+
+def installFont(fontDfn : NerdFontDefn, archivePath : pathlib.Path, osHelper : OSHelper, manifest : "FontsManifest") -> None:
 	print("")
 	LogHelper.Message("------------------------------------------------")
 	LogHelper.Message(f"installing font \"{fontDfn.assetName}\"")
 	LogHelper.Message("------------------------------------------------")
 	if fontDfn.downloadType == NerdFontDefn.DownloadTypeTarXz:
-		installFontFromTarXz(fontDfn, osHelper)
-	elif fontDfn.downloadType == NerdFontDefn.DownloadTypeZip:
-		installFontFromZip(fontDfn, osHelper)
+		installFontFromTarXz(fontDfn, archivePath, osHelper, manifest)
 	else:
-		LogHelper.Warning(f"font \"{fontDfn.assetName}\" has unrecognized type: |{fontDfn.downloadType}|")
-
-def installFontFromTarXz(fontDfn : NerdFontDefn, osHelper : OSHelper) -> None:
-	LogHelper.Verbose(f"installing .tar.xz: url = |{fontDfn.downloadUrl}|")
-	with urllib.request.urlopen(fontDfn.downloadUrl) as resp:
-		tf = tarfile.open(fileobj=BytesIO(resp.read()), mode='r:xz')
-	for f in tf.getnames():
-		if fontDfn.shouldExtract(f):
-			LogHelper.Message(f"installing font |{f}|")
-			if sys.version_info >= (3, 12):
-				tf.extract(f, path=osHelper.fontsFldr, filter='data')
+		installFontFromZip(fontDfn, archivePath, osHelper, manifest)
+	manifest.addExtractedFont(fontDfn)
+	archivePath.unlink()
+
+def getDownloadsFldr() -> pathlib.Path:
+	# not a TemporaryDirectory: want an interrupted download to still be there to resume next time
+	return pathlib.Path(tempfile.gettempdir()) / "nerdFontsDownloads"
+
+def removeOldDownloads(releaseTag : str) -> None:
+	# the downloads for each release go in their own folder, so a part file from an older release never gets resumed with
+	# a newer one; anything left over from other releases is no use any more:
+	downloadsFldr = getDownloadsFldr()
+	if not downloadsFldr.is_dir(): return
+	for p in downloadsFldr.iterdir():
+		if p.name != releaseTag:
+			LogHelper.Verbose(f"removing old download |{p}|")
+			if p.is_dir():
+				shutil.rmtree(p, ignore_errors=True)
 			else:
-				tf.extract(f, path=osHelper.fontsFldr)
-			osHelper.installFont(osHelper.fontsFldr / f)
-		else:
-			LogHelper.Verbose(f"skipping font file |{f}|")
-
-def installFontFromZip(fontDfn : NerdFontDefn, osHelper : OSHelper) -> None:
-	LogHelper.Verbose(f"installing .zip: url = |{fontDfn.downloadUrl}|")
-	with urllib.request.urlopen(fontDfn.downloadUrl) as resp:
-		zf = zipfile.ZipFile(BytesIO(resp.read()))
-	for f in zf.namelist():
-		if fontDfn.shouldExtract(f):
-			LogHelper.Message(f"installing font |{f}|")
-			zf.extract(f, path=osHelper.fontsFldr)
-			osHelper.installFont(osHelper.fontsFldr / f)
-		else:
-			LogHelper.Verbose(f"skipping font file |{f}|")
+				p.unlink(missing_ok=True)
+
+def downloadFont(fontDfn : NerdFontDefn) -> pathlib.Path:
+	LogHelper.Verbose(f"downloading {fontDfn.downloadType}: url = |{fontDfn.downloadUrl}|, size = {fontDfn.downloadSize}")
+	# DownloadFile checks the size (the asset's, or else what the server says) before it renames the download into place,
+	# so a bad download never gets extracted:
+	return DownloadHelper.DownloadFile(fontDfn.downloadUrl, getDownloadsFldr() / fontDfn.releaseTag / fontDfn.downloadFilename, fontDfn.downloadSize)
+
+def installFontFromTarXz(fontDfn : NerdFontDefn, archivePath : pathlib.Path, osHelper : OSHelper, manifest : "FontsManifest") -> None:
+	LogHelper.Verbose(f"installing .tar.xz: file = |{archivePath}|")
+	# open it as a stream ('r|xz', not 'r:xz'), so it's decompressed once, front to back, and extract the members we
+	# want as we come to them; looking members up by name (getnames(), extract(name)) can make xz start over from the top:
+	with tarfile.open(archivePath, mode='r|xz') as tf:
+		for member in tf:
+			if member.isfile() and fontDfn.shouldExtract(member.name):
+				installFontFile(tf.extractfile(member), member.name, osHelper, manifest)
+			else:
+				LogHelper.Verbose(f"skipping font file |{member.name}|")
+
+def installFontFromZip(fontDfn : NerdFontDefn, archivePath : pathlib.Path, osHelper : OSHelper, manifest : "FontsManifest") -> None:
+	LogHelper.Verbose(f"installing .zip: file = |{archivePath}|")
+	# one pass through the entries, in the order they are in the file, and each one we want gets streamed out to disk:
+	with zipfile.ZipFile(archivePath) as zf:
+		for info in zf.infolist():
+			if not info.is_dir() and fontDfn.shouldExtract(info.filename):
+				with zf.open(info) as src:
+					installFontFile(src, info.filename, osHelper, manifest)
+			else:
+				LogHelper.Verbose(f"skipping font file |{info.filename}|")
+
+def installFontFile(src : BinaryIO, archiveName : str, osHelper : OSHelper, manifest : "FontsManifest") -> None:
+	name = pathlib.PurePosixPath(os.path.normpath(archiveName).replace(os.sep, "/")).as_posix()
+	if name.startswith("../") or name.startswith("/"):
+		LogHelper.Warning(f"skipping font file with unsafe path |{archiveName}|")
+		return
+	target = osHelper.fontsFldr / name
+	target.parent.mkdir(parents=True, exist_ok=True)
+	# stream it to a temp file, hashing as we go, and only replace the installed file if it's actually different:
+	tmpTarget = target.with_name(target.name + ".tmp")
+	hasher = hashlib.sha256()
+	with open(tmpTarget, "wb") as f:
+		for chunk in iter(lambda: src.read(256*1024), b''):
+			hasher.update(chunk)
+			f.write(chunk)
+	newHash = hasher.hexdigest()
+	if target.exists() and manifest.getInstalledHash(name) == newHash:
+		LogHelper.Verbose(f"font |{name}| is unchanged")
+		tmpTarget.unlink()
+		manifest.setFile(name, newHash, changed=False)
+		return
+	LogHelper.Message(f"installing font |{name}|")
+	if target.exists():
+		osHelper.uninstallFont(target)
+	os.replace(tmpTarget, target)
+	osHelper.installFont(target)
+	manifest.setFile(name, newHash, changed=True)
+
+class FontsManifest:
+	"""
+	keeps track of the font files we've installed and their hashes (in a file in the fonts folder), so an
+	upgrade only has to touch the files that actually changed, and can remove the ones that went away
+	"""
+	_manifestName = "@manifest.json"
+
+	def __init__(self, fontsFldr : pathlib.Path):
+		self._fontsFldr = fontsFldr
+		self._installed : dict[str, str] = {}
+		self._current : dict[str, str] = {}
+		self._extractedFonts : list[NerdFontDefn] = []
+		self._changed = False
+		manifestPath = fontsFldr / FontsManifest._manifestName
+		if manifestPath.is_file():
+			try:
+				self._installed = json.loads(manifestPath.read_text(encoding="utf-8"))
+			except ValueError:
+				LogHelper.Warning(f'could not read manifest file "{manifestPath}"; will check all of the font files')
+
+	@property
+	def changed(self) -> bool:
+		"""whether any font files have been installed, replaced or removed"""
+		return self._changed
+
+	def getInstalledHash(self, name : str) -> str:
+		if name in self._installed:
+			return self._installed[name]
+		# no manifest yet (or not in it), so have to look at the file itself:
+		target = self._fontsFldr / name
+		return FileHelpers.GetSha256(target).hex() if target.is_file() else ""
+
+	def setFile(self, name : str, hash : str, changed : bool) -> None:
+		self._current[name] = hash
+		if changed:
+			self._changed = True
+
+	def addExtractedFont(self, fontDfn : NerdFontDefn) -> None:
+		"""records that the font's files were (re)extracted this time, so untracked files that belong to it can be cleaned up"""
+		self._extractedFonts.append(fontDfn)
+
+	def keepMatching(self, fontDfn : NerdFontDefn) -> None:
+		for name, hash in self._installed.items():
+			if fontDfn.shouldExtract(name):
+				self._current[name] = hash
+
+	def removeStaleFiles(self, osHelper : OSHelper) -> None:
+		"""uninstalls and deletes any installed font files that aren't in the new release"""
+		stale = set(n for n in self._installed if n not in self._current)
+		# and anything installed before there was a manifest, but only for the fonts we just extracted (files for fonts
+		# that were skipped this time, or that aren't ours at all, aren't in _current, but they're not stale):
+		if self._extractedFonts:
+			for f in [*self._fontsFldr.rglob("*.ttf"), *self._fontsFldr.rglob("*.otf")]:
+				name = f.relative_to(self._fontsFldr).as_posix()
+				if name not in self._current and any(fd.shouldExtract(name) for fd in self._extractedFonts):
+					stale.add(name)
+		for name in sorted(stale):
+			f = self._fontsFldr / name
+			if f.exists():
+				LogHelper.Message3(f'removing old file "{f}"')
+				osHelper.uninstallFont(f)
+				f.unlink()
+			self._changed = True
+
+	def save(self) -> None:
+		(self._fontsFldr / FontsManifest._manifestName).write_text(json.dumps(self._current, indent=1, sort_keys=True), encoding="utf-8")
 
 def runApp(appAndArgs : list[str]) -> int:
 	results = RunProcessHelper.runProcess(appAndArgs)
@@ -355,7 +520,8 @@ def rebuildFontCache(osHelper : OSHelper) -> None:
 	LogHelper.Message3("rebuilding font cache")
 	LogHelper.Message3("------------------------------------------------")
 	if sys.platform == "linux":
-		runApp(["fc-cache", "--force", "--verbose"])
+		# no --force: fc-cache checks the folder timestamps itself, and only the folders we changed need rescanning
+		runApp(["fc-cache", "--verbose"])
 	elif sys.platform == "darwin":
 		# ???
 		retCode = runApp(["atsutil", "databases", "-removeUser"])
@@ -1,9 +1,9 @@
 #!python3
 # -*- coding: utf-8 -*-
 
-import sys, os, pathlib, platform, stat, argparse, shutil, urllib.request
+import sys, os, pathlib, platform, stat, argparse, shutil
 from collections import namedtuple
-from ackPyHelpers import LogHelper, GithubRelease, Version, RunProcessHelper
+from ackPyHelpers import LogHelper, GithubRelease, Version, RunProcessHelper, DownloadHelper
 
 PyScript = os.path.abspath(__file__)
 PyScriptRoot = os.path.dirname(os.path.abspath(__file__))
@@ -29,40 +29,42 @@ def main():
 	downloadOmp(ompInfo, testMode)
 	disableUpdateCheck(ompInfo, testMode)
 
-OmpInfo = namedtuple("OmpInfo", ["ompBinPath", "isUpToDate", "installedVersion", "latestVersion", "downloadUrl"])
+OmpInfo = namedtuple("OmpInfo", ["ompBinPath", "isUpToDate", "installedVersion", "latestVersion", "downloadUrl", "downloadSize"])
 def initOmpInfo(osPlatform: str, osArch: str, forceInstall: bool, whatIf: bool) -> OmpInfo:
 	ompFilename = f"posh-{osPlatform}-{osArch}"
 	downloadUrl = f"https://github.com/JanDeDobbeleer/oh-my-posh/releases/latest/download/{ompFilename}"
-	ompInfo = OmpInfo(getBinPath(osPlatform, whatIf), False, getCurrentOhMyPoshVer(), Version.zeroVersion(), downloadUrl)
+	ompInfo = OmpInfo(getBinPath(osPlatform, whatIf), False, getCurrentOhMyPoshVer(), Version.zeroVersion(), downloadUrl, None)
 	LogHelper.Verbose(f"current installed version: |{ompInfo.installedVersion}|")
-	if not ompInfo.installedVersion.isZeroVersion:
-		if not forceInstall:
-			gh = GithubRelease.GetLatestRelease("JanDeDobbeleer", "oh-my-posh")
-			LogHelper.Verbose(f"latest release info: tag = |{gh.tag}|, published at |{gh.published}|")
-			ompInfo = ompInfo._replace(latestVersion=Version.parseVersionString(cleanUpVersion(gh.tag)))
-			if ompInfo.latestVersion > ompInfo.installedVersion:
-				LogHelper.Message(f"installing newer version of OhMyPosh: v{ompInfo.latestVersion} (current version = v{ompInfo.installedVersion})")
-				for a in gh.assets:	# see if we can save them a redirect
-					if a.name == ompFilename:
-						ompInfo = ompInfo._replace(downloadUrl=a.downloadUrl)
-						break
-			else:
-				LogHelper.Message(f"currently installed OhMyPosh is already the latest version: v{ompInfo.installedVersion}")
-				ompInfo = ompInfo._replace(isUpToDate=True)
-		else:
-			LogHelper.Message(f"force mode enabled, ignoring checks and installing latest OhMyPosh (current version = v{ompInfo.installedVersion})")
+	gh = GithubRelease.GetLatestRelease("JanDeDobbeleer", "oh-my-posh")
+	LogHelper.Verbose(f"latest release info: tag = |{gh.tag}|, published at |{gh.published}|")
+	ompInfo = ompInfo._replace(latestVersion=Version.parseVersionString(cleanUpVersion(gh.tag)))
+	# use the release's own asset url (not the .../latest/download/... one), so we know how big it's supposed to be, and a
+	# download interrupted before a newer release came out doesn't get resumed with the newer one (saves a redirect, too):
+	for a in gh.assets:
+		if a.name == ompFilename:
+			ompInfo = ompInfo._replace(downloadUrl=a.downloadUrl, downloadSize=a.size)
+			break
 	else:
+		LogHelper.Warning(f'latest release {gh.tag} has no asset named "{ompFilename}"; trying the "latest" download url')
+	if ompInfo.installedVersion.isZeroVersion:
 		LogHelper.Message("no current Oh-My-Posh found, installing latest version")
+	elif forceInstall:
+		LogHelper.Message(f"force mode enabled, ignoring checks and installing latest OhMyPosh (current version = v{ompInfo.installedVersion})")
+	elif ompInfo.latestVersion > ompInfo.installedVersion:
+		LogHelper.Message(f"installing newer version of OhMyPosh: v{ompInfo.latestVersion} (current version = v{ompInfo.installedVersion})")
+	else:
+		LogHelper.Message(f"currently installed OhMyPosh is already the latest version: v{ompInfo.installedVersion}")
+		ompInfo = ompInfo._replace(isUpToDate=True)
 	return ompInfo
 
 def downloadOmp(ompInfo: OmpInfo, whatIf: bool) -> None:
 	LogHelper.Verbose(f"writing file |{ompInfo.ompBinPath}| from url |{ompInfo.downloadUrl}|")
-	with urllib.request.urlopen(ompInfo.downloadUrl) as resp:
-		if not whatIf:
-			with open(ompInfo.ompBinPath, "wb") as f:
-				f.write(resp.read())
-		else:
-			LogHelper.WhatIf(f"writing download to file |{ompInfo.ompBinPath}|")
+	if not whatIf:
+		# streams to a temp file next to the binary, then renames it into place, so a running oh-my-posh isn't clobbered;
+		# that only happens if it's the right size (the asset's size, or else what the server says), so a bad download never gets installed:
+		DownloadHelper.DownloadFile(ompInfo.downloadUrl, ompInfo.ompBinPath, ompInfo.downloadSize)
+	else:
+		LogHelper.WhatIf(f"writing download to file |{ompInfo.ompBinPath}|")
 	# set execute permission:
 	if not whatIf:
 		os.chmod(ompInfo.ompBinPath, stat.S_IRUSR | stat.S_IWUSR | stat.S_IXUSR | stat.S_IRGRP | stat.S_IROTH)
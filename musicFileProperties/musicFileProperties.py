@@ -1,10 +1,11 @@
 #!python3
 # -*- coding: utf-8 -*-
 
-import pathlib, re
+import pathlib, re, struct, hashlib
 from sqlite3 import NotSupportedError
 from typing import Any, Iterable, Iterator
 import mutagen					# https://mutagen.readthedocs.io/en/latest/api/mp4.html
+import mutagen.flac
 from ackPyHelpers import LogHelper
 from .tagNames import TagNames
 from .tagTypes import TagType
@@ -12,8 +13,30 @@
 
 class MusicFileProperties:
 	_noPaddingArgOnSave: set[str] = { "APEv2", }
-
-	def __init__(self, musicFilePath):
+	# native tags that hold the pictures, by tag type (uppercased); prefixes, because ID3 and APE tack the description/type on to the name:
+	_pictureTagPrefixes: dict[TagType, tuple[str, ...]] = {
+		TagType.MP4: ("COVR",),
+		TagType.FLACVorbis: ("METADATA_BLOCK_PICTURE",),
+		TagType.OggVorbis: ("METADATA_BLOCK_PICTURE",),
+		TagType.ASF: ("WM/PICTURE",),
+		TagType.APEv2: ("COVER ART",),
+		TagType.ID3v24: ("APIC",),
+		TagType.ID3v23: ("APIC",),
+		TagType.ID3v22: ("APIC",),
+	}
+
+	# tag types where the native tag names aren't case sensitive:
+	_caseInsensitiveTagTypes: set[TagType] = { TagType.FLACVorbis, TagType.OggVorbis, TagType.APEv2, }
+	# all the public TagNames (what getTagValues() can return):
+	_allTagNames: frozenset[str] = frozenset(t for t in dir(TagNames) if not t.startswith("_"))
+
+	def __init__(self, musicFilePath, metadataOnly: bool = False):
+		"""
+		if metadataOnly is True, the file is opened read-only and the pictures are left out: for FLAC files, the picture
+		blocks are skipped over without reading them; for everything else, the picture tags are dropped as soon as the file
+		is loaded, so we're not hanging on to megabytes of cover art just to show some tags or make a playlist.
+		the names of the dropped tags are in SkippedPictureTags, and save() is not allowed.
+		"""
 		if isinstance(musicFilePath, str):
 			musicFilePath = pathlib.Path(musicFilePath)
 		if not musicFilePath.is_file():
@@ -22,23 +45,113 @@ def __init__(self, musicFilePath):
 			musicFilePath = musicFilePath.absolute()
 		self._musicFilePath = musicFilePath
 		self._dirty = False
-		self._mutagen: mutagen.FileType = mutagen.File(self._musicFilePath)
+		self._metadataOnly = metadataOnly
+		self._skippedPictureTags: list[str] = []
+		self._mutagen: mutagen.FileType = MusicFileProperties._loadMutagenFile(self._musicFilePath, metadataOnly)
 		self._mapper = _tagMapper.getTagMapper(self._mutagen)
 		self._tagtype = _tagMapper.getTagType(self._mutagen.tags)
+		if metadataOnly:
+			self._dropPictureTags()
+
+	@staticmethod
+	def _loadMutagenFile(musicFilePath: pathlib.Path, metadataOnly: bool) -> mutagen.FileType:
+		# picking by the suffix, so we're not having mutagen open and score the file twice for everything that isn't FLAC:
+		if metadataOnly and musicFilePath.suffix.lower() == ".flac":
+			try:
+				return _metadataOnlyFLAC(musicFilePath)
+			except mutagen.flac.FLACNoHeaderError:
+				pass	# not really a FLAC file (e.g. Ogg FLAC), so let mutagen figure out what it is
+		return mutagen.File(musicFilePath)
+
+	def _dropPictureTags(self) -> None:
+		prefixes = MusicFileProperties._pictureTagPrefixes.get(self._tagtype)
+		if not prefixes:
+			return
+		for t in self.getNativeTagNames():
+			if t.upper().startswith(prefixes) and t not in self._skippedPictureTags:
+				self._skippedPictureTags.append(t)
+		for t in self._skippedPictureTags:
+			del self._mutagen.tags[t]
 
-	def save(self, removePadding = False) -> bool:
+	def save(self, removePadding = False, inPlace = False) -> bool:
+		"""
+		saves any changes; how the padding (the empty space after the tags) is handled decides whether the whole file gets rewritten:
+		removePadding: no padding, which means rewriting the whole file every time (unless the tags are exactly the same size)
+		inPlace: if the tags still fit in the existing padding, they're just written over it, and the rest of the file isn't
+			touched; only if they don't fit is the file rewritten (with a little padding, so next time they probably fit).
+			use compact() when done editing to get rid of the padding
+		neither: mutagen's default, which is like inPlace, except it also rewrites the file to shrink the padding if it's 'too big'
+		"""
+		self._checkWritable()
 		if not self._dirty:
 			return False
-		if removePadding and self._tagtype not in MusicFileProperties._noPaddingArgOnSave:
+		if self._tagtype in MusicFileProperties._noPaddingArgOnSave:
+			self._mutagen.save()
+		elif removePadding:
 			self._mutagen.save(padding = lambda x: 0)
+		elif inPlace:
+			self._mutagen.save(padding = MusicFileProperties._reusePadding)
 		else:
 			self._mutagen.save()
 		self._dirty = False
 		return True
 
+	def compact(self) -> bool:
+		"""
+		rewrites the file without any padding (saving any changes at the same time); returns False if there was no padding
+		to get rid of, or we can't tell how much there is (see PaddingBytes), and there are no changes, so the file was left alone
+		"""
+		self._checkWritable()
+		if self._tagtype in MusicFileProperties._noPaddingArgOnSave:
+			return self.save()
+		if not self._dirty and not self.PaddingBytes:
+			return False
+		self._mutagen.save(padding = lambda x: 0)
+		self._dirty = False
+		return True
+
+	def _checkWritable(self) -> None:
+		if self._metadataOnly:
+			raise NotSupportedError(f'file "{self._musicFilePath.name}" was opened metadataOnly; can\'t save it (it would lose the pictures)')
+
+	@staticmethod
+	def _reusePadding(info: mutagen.PaddingInfo) -> int:
+		# info.padding is how much would be left over with the new tags; if it's negative, they don't fit, so the file has to grow anyway:
+		return info.padding if info.padding >= 0 else info.get_default_padding()
+
 	def getTagValues(self) -> Iterator[tuple[str, list[str|int|bytes|list[str]]]]:
-		for tn in filter(lambda t: not t.startswith("_"), dir(TagNames)):
-			val = self.getTagValue(tn)
+		"""
+		returns (tag name, values) for all the TagNames that have values in the file, sorted by tag name; same as calling
+		getTagValue() for every one of the TagNames, but this goes thru the native tags that are actually in the file once
+		and only looks up the tag names for those, rather than probing the file for every tag name we know about
+		"""
+		tags = self._mutagen.tags
+		caseInsensitive = self._tagtype in MusicFileProperties._caseInsensitiveTagTypes
+		# native name => value, same as tags[name] would give us:
+		present: dict[str, Any] = {}
+		for tag in tags:
+			if isinstance(tag, tuple):
+				# vorbis and ASF give us (name, value), once for each value, and tags[name] is the list of them:
+				name = tag[0].upper() if caseInsensitive else tag[0]
+				if name in present:
+					present[name].append(tag[1])
+				else:
+					present[name] = [tag[1]]
+			else:
+				present[tag.upper() if caseInsensitive else tag] = tags[tag]
+
+		tagNames = set(self._mapper.getSpecialHandlingTagNames())
+		for name in present:
+			tagNames.update(self._mapper.mapFromNativeNameToAll(name))
+		for tn in sorted(tagNames & MusicFileProperties._allTagNames):
+			if self._mapper.isSpecialHandlingTag(tn):
+				val = self._mapper.getSpecialHandlingTagValues(tn, tags)
+			else:
+				tagValues = []
+				for n in self._mapper.mapToNativeName(tn):
+					v = present.get(n.upper() if caseInsensitive else n)
+					if v is not None: tagValues.append((v, n))
+				val = self._getMappedValues(tn, tagValues)
 			if not MusicFileProperties._isEmptyValue(val):
 				yield (tn, val)
 
@@ -58,6 +171,35 @@ def getNativeTagNames(self) -> Iterator[str]:
 			else:
 				yield tag
 
+	def getNativeTagsSnapshot(self) -> dict[str, tuple[Any, str]]:
+		"""
+		returns the native tags as they are right now, in a form that can be compared with a later snapshot to see if
+		anything really changed (see diffNativeTagsSnapshots()): native tag name => (comparable value, printable value).
+		binary values (cover art, etc) are just hashed, so the snapshot doesn't hang on to them.
+		"""
+		caseInsensitive = self._tagtype in MusicFileProperties._caseInsensitiveTagTypes
+		snapshot = {}
+		for t in self.getNativeTagNames():
+			key = t.upper() if caseInsensitive else t
+			if key in snapshot: continue		# vorbis returns the name once for each value
+			val = self._mutagen.tags[t]
+			snapshot[key] = (MusicFileProperties._getComparableValue(val), MusicFileProperties._getPrintableValue(val))
+		return snapshot
+
+	@staticmethod
+	def diffNativeTagsSnapshots(before: dict[str, tuple[Any, str]], after: dict[str, tuple[Any, str]]) -> list[tuple[str, str|None, str|None]]:
+		"""
+		returns (native tag name, old value, new value) for each tag that's different between the snapshots, sorted by name;
+		old value is None if the tag was added, new value is None if it was removed
+		"""
+		results = []
+		for name in sorted(before.keys() | after.keys()):
+			old = before.get(name)
+			new = after.get(name)
+			if old is None or new is None or old[0] != new[0]:
+				results.append((name, old[1] if old else None, new[1] if new else None))
+		return results
+
 	def hasTag(self, tagName: str) -> bool:
 		"""
 		for the given tagName, returns True or False for whether or not any of the mapped tag names for
@@ -100,7 +242,7 @@ def getTagValueFromNativeName(self, nativeTagName: str) -> list[str|int|bytes|li
 		if val is None: return []
 		return list(self._mapMutagenProperty(val, self._mapper.mapFromNativeName(nativeTagName), nativeTagName))
 
-	def mapToNativeTagName(self, tagName: str) -> list[str]:
+	def mapToNativeTagName(self, tagName: str) -> tuple[str, ...]:
 		return self._mapper.mapToNativeName(tagName)
 
 	def setNativeTagValue(self, nativeTagName : str, value : Any) -> None:
@@ -121,7 +263,7 @@ def deleteNativeTagValue(self, nativeTagName : str) -> None:
 	def removeAllTags(self) -> None:
 		self._mutagen.tags.clear()
 
-	def getValidSplitCharsForTag(self, tagName: str) -> list[str]:
+	def getValidSplitCharsForTag(self, tagName: str) -> tuple[str, ...]:
 		"""
 		for cases where we joined a tag's multiple values into a single value, this are the possible know values to use to split it back apart
 
@@ -143,31 +285,53 @@ def _getMutagenTag(self, tagName : str) -> list[str|int|bytes]:
 			return self._mapper.getSpecialHandlingTagValues(tagName, self._mutagen.tags)
 
 		nativeTagNames = self._mapper.mapToNativeName(tagName)
+		tags = self._mutagen.tags
 		tagValues: list[tuple[Any, str]] = []
 		for n in nativeTagNames:
-			v = self._mutagen.tags[n] if n in self._mutagen.tags else None
+			v = tags[n] if n in tags else None
 			if v is not None: tagValues.append((v, n))
+		return self._getMappedValues(tagName, tagValues)
+
+	def _getMappedValues(self, tagName: str, tagValues: list[tuple[Any, str]]) -> list[str|int|bytes]:
+		"""maps the (native value, native name)s for tagName to our values, splitting them up if tagName has split chars"""
 		if len(tagValues) == 0: return []
 		# apparently mutagen gives us the same objects and lists of objects that it's caching underneath,
 		# and if we modify those lists (like turning a complex type into a simple type), it's modifying
 		# those cached values, which seems like a bad thing; also the list we return may get modified by caller;
 		# so we always create a new list:
 		results = []
-		splitOn = self._mapper._getSplitCharsRe(tagName)
+		splitRe = self._mapper._getSplitRe(tagName)
 		for nativeTagValue,nativeTagName in tagValues:
-			for v in self._mapMutagenProperty(nativeTagValue, tagName, nativeTagName):
-				if splitOn and isinstance(v, str) and len(v) > 0:
-					for v2 in re.split(splitOn, v):
-						v2 = v2.strip()
-						if len(v2) > 0:
-							results.append(v2)
-				else:
-					results.append(v)
+			# same as going through _mapMutagenProperty(), but most values are simple values or lists of them (vorbis is
+			# always a list of strings), so those get added right here, and only the others go thru the mapper:
+			if MusicFileProperties._isSimpleType(nativeTagValue):
+				MusicFileProperties._addValue(results, nativeTagValue, splitRe)
+			elif isinstance(nativeTagValue, list):
+				for v in nativeTagValue:
+					t = type(v)
+					if t is str or t is int or t is bytes:
+						MusicFileProperties._addValue(results, v, splitRe)
+					elif v is not None:
+						for v2 in self._mapper.mapFromNativeValue(v, tagName, nativeTagName):
+							MusicFileProperties._addValue(results, v2, splitRe)
+			else:
+				for v2 in self._mapper.mapFromNativeValue(nativeTagValue, tagName, nativeTagName):
+					MusicFileProperties._addValue(results, v2, splitRe)
 		return results
 
+	@staticmethod
+	def _addValue(results: list, value: Any, splitRe: re.Pattern|None) -> None:
+		if splitRe is not None and isinstance(value, str) and len(value) > 0:
+			for v in splitRe.split(value):
+				v = v.strip()
+				if len(v) > 0:
+					results.append(v)
+		else:
+			results.append(value)
+
 	def _setMutagenTag(self, tagName : str, value : Any) -> None:
 		nativeTagNames = self._mapper.mapToNativeName(tagName)
-		if MusicFileProperties._isEmptyValue(nativeTagNames):
+		if not nativeTagNames:
 			if not MusicFileProperties._isEmptyValue(value):
 				raise KeyError(f'tag name "{0}" is not mapped: do not know how to set it', tagName)
 			LogHelper.Verbose('no mapping native tag name(s) found for tagName = "{0}"', tagName)
@@ -229,6 +393,37 @@ def _mapMutagenProperty(self, nativeTagValue: Any, tagName: str, nativeTagName:
 			for v2 in self._mapper.mapFromNativeValue(nativeTagValue, tagName, nativeTagName):
 				yield v2
 
+	@staticmethod
+	def _getComparableValue(value: Any) -> Any:
+		if isinstance(value, (bytes, bytearray)):
+			# hash it; plus things like MP4Cover and MP4FreeForm are bytes with a format hanging off of them:
+			extras = MusicFileProperties._getComparableFields(value) if hasattr(value, "__dict__") else ()
+			return (type(value).__name__, len(value), hashlib.sha1(value).hexdigest(), extras)
+		if isinstance(value, (list, tuple)):
+			return tuple(MusicFileProperties._getComparableValue(v) for v in value)
+		if value is None or isinstance(value, (str, int, float)):
+			return value
+		if hasattr(value, "__dict__"):
+			# mutagen's ID3 frames, ASF attributes, APE values, etc: compare all their fields (whatever order they got set in)
+			return (type(value).__name__, MusicFileProperties._getComparableFields(value))
+		return (type(value).__name__, repr(value))
+
+	@staticmethod
+	def _getComparableFields(value: Any) -> tuple:
+		return tuple(sorted((k, MusicFileProperties._getComparableValue(v)) for k,v in vars(value).items()))
+
+	@staticmethod
+	def _getPrintableValue(value: Any) -> str:
+		if isinstance(value, list) and len(value) == 1:
+			value = value[0]
+		if isinstance(value, (bytes, bytearray)):
+			strV = f"<binary, {len(value):,} bytes>"
+		else:
+			strV = str(value)
+		if len(strV) > 120:
+			strV = strV[:117] + "..."
+		return strV
+
 	@staticmethod
 	def _isSimpleType(value: Any) -> bool:
 		t = type(value)
@@ -250,6 +445,33 @@ def HasChanges(self) -> pathlib.Path:
 	def FilePath(self) -> pathlib.Path:
 		return self._musicFilePath
 
+	@property
+	def PaddingBytes(self) -> int|None:
+		"""how much padding is after the tags (as of when the file was loaded), or None if we can't tell for this type of file"""
+		if isinstance(self._mutagen, mutagen.flac.FLAC):
+			return sum(b.length for b in self._mutagen.metadata_blocks if isinstance(b, mutagen.flac.Padding))
+		# mutagen doesn't have a public way to get it for the others, but it keeps track of it for most of them (on different
+		# objects, e.g. MP4's is on the file, ID3's is on the tags); if it's not there (or not an int), we just say we don't know:
+		for o in (self._mutagen, self._mutagen.tags):
+			padding = getattr(o, "_padding", None)
+			if isinstance(padding, int):
+				return padding
+		return None
+
+	@property
+	def IsMetadataOnly(self) -> bool:
+		return self._metadataOnly
+
+	@property
+	def SkippedPictureTags(self) -> list[str]:
+		"""for metadataOnly, the native names of the picture tags that were in the file but were not kept"""
+		return list(self._skippedPictureTags)
+
+	@property
+	def HasCover(self) -> bool:
+		"""whether the file has any cover art: picture tags, FLAC picture blocks, or (for metadataOnly) the pictures that were left out"""
+		return len(self._skippedPictureTags) > 0 or len(getattr(self._mutagen, "pictures", None) or []) > 0 or self.hasTag(TagNames.Cover)
+
 	@property
 	def DurationSeconds(self) -> float:
 		return self._mutagen.info.length
@@ -520,3 +742,23 @@ def Lyricist(self, value : str) -> None:
 	def Lyricist(self) -> None:
 		self._deleteMutagenTag(TagNames.Lyricist)
 	# endregion
+
+class _skippedPicture(mutagen.flac.Picture):
+	"""a FLAC picture block that reads the picture's info, but seeks over the picture data instead of reading it"""
+	def load(self, data):
+		# same as mutagen.flac.Picture.load(), except for the last bit:
+		self.type, length = struct.unpack('>2I', data.read(8))
+		self.mime = data.read(length).decode('UTF-8', 'replace')
+		length, = struct.unpack('>I', data.read(4))
+		self.desc = data.read(length).decode('UTF-8', 'replace')
+		(self.width, self.height, self.depth, self.colors, length) = struct.unpack('>5I', data.read(20))
+		self.data = b""
+		self.dataLength = length
+		data.seek(length, 1)
+
+class _metadataOnlyFLAC(mutagen.flac.FLAC):
+	"""FLAC that doesn't read the picture blocks' data; only for reading (saving it would write out empty pictures)"""
+	METADATA_BLOCKS = [_skippedPicture if b is mutagen.flac.Picture else b for b in mutagen.flac.FLAC.METADATA_BLOCKS]
+
+	def save(self, *args, **kwargs):
+		raise NotSupportedError("metadata only FLAC can't be saved")
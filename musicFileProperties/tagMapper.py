@@ -1,9 +1,11 @@
 #!python3
 # -*- coding: utf-8 -*-
 
-import pathlib, csv
-from typing import NamedTuple, Any
+import sys, os, io, re, pathlib, csv, hashlib, marshal
+from types import MappingProxyType
+from typing import NamedTuple, Any, Iterable, Mapping
 import mutagen, mutagen.mp4, mutagen.asf, mutagen.apev2, mutagen.id3			# https://mutagen.readthedocs.io/en/latest/api/mp4.html
+from ackPyHelpers import LogHelper, FileHelpers
 from .tagNames import TagNames
 from .tagTypes import TagType
 
@@ -20,19 +22,26 @@ class _constants:
 
 class _tagMap:
 	class _mappedTags(NamedTuple):
-		mp4: list[str]
-		vorbis: list[str]
-		asf: list[str]
-		id3v24: list[str]
-		id3v23: list[str]
-		apev2: list[str]
-		splitChars: list[str]|None
+		mp4: tuple[str, ...]
+		vorbis: tuple[str, ...]
+		asf: tuple[str, ...]
+		id3v24: tuple[str, ...]
+		id3v23: tuple[str, ...]
+		apev2: tuple[str, ...]
+		splitChars: tuple[str, ...]|None
 		joinChars: str|None
 		splitCharsRe: str|None
 
 	_csvFilepath = pathlib.Path(__file__).absolute().parent / "musicTagsMap.csv"
-	_tagNamesToNativeNamesMap: dict[str, "_tagMap._mappedTags"] = None
-	_nativeNamesToTagNamesMap: dict[str, dict[str, str]] = None
+	_cacheVersion = 1		# bump this if the tables change shape, so old cached ones get rebuilt
+	# these are read-only once they're loaded (MappingProxyType):
+	_tagNamesToNativeNamesMap: Mapping[str, "_tagMap._mappedTags"] = None
+	# tag type => native name => tag name; the native names are in there uppercased, and also as spelled in the csv:
+	_nativeNamesToTagNamesMap: Mapping[str, Mapping[str, str]] = None
+	# tag type => tag name => native names, so the mappers don't have to pick them out of the _mappedTags every time:
+	_tagNamesToNativeNamesByType: Mapping[str, Mapping[str, tuple[str, ...]]] = None
+	# tag name => compiled splitCharsRe, for the tags that have one (compiled when the tables are loaded, since marshal can't save them):
+	_splitRes: Mapping[str, re.Pattern] = None
 
 	def __new__(cls):
 		raise NotImplementedError("static class; use _tagMapper.getTagMapper() factory method to get the mapper you're probably looking for")
@@ -40,14 +49,58 @@ def __new__(cls):
 	_isInited = False;
 	@staticmethod
 	def _init():
+		"""
+		the csv is only parsed when it's changed: the tables built from it are cached (marshalled, which loads a lot
+		quicker than parsing the csv, or even just importing pickle) along with a hash of the csv, and the cached tables
+		get used as long as the hash still matches
+		"""
 		if _tagMap._isInited: return
-		_tagMap._loadTagNames()
+		with open(_tagMap._csvFilepath, "rb") as f:
+			raw = f.read()
+		sourceHash = hashlib.sha256(raw).hexdigest()
+		cachePath = FileHelpers.GetUserCacheFolder("musicFileProperties") / "musicTagsMap.marshal"
+		tables = _tagMap._loadCache(cachePath, sourceHash)
+		if tables is None:
+			tables = _tagMap._parseTagNames(raw.decode("utf_8_sig"))
+			_tagMap._saveCache(cachePath, sourceHash, tables)
+		_tagMap._setTables(*tables)
 		_tagMap._isInited = True
 
 	@staticmethod
-	def _loadTagNames() -> None:
-		_tagMap._tagNamesToNativeNamesMap = dict()
-		_tagMap._nativeNamesToTagNamesMap = {
+	def _loadCache(cachePath: pathlib.Path, sourceHash: str) -> tuple[dict, dict, dict]|None:
+		try:
+			with open(cachePath, "rb") as file:
+				cached = marshal.loads(file.read())		# (marshal.load(file) reads it a few bytes at a time, which is way slower)
+			if cached["version"] == _tagMap._cacheVersion and cached["sourceHash"] == sourceHash:
+				tagNamesToNativeNames, nativeNamesToTagNames, tagNamesToNativeNamesByType = cached["tables"]
+				# marshal doesn't do NamedTuples, so they're saved as plain tuples:
+				return { k: _tagMap._mappedTags(*v) for k,v in tagNamesToNativeNames.items() }, nativeNamesToTagNames, tagNamesToNativeNamesByType
+			LogHelper.Verbose(f'cached tag mappings in file "{cachePath}" are out of date')
+		except FileNotFoundError:
+			pass
+		except Exception as ex:		# e.g. written by a different python version; just rebuild it
+			LogHelper.Verbose(f'could not read cached tag mappings from file "{cachePath}": {ex}')
+		return None
+
+	@staticmethod
+	def _saveCache(cachePath: pathlib.Path, sourceHash: str, tables: tuple[dict, dict, dict]) -> None:
+		tagNamesToNativeNames, nativeNamesToTagNames, tagNamesToNativeNamesByType = tables
+		try:
+			cachePath.parent.mkdir(parents=True, exist_ok=True)
+			tmpPath = cachePath.with_name(f"{cachePath.name}.{os.getpid()}.tmp")
+			with open(tmpPath, "wb") as file:
+				file.write(marshal.dumps({ "version": _tagMap._cacheVersion, "sourceHash": sourceHash,
+								"tables": ({ k: tuple(v) for k,v in tagNamesToNativeNames.items() }, nativeNamesToTagNames, tagNamesToNativeNamesByType) }))
+			os.replace(tmpPath, cachePath)
+		except (OSError, ValueError) as ex:
+			LogHelper.Verbose(f'could not write cached tag mappings to file "{cachePath}": {ex}')
+
+	@staticmethod
+	def _parseTagNames(csvText: str) -> tuple[dict[str, "_tagMap._mappedTags"], dict[str, dict[str, str]], dict[str, dict[str, tuple[str, ...]]]]:
+		# all the names get interned, and marshal keeps them that way when it loads them back in:
+		intern = sys.intern
+		tagNamesToNativeNames: dict[str, _tagMap._mappedTags] = dict()
+		nativeNamesToTagNames: dict[str, dict[str, str]] = {
 			_constants.MP4TagType: dict(),
 			_constants.VorbisTagType: dict(),
 			_constants.AsfTagType: dict(),
@@ -55,42 +108,61 @@ def _loadTagNames() -> None:
 			_constants.Id3v23TagType: dict(),
 			_constants.ApeV2TagType: dict(),
 		}
-		with open(_tagMap._csvFilepath, mode="r", encoding="utf_8_sig", newline='') as f:
-			for row in csv.DictReader(f, dialect=csv.excel):
-				tagName: str = row["MusicTagName"].strip() if row["MusicTagName"] else ""
-				if not tagName or tagName.startswith("#"): continue
-				mp4: list[str] = [x.replace("*:", _constants.Mp4CustomPropertyPrefix) for x in _tagMap._splitTagName(row["MP4"])]
-				vorbis: list[str] = _tagMap._splitTagName(row["Vorbis"])
-				asf: list[str] = _tagMap._splitTagName(row["WMA"])
-				id3v24: list[str] = _tagMap._splitTagName(row["ID3v24"])
-				id3v23: list[str] = _tagMap._splitTagName(row["ID3v23"])
-				ape: list[str] = _tagMap._splitTagName(row["APEv2"])
-				splits: list[str] = row["SplitChars"].split() if row["SplitChars"] else None
-				joins: list[str] = row["JoinChars"] if row["JoinChars"] else None
-				splitCharsRe: str = '|'.join([f"\\{x}" for x in splits]) if splits else None
-
-				_tagMap._tagNamesToNativeNamesMap[tagName] = _tagMap._mappedTags(mp4=mp4, vorbis=vorbis, asf=asf,
-																	 	id3v24=id3v24, id3v23=id3v23, apev2=ape,
-																		splitChars=splits, joinChars=joins, splitCharsRe=splitCharsRe)
-
-				_tagMap._addNativeNamesToTagNameDict(tagName, mp4, _constants.MP4TagType)
-				_tagMap._addNativeNamesToTagNameDict(tagName, vorbis, _constants.VorbisTagType)
-				_tagMap._addNativeNamesToTagNameDict(tagName, asf, _constants.AsfTagType)
-				_tagMap._addNativeNamesToTagNameDict(tagName, id3v24, _constants.Id3v24TagType)
-				_tagMap._addNativeNamesToTagNameDict(tagName, id3v23, _constants.Id3v23TagType)
-				_tagMap._addNativeNamesToTagNameDict(tagName, ape, _constants.ApeV2TagType)
+		for row in csv.DictReader(io.StringIO(csvText, newline=''), dialect=csv.excel):
+			tagName: str = row["MusicTagName"].strip() if row["MusicTagName"] else ""
+			if not tagName or tagName.startswith("#"): continue
+			tagName = intern(tagName)
+			mp4 = tuple(intern(x.replace("*:", _constants.Mp4CustomPropertyPrefix)) for x in _tagMap._splitTagName(row["MP4"]))
+			vorbis = _tagMap._splitTagName(row["Vorbis"])
+			asf = _tagMap._splitTagName(row["WMA"])
+			id3v24 = _tagMap._splitTagName(row["ID3v24"])
+			id3v23 = _tagMap._splitTagName(row["ID3v23"])
+			ape = _tagMap._splitTagName(row["APEv2"])
+			splits: tuple[str, ...] = tuple(row["SplitChars"].split()) if row["SplitChars"] else None
+			joins: str = row["JoinChars"] if row["JoinChars"] else None
+			splitCharsRe: str = '|'.join([f"\\{x}" for x in splits]) if splits else None
+
+			tagNamesToNativeNames[tagName] = _tagMap._mappedTags(mp4=mp4, vorbis=vorbis, asf=asf,
+																	id3v24=id3v24, id3v23=id3v23, apev2=ape,
+																	splitChars=splits, joinChars=joins, splitCharsRe=splitCharsRe)
+
+			_tagMap._addNativeNamesToTagNameDict(nativeNamesToTagNames[_constants.MP4TagType], tagName, mp4)
+			_tagMap._addNativeNamesToTagNameDict(nativeNamesToTagNames[_constants.VorbisTagType], tagName, vorbis)
+			_tagMap._addNativeNamesToTagNameDict(nativeNamesToTagNames[_constants.AsfTagType], tagName, asf)
+			_tagMap._addNativeNamesToTagNameDict(nativeNamesToTagNames[_constants.Id3v24TagType], tagName, id3v24)
+			_tagMap._addNativeNamesToTagNameDict(nativeNamesToTagNames[_constants.Id3v23TagType], tagName, id3v23)
+			_tagMap._addNativeNamesToTagNameDict(nativeNamesToTagNames[_constants.ApeV2TagType], tagName, ape)
+
+		# the _mappedTags field names are the same as the tag type names:
+		tagNamesToNativeNamesByType: dict[str, dict[str, tuple[str, ...]]] = dict()
+		for tagType, d in nativeNamesToTagNames.items():
+			tagNamesToNativeNamesByType[tagType] = { tagName: getattr(mapped, tagType) for tagName, mapped in tagNamesToNativeNames.items() }
+			# and add the names as spelled in the csv, so lookups with those (which is most of them) don't have to uppercase it first:
+			for mapped in tagNamesToNativeNames.values():
+				for t in getattr(mapped, tagType):
+					if t and t not in d:
+						d[t] = d[t.upper()]
+		return tagNamesToNativeNames, nativeNamesToTagNames, tagNamesToNativeNamesByType
 
 	@staticmethod
-	def _splitTagName(tag: str) -> list[str]:
+	def _setTables(tagNamesToNativeNames: dict[str, "_tagMap._mappedTags"], nativeNamesToTagNames: dict[str, dict[str, str]],
+					tagNamesToNativeNamesByType: dict[str, dict[str, tuple[str, ...]]]) -> None:
+		_tagMap._tagNamesToNativeNamesMap = MappingProxyType(tagNamesToNativeNames)
+		_tagMap._nativeNamesToTagNamesMap = MappingProxyType({ k: MappingProxyType(d) for k,d in nativeNamesToTagNames.items() })
+		_tagMap._tagNamesToNativeNamesByType = MappingProxyType({ k: MappingProxyType(d) for k,d in tagNamesToNativeNamesByType.items() })
+		_tagMap._splitRes = MappingProxyType({ k: re.compile(v.splitCharsRe) for k,v in tagNamesToNativeNames.items() if v.splitCharsRe })
+
+	@staticmethod
+	def _splitTagName(tag: str) -> tuple[str, ...]:
 		tag = tag.partition("#")[0].strip()
-		return [x.strip() for x in tag.split("|")] if tag else []
+		return tuple(sys.intern(x.strip()) for x in tag.split("|")) if tag else ()
 
 	@staticmethod
-	def _addNativeNamesToTagNameDict(tagName: str, nativeNames: list[str], tagType: str) -> list[str]:
+	def _addNativeNamesToTagNameDict(d: dict[str, str], tagName: str, nativeNames: tuple[str, ...]) -> None:
 		for t in nativeNames:
-			t = t.upper() if t else ""
-			if t and t not in _tagMap._nativeNamesToTagNamesMap[tagType]:
-				_tagMap._nativeNamesToTagNamesMap[tagType][t] = tagName
+			t = sys.intern(t.upper()) if t else ""
+			if t and t not in d:
+				d[t] = tagName
 
 #region typed mapper classes
 # these are sorta Singleton classes: can "new" up new ones, but they all return the same instance
@@ -102,8 +174,25 @@ def __new__(cls):
 			raise NotImplementedError("abstract class; use _tagMapper.getTagMapper")
 		return super().__new__(cls)
 
+	_fromNativeNames: Mapping[str, str] = None
+	_toNativeNames: Mapping[str, tuple[str, ...]] = None
+	# uppercased native name => all the tag names that map it (a few native names are mapped by more than one tag name,
+	# e.g. MP4's 'trkn' is TrackNumber and TrackCount, but _fromNativeNames only has the first one):
+	_fromNativeNamesAll: Mapping[str, tuple[str, ...]] = None
+
 	def __init__(self):
-		_tagMap._init()
+		# (the subclasses are singletons, but this still gets called every time one is "new"ed up)
+		if self._fromNativeNames is None:
+			_tagMap._init()
+			self._fromNativeNames = _tagMap._nativeNamesToTagNamesMap[self._getTagType()]
+			self._toNativeNames = _tagMap._tagNamesToNativeNamesByType[self._getTagType()]
+			fromAll: dict[str, tuple[str, ...]] = dict()
+			for tagName, nativeNames in self._toNativeNames.items():
+				for t in nativeNames:
+					t = t.upper()
+					if tagName not in fromAll.get(t, ()):
+						fromAll[t] = fromAll.get(t, ()) + (tagName,)
+			self._fromNativeNamesAll = MappingProxyType(fromAll)
 
 	@staticmethod
 	def getTagType(mgTags: mutagen.Tags) -> TagType:
@@ -151,16 +240,20 @@ def getTagMapper(mgFile: mutagen.FileType) -> "_tagMapper":
 			raise TypeError(f'unrecognized mutagen tag type: "{mgFile.tags.__class__.__module__}.{mgFile.tags.__class__.__name__}"') #LookupError #NameError #TypeError
 
 	def mapFromNativeName(self, nativeTagName: str) -> str:
-		d = _tagMap._nativeNamesToTagNamesMap[self._getTagType()]
-		u = nativeTagName.upper()
-		if u in d:
-			return d[u]
-		return ""
+		tagName = self._fromNativeNames.get(nativeTagName)
+		if tagName is None:
+			tagName = self._fromNativeNames.get(nativeTagName.upper(), "")
+		return tagName
+
+	def mapFromNativeNameToAll(self, nativeTagName: str) -> tuple[str, ...]:
+		"""like mapFromNativeName(), but returns all the tag names that the native name is mapped for (or empty if none)"""
+		return self._fromNativeNamesAll.get(nativeTagName.upper(), ())
+
+	def mapToNativeName(self, tagName: str) -> tuple[str, ...]:
+		return self._toNativeNames.get(tagName, ())
 
-	def mapToNativeName(self, tagName: str) -> list[str]:
-		mapped = _tagMap._tagNamesToNativeNamesMap[tagName] if tagName in _tagMap._tagNamesToNativeNamesMap else None
-		if mapped is None: return []
-		return self._getMappedTagProp(mapped)
+	def getSpecialHandlingTagNames(self) -> Iterable[str]:
+		return ()
 
 	def isSpecialHandlingTag(self, tagName: str) -> bool:
 		return False
@@ -168,16 +261,15 @@ def isSpecialHandlingTag(self, tagName: str) -> bool:
 	def getSpecialHandlingTagValues(self, tagName: str, mgTags: mutagen.Tags) -> list[str|int|bytes|list[str,str]]:
 		return []
 
-	def getSplitChars(self, tagName: str) -> list[str]:
-		mapped = _tagMap._tagNamesToNativeNamesMap[tagName] if tagName in _tagMap._tagNamesToNativeNamesMap else None
-		return mapped.splitChars if mapped is not None and mapped.splitChars is not None else []
+	def getSplitChars(self, tagName: str) -> tuple[str, ...]:
+		mapped = _tagMap._tagNamesToNativeNamesMap.get(tagName)
+		return mapped.splitChars if mapped is not None and mapped.splitChars is not None else ()
 
-	def _getSplitCharsRe(self, tagName: str) -> str|None:
-		mapped = _tagMap._tagNamesToNativeNamesMap[tagName] if tagName in _tagMap._tagNamesToNativeNamesMap else None
-		return mapped.splitCharsRe if mapped is not None else None
+	def _getSplitRe(self, tagName: str) -> re.Pattern|None:
+		return _tagMap._splitRes.get(tagName)
 
 	def getJoinChars(self, tagName: str) -> str:
-		mapped = _tagMap._tagNamesToNativeNamesMap[tagName] if tagName in _tagMap._tagNamesToNativeNamesMap else None
+		mapped = _tagMap._tagNamesToNativeNamesMap.get(tagName)
 		return mapped.joinChars if mapped is not None and mapped.joinChars is not None else ""
 
 	#region "abstract" methods
@@ -197,9 +289,6 @@ def prepareValueForSet(self, nativeValue: Any, tagName: str, nativeTagName: str,
 	def _getTagType(self) -> str:
 		raise NotImplementedError()
 
-	def _getMappedTagProp(self, mappedTag: "_tagMap._mappedTags") -> list[str]:
-		raise NotImplementedError()
-
 	def _mapNativeValue(self, nativeValue: Any, tagName: str, nativeTagName: str) -> list[str|int|bytes]:
 		# we'll have already checked for lists, so incoming should just be a single value,
 		# but some types (APE) store multi values in same tag object, so could be multiple outgoing
@@ -263,6 +352,9 @@ def mapFromNativeValue(self, val: Any, tagName: str, nativeTagName: str) -> list
 			val = bytes(val)
 		return [val]
 
+	def getSpecialHandlingTagNames(self) -> Iterable[str]:
+		return _mp4Mapper._specialTags
+
 	def isSpecialHandlingTag(self, tagName: str) -> bool:
 		return tagName in _mp4Mapper._specialTags
 
@@ -327,9 +419,6 @@ def prepareValueForSet(self, nativeValue: Any, tagName: str, nativeTagName: str,
 	def _getTagType(self) -> str:
 		return _constants.MP4TagType
 
-	def _getMappedTagProp(self, mappedTag: "_tagMap._mappedTags") -> list[str]:
-		return mappedTag.mp4
-
 	def _mapRequiredTagName(self, tagName: str) -> str:
 		n = self.mapToNativeName(tagName)
 		if n is None or len(n) == 0:
@@ -362,8 +451,8 @@ def __init__(self):
 	def _getTagType(self) -> str:
 		return _constants.VorbisTagType
 
-	def _getMappedTagProp(self, mappedTag: "_tagMap._mappedTags") -> list[str]:
-		return mappedTag.vorbis
+	def getSpecialHandlingTagNames(self) -> Iterable[str]:
+		return _vorbisMapper._specialTags
 
 	def isSpecialHandlingTag(self, tagName: str) -> bool:
 		return tagName in _vorbisMapper._specialTags
@@ -413,6 +502,9 @@ def mapFromNativeValue(self, val: Any, tagName: str, nativeTagName: str) -> list
 			val = val.value
 		return [val]
 
+	def getSpecialHandlingTagNames(self) -> Iterable[str]:
+		return _asfMapper._specialTags
+
 	def isSpecialHandlingTag(self, tagName: str) -> bool:
 		return tagName in _asfMapper._specialTags
 
@@ -445,9 +537,6 @@ def prepareValueForSet(self, nativeValue: Any, tagName: str, nativeTagName: str,
 	def _getTagType(self) -> str:
 		return _constants.AsfTagType
 
-	def _getMappedTagProp(self, mappedTag: "_tagMap._mappedTags") -> list[str]:
-		return mappedTag.asf
-
 #
 # https://mutagen.readthedocs.io/en/latest/user/apev2.html
 #
@@ -478,6 +567,9 @@ def mapFromNativeValue(self, val: Any, tagName: str, nativeTagName: str) -> list
 			result.append(val.value)
 		return result
 
+	def getSpecialHandlingTagNames(self) -> Iterable[str]:
+		return _apeV2Mapper._specialTags
+
 	def isSpecialHandlingTag(self, tagName: str) -> bool:
 		return tagName in _apeV2Mapper._specialTags
 
@@ -516,9 +608,6 @@ def prepareValueForSet(self, nativeValue: Any, tagName: str, nativeTagName: str,
 	def _getTagType(self) -> str:
 		return _constants.ApeV2TagType
 
-	def _getMappedTagProp(self, mappedTag: "_tagMap._mappedTags") -> list[str]:
-		return mappedTag.apev2
-
 #
 # https://mutagen.readthedocs.io/en/latest/user/id3.html
 #
@@ -569,6 +658,9 @@ def mapFromNativeValue(self, val: Any, tagName: str, nativeTagName: str) -> list
 			result.append(val.data.decode("ascii"))
 		return result
 
+	def getSpecialHandlingTagNames(self) -> Iterable[str]:
+		return _id3Mapper._specialTags
+
 	def isSpecialHandlingTag(self, tagName: str) -> bool:
 		return tagName in _id3Mapper._specialTags
 
@@ -686,9 +778,6 @@ def __init__(self):
 	def _getTagType(self) -> str:
 		return _constants.Id3v24TagType
 
-	def _getMappedTagProp(self, mappedTag: "_tagMap._mappedTags") -> list[str]:
-		return mappedTag.id3v24
-
 class _id3v23Mapper(_id3Mapper):
 	_instance = None
 	def __new__(cls):
@@ -701,7 +790,4 @@ def __init__(self):
 
 	def _getTagType(self) -> str:
 		return _constants.Id3v23TagType
-
-	def _getMappedTagProp(self, mappedTag: "_tagMap._mappedTags") -> list[str]:
-		return mappedTag.id3v23
 #endregion
@@ -5,7 +5,7 @@
 __author__ = "AckWare"
 __version__ = "1.0.0"
 
-__all__ = ['OSDetails']
+__all__ = ['OSDetails', 'OSDetailsDaemon']
 
 import sys
 
@@ -15,3 +15,11 @@
 	raise ImportError('This module only supports v3.7 and up of python.')
 
 from .populateSystemData import OSDetails
+
+def __getattr__(name: str):
+	# the daemon pulls in socket, socketserver, etc, and most things that use this (e.g. ackfetch) are run from shell
+	# startup, so only import it if it's actually used:
+	if name == 'OSDetailsDaemon':
+		from .osDetailsDaemon import OSDetailsDaemon
+		return OSDetailsDaemon
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,126 @@
+#!python3
+# -*- coding: utf-8 -*-
+
+import sys, os, pathlib, json, socket, socketserver, logging
+from .populateSystemData import OSDetails
+
+class OSDetailsDaemon:
+	"""
+	a little server that keeps an OSDetails around and answers requests for it over a Unix socket, so things that
+	get run over and over (prompts, shell startup, etc) don't have to start up python and figure it all out every time.
+
+	requests are one line: 'json' returns all the properties as a json object, or a property name returns just that
+	value (so a shell can ask it directly, e.g. 'echo description | nc -U "$sock"'), or 'quit' stops the server.
+	before answering, it checks if the release files (etc) have changed, and if so figures everything out again.
+
+	example:
+	OSDetailsDaemon.Serve()								# in one process (doesn't return until it's stopped)
+	values = OSDetailsDaemon.Query()					# in another; returns None if the daemon isn't running
+	"""
+
+	_encoding = "utf-8"
+
+	@staticmethod
+	def GetSocketPath() -> pathlib.Path:
+		runtimeDir = os.environ.get("XDG_RUNTIME_DIR")
+		if runtimeDir:
+			return pathlib.Path(runtimeDir) / "populateSystemData" / "osDetails.sock"
+		return OSDetails._getSnapshotFolder() / "osDetails.sock"
+
+	@staticmethod
+	def Serve(socketPath: pathlib.Path = None) -> None:
+		"runs the server until it gets a 'quit' request (or a KeyboardInterrupt)"
+		if sys.platform == "win32":
+			raise NotImplementedError("the OSDetails daemon needs Unix sockets")
+		socketPath = socketPath if socketPath else OSDetailsDaemon.GetSocketPath()
+		socketPath.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+		if socketPath.exists():
+			if OSDetailsDaemon._ping(socketPath):
+				raise RuntimeError(f'OSDetails daemon is already running on socket "{socketPath}"')
+			socketPath.unlink()		# left over from one that didn't shut down cleanly
+		server = OSDetailsDaemon._Server(str(socketPath), OSDetailsDaemon._RequestHandler)
+		try:
+			os.chmod(socketPath, 0o600)
+			logging.info(f'OSDetails daemon listening on socket "{socketPath}"')
+			server.serve_forever()
+		except KeyboardInterrupt:
+			pass
+		finally:
+			server.server_close()
+			try:
+				socketPath.unlink()
+			except FileNotFoundError:
+				pass
+			logging.info("OSDetails daemon stopped")
+
+	@staticmethod
+	def Query(socketPath: pathlib.Path = None, timeout: float = 0.5) -> dict:
+		"returns the OSDetails properties from the daemon, or None if it's not running (or doesn't answer in time)"
+		result = OSDetailsDaemon._request("json", socketPath, timeout)
+		# if something went wrong on the daemon's end, it might have just closed the connection without answering:
+		if not result:
+			return None
+		try:
+			return json.loads(result)
+		except ValueError as ex:
+			logging.debug(f'could not parse reply from OSDetails daemon: {ex}')
+			return None
+
+	@staticmethod
+	def Stop(socketPath: pathlib.Path = None, timeout: float = 0.5) -> bool:
+		"asks the daemon to shut down; returns False if it wasn't running"
+		return OSDetailsDaemon._request("quit", socketPath, timeout) is not None
+
+	@staticmethod
+	def _ping(socketPath: pathlib.Path) -> bool:
+		return OSDetailsDaemon._request("platform", socketPath, 0.5) is not None
+
+	@staticmethod
+	def _request(request: str, socketPath: pathlib.Path, timeout: float) -> str:
+		socketPath = socketPath if socketPath else OSDetailsDaemon.GetSocketPath()
+		try:
+			with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+				sock.settimeout(timeout)
+				sock.connect(str(socketPath))
+				sock.sendall(f"{request}\n".encode(OSDetailsDaemon._encoding))
+				sock.shutdown(socket.SHUT_WR)
+				chunks = list(iter(lambda: sock.recv(65536), b''))
+			return b"".join(chunks).decode(OSDetailsDaemon._encoding)
+		except (OSError, socket.timeout) as ex:
+			logging.debug(f'could not get "{request}" from OSDetails daemon on socket "{socketPath}": {ex}')
+			return None
+
+	class _Server(socketserver.UnixStreamServer):
+		def __init__(self, socketPath: str, handlerClass):
+			super().__init__(socketPath, handlerClass)
+			self.details: OSDetails = OSDetails.GetDetails()
+
+		def getDetails(self) -> OSDetails:
+			if self.details.isStale():
+				logging.info("OS details changed; refreshing")
+				self.details = OSDetails.GetDetails(refresh=True)
+			return self.details
+
+	class _RequestHandler(socketserver.StreamRequestHandler):
+		timeout = 2		# so a client that connects and never sends anything can't hang the server
+
+		def handle(self):
+			try:
+				request = self.rfile.readline(256).decode(OSDetailsDaemon._encoding).strip()
+			except (OSError, socket.timeout):
+				return
+			if request == "quit":
+				self.wfile.write(b"bye\n")
+				# shutdown() waits for serve_forever() to finish, which is waiting on us, so it has to be from another thread:
+				import threading
+				threading.Thread(target=self.server.shutdown, daemon=True).start()
+				return
+			details = self.server.getDetails()
+			if request == "json":
+				response = json.dumps(details.toDict())
+			elif request in OSDetails.PropertyNames:
+				value = getattr(details, request)
+				response = f"{value if value is not None else ''}\n"
+			else:
+				response = f"error: unknown request '{request}'\n"
+			self.wfile.write(response.encode(OSDetailsDaemon._encoding))
@@ -2,10 +2,13 @@
 # -*- coding: utf-8 -*-
 
 from __future__ import annotations
-from pydoc import describe
-import sys, os, platform, pathlib, re, json
+import sys, os, platform, pathlib, re, atexit
 import logging
-from typing import Union
+from typing import Callable, Union, TYPE_CHECKING
+# the heavier modules (subprocess, shlex, json, pickle, etc) are imported where they're used, because ackfetch and the
+# like get run from shell startup scripts, and on Linux most runs are answered from the snapshot without needing them
+if TYPE_CHECKING:
+	from io import TextIOBase
 
 PyScript = pathlib.Path(os.path.abspath(__file__))
 PyScriptRoot = pathlib.Path(os.path.dirname(os.path.abspath(__file__)))
@@ -62,8 +65,42 @@ def deserialize(json: dict) -> "OSDetails._osInfo":
 			if "versions" in json:
 				for x in json["versions"]:
 					result.releaseVersions.append(OSDetails._osVersion.deserialize(x))
+			result._buildIndexes()
 			return result
 
+		def _buildIndexes(self) -> None:
+			# the lookups are all 'find the entry with the highest build that's <= the build number', so keep each list
+			# sorted by build with a parallel list of the builds for bisect (where builds are the same, the one listed
+			# first in the file ends up last, so it's the one that gets found, same as when these were list scans):
+			self.versionsByBuild: dict[str, tuple[list[int], list[OSDetails._osName]]] = { key: OSDetails._osInfo._sortByBuild(vers) for key, vers in self.versions.items() }
+			self.codenamesByBuild: tuple[list[int], list[OSDetails._osCodename]] = OSDetails._osInfo._sortByBuild(self.codenames)
+			self.releaseVersionsByBuild: tuple[list[int], list[OSDetails._osVersion]] = OSDetails._osInfo._sortByBuild(self.releaseVersions)
+			# and the mac ones are looked up by (major, minor), where minor -1 means any minor:
+			self.codenamesByVersion: dict[tuple[int, int], tuple[int, OSDetails._osCodename]] = {}
+			for i, x in enumerate(self.codenames):
+				self.codenamesByVersion.setdefault((x.major, x.minor), (i, x))
+
+		@staticmethod
+		def _sortByBuild(items: list) -> tuple[list[int], list]:
+			ordered = [x for i, x in sorted(enumerate(items), key=lambda ix: (ix[1].build, -ix[0]))]
+			return [x.build for x in ordered], ordered
+
+		@staticmethod
+		def findByBuild(index: tuple[list[int], list], buildNumber: int):
+			"returns the entry with the highest build that's <= buildNumber, or None"
+			import bisect
+			builds, items = index
+			i = bisect.bisect_right(builds, buildNumber)
+			return items[i - 1] if i > 0 else None
+
+		def findCodenameByVersion(self, major: int, minor: int) -> "OSDetails._osCodename":
+			exact = self.codenamesByVersion.get((major, minor))
+			anyMinor = self.codenamesByVersion.get((major, -1))
+			if exact and anyMinor:
+				return exact[1] if exact[0] < anyMinor[0] else anyMinor[1]
+			match = exact or anyMinor
+			return match[1] if match else None
+
 	class _osInfos:
 		@staticmethod
 		def deserialize(json: dict) -> "OSDetails._osInfos":
@@ -79,6 +116,8 @@ def deserialize(json: dict) -> "OSDetails._osInfos":
 	PlatformBSD: str = "BSD"
 	_cachedOSDetails: "OSDetails" = None
 	_cachedPlatform: str = None
+	_cachedOsInfoLookups: "OSDetails._osInfos" = None
+	_osInfoLookupsCacheVersion = 1
 
 	def __init__(self):
 		self._platform: str = OSDetails._getPlatform()
@@ -89,14 +128,23 @@ def __repr__(self) -> str:
 				f'updateRevision = "{self.updateRevision}", distributor = "{self.distributor}", codename = "{self.codename}", osType = "{self.osType}", ' +\
 				f'edition = "{self.edition}", osArchitecture = "{self.osArchitecture}", is64BitOs = "{self.is64BitOs}">'
 
+	PropertyNames: list[str] = ["platform", "id", "description", "release", "releaseVersion", "kernelVersion", "buildNumber", "updateRevision",
+								"distributor", "codename", "osType", "edition", "osArchitecture", "is64BitOS"]
+
 	@staticmethod
-	def GetDetails() -> "OSDetails":
-		if not OSDetails._cachedOSDetails:
+	def GetDetails(useSnapshot: bool = True, refresh: bool = False) -> "OSDetails":
+		"""
+		returns the details for the current OS; on Linux and BSDs, if useSnapshot is True, the values are saved to a
+		snapshot file in the user's cache folder, so later runs don't have to reread/rerun everything (it's redone
+		whenever the release files or the kernel change); if refresh is True, the details are figured out again
+		rather than returning the ones from an earlier call
+		"""
+		if refresh or not OSDetails._cachedOSDetails:
 			p = OSDetails._getPlatform()
 			if p == OSDetails.PlatformWindows:
 				OSDetails._cachedOSDetails = _OSDetailsWin()
 			elif p in [OSDetails.PlatformLinux, OSDetails.PlatformBSD]:
-				OSDetails._cachedOSDetails = _OSDetailsNix()
+				OSDetails._cachedOSDetails = _OSDetailsNix._loadFromSnapshot() if useSnapshot else _OSDetailsNix()
 			elif p == OSDetails.PlatformMacOS:
 				OSDetails._cachedOSDetails = _OSDetailsMac()
 		return OSDetails._cachedOSDetails
@@ -116,12 +164,68 @@ def _getPlatform() -> str:
 				raise NotImplementedError(f'unrecognized platform: sys.platform = "{sys.platform}", platform.system() = "{platform.system()}"')
 		return OSDetails._cachedPlatform
 
+	@staticmethod
+	def _getSnapshotFolder() -> pathlib.Path:
+		# same as ackPyHelpers' FileHelpers.GetUserCacheFolder(), but importing ackPyHelpers would about double how long ackfetch takes to start:
+		if sys.platform == "win32":
+			base = os.environ.get("LOCALAPPDATA", os.path.expanduser("~/AppData/Local"))
+		else:
+			base = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+		return pathlib.Path(base) / "populateSystemData"
+
 	@staticmethod
 	def _getOsInfoLookups() -> "OSDetails._osInfos":
+		"""
+		the jsonc file is only parsed when it's changed: the built lookups are pickled to the cache folder along with a hash
+		of the jsonc, and the pickle gets used as long as the hash still matches
+		"""
+		if OSDetails._cachedOsInfoLookups:
+			return OSDetails._cachedOsInfoLookups
+		import hashlib
 		jsonPath = PyScriptRoot / "osInfoLookups.jsonc"
-		logging.debug(f'trying to read osInfoLookups data from file "{jsonPath}"')
-		with open(jsonPath, "r", encoding="utf-8") as file:
-			s = file.read()
+		with open(jsonPath, "rb") as file:
+			raw = file.read()
+		sourceHash = hashlib.sha256(raw).hexdigest()
+		cachePath = OSDetails._getSnapshotFolder() / "osInfoLookups.pickle"
+		result = OSDetails._loadOsInfoLookupsCache(cachePath, sourceHash)
+		if not result:
+			result = OSDetails._parseOsInfoLookups(jsonPath, raw.decode("utf-8"))
+			OSDetails._saveOsInfoLookupsCache(cachePath, sourceHash, result)
+		OSDetails._cachedOsInfoLookups = result
+		return result
+
+	@staticmethod
+	def _loadOsInfoLookupsCache(cachePath: pathlib.Path, sourceHash: str) -> "OSDetails._osInfos":
+		import pickle
+		try:
+			with open(cachePath, "rb") as file:
+				cached = pickle.load(file)
+			if cached["version"] == OSDetails._osInfoLookupsCacheVersion and cached["sourceHash"] == sourceHash:
+				logging.debug(f'using cached osInfoLookups data from file "{cachePath}"')
+				return cached["lookups"]
+			logging.debug(f'cached osInfoLookups data in file "{cachePath}" is out of date')
+		except FileNotFoundError:
+			pass
+		except Exception as ex:		# unpickling can throw just about anything (e.g. if the classes moved); just rebuild it
+			logging.debug(f'could not read cached osInfoLookups data from file "{cachePath}": {ex}')
+		return None
+
+	@staticmethod
+	def _saveOsInfoLookupsCache(cachePath: pathlib.Path, sourceHash: str, lookups: "OSDetails._osInfos") -> None:
+		import pickle
+		try:
+			cachePath.parent.mkdir(parents=True, exist_ok=True)
+			tmpPath = cachePath.with_name(f"{cachePath.name}.{os.getpid()}.tmp")
+			with open(tmpPath, "wb") as file:
+				pickle.dump({ "version": OSDetails._osInfoLookupsCacheVersion, "sourceHash": sourceHash, "lookups": lookups }, file, protocol=pickle.HIGHEST_PROTOCOL)
+			os.replace(tmpPath, cachePath)
+		except (OSError, pickle.PicklingError) as ex:
+			logging.debug(f'could not write cached osInfoLookups data to file "{cachePath}": {ex}')
+
+	@staticmethod
+	def _parseOsInfoLookups(jsonPath: pathlib.Path, s: str) -> "OSDetails._osInfos":
+		import json
+		logging.debug(f'reading osInfoLookups data from file "{jsonPath}"')
 		# the python json parser can't handle comments 😖 so strip them out
 		# (these regexes will break things if there's '//' or '/*' inside a string in the json but that's okay for this file because i didn't do that):
 		s = re.sub(r"//.*[\r\n]+", "", s)	# line comments
@@ -174,6 +278,14 @@ def _convertVersion(value: str) -> tuple[str,int,int]:
 				result = f"{major}.{minor}{rest if rest else ''}"
 		return result,major,minor
 
+	def toDict(self) -> dict:
+		"returns all the properties in a dictionary, keyed by property name"
+		return { name: getattr(self, name) for name in OSDetails.PropertyNames }
+
+	def isStale(self) -> bool:
+		"whether the OS details might have changed since these were figured out (e.g. the OS was updated)"
+		return False
+
 	# region methods to override
 	def _getId(self) -> str:
 		return None
@@ -299,9 +411,9 @@ def __init__(self):
 				self._osType = "WorkStation" if self._installType == "Client" else "Server"
 			self._osArch, self._is64BitOs = self._getWinOsArch()
 			osLookups = OSDetails._getOsInfoLookups()
-			self._releaseVersion = self._getWinReleaseVersion(osLookups.windows.releaseVersions, self._buildNumber, self._ubr)
-			self._release = self._getWinRelease(osLookups.windows.versions, self._buildNumber, self._osType, self._displayVersion, self._releaseId, self._ubr)
-			self._codename = self._getWinCodename(osLookups.windows.codenames, self._buildNumber)
+			self._releaseVersion = self._getWinReleaseVersion(osLookups.windows, self._buildNumber, self._ubr)
+			self._release = self._getWinRelease(osLookups.windows, self._buildNumber, self._osType, self._displayVersion, self._releaseId, self._ubr)
+			self._codename = self._getWinCodename(osLookups.windows, self._buildNumber)
 			self._id = self._getWinId(self._release, self._buildNumber, self._osType, self._cleanedUpProductName)
 			self._kernelVersion = self._getWinKernelVersion(self._ubr)
 			self._edition = self._getWinEdition(self._editionId, self._installType)
@@ -396,10 +508,10 @@ def _cleanUpWinProductName(self, rawName: str, buildNumber: int) -> str:
 		def _getWinKernelVersion(self, ubr: int) -> str:
 			return f"{platform.version()}.{ubr if ubr is not None else 0}"
 
-		def _getWinReleaseVersion(self, osReleaseVersions: list["OSDetails._osVersion"], buildNumber: int, ubr: int) -> str:
-			for ver in sorted(osReleaseVersions, key=lambda v: v.build, reverse=True):
-				if buildNumber >= ver.build:
-					return f"{ver.major}.{ver.minor}.{buildNumber}.{ubr if ver.includeUbr and ubr is not None else 0}"
+		def _getWinReleaseVersion(self, osInfo: "OSDetails._osInfo", buildNumber: int, ubr: int) -> str:
+			ver: OSDetails._osVersion = OSDetails._osInfo.findByBuild(osInfo.releaseVersionsByBuild, buildNumber)
+			if ver:
+				return f"{ver.major}.{ver.minor}.{buildNumber}.{ubr if ver.includeUbr and ubr is not None else 0}"
 			return f"{buildNumber}"
 
 		def _getWinOsArch(self) -> tuple[str, bool]:
@@ -417,30 +529,27 @@ def _getWinOsArch(self) -> tuple[str, bool]:
 				arch = os.environ["PROCESSOR_ARCHITEW6432"]
 			return OSDetails._normalizeArchitecture(arch)
 
-		def _getWinRelease(self, osVersions: dict[str, list["OSDetails._osName"]], buildNumber: int, osType: str, displayVersion: str, releaseId: str, ubr: int) -> str:
+		def _getWinRelease(self, osInfo: "OSDetails._osInfo", buildNumber: int, osType: str, displayVersion: str, releaseId: str, ubr: int) -> str:
 			logging.debug(f'mapping win release: build = "{buildNumber}", type = "{osType}"')
 			result = "<unknown>"
 			key = "server" if osType.lower() == "server" else "client"
-			verList: list[OSDetails._osName] = None
-			if key in osVersions:
-				verList: list[OSDetails._osName] = osVersions[key]
-			if not verList or len(verList) == 0:
+			verIndex = osInfo.versionsByBuild.get(key)
+			if not verIndex or len(verIndex[0]) == 0:
 				logging.warn(f"could not find matching versionList for osType '{osType}' or it is empty")
 				return result
-			for ver in sorted(verList, key=lambda v: v.build, reverse=True):
-				if buildNumber >= ver.build:
-					result = ver.name
-					if ver.addRegRelease:
-						result += f".{displayVersion if displayVersion else releaseId}"
-					if ver.addBuildNumber:
-						result += f".{buildNumber}"
-					if ver.addUbr:
-						result += f".{ubr}"
-					if ver.addBuildLab:
-						bldLab = self._getWinBuildLab()
-						if bldLab:
-							result += f".{bldLab}"
-					break
+			ver: OSDetails._osName = OSDetails._osInfo.findByBuild(verIndex, buildNumber)
+			if ver:
+				result = ver.name
+				if ver.addRegRelease:
+					result += f".{displayVersion if displayVersion else releaseId}"
+				if ver.addBuildNumber:
+					result += f".{buildNumber}"
+				if ver.addUbr:
+					result += f".{ubr}"
+				if ver.addBuildLab:
+					bldLab = self._getWinBuildLab()
+					if bldLab:
+						result += f".{bldLab}"
 			logging.debug(f'mapping win release: result = "{result}"')
 			return result
 
@@ -478,11 +587,9 @@ def _getWinId(self, release: str, buildNumber: int, osType: str, productName: st
 			logging.debug(f'mapping win id: result = "{result}"')
 			return result
 
-		def _getWinCodename(self, osCodenames: list["OSDetails._osCodename"], buildNumber: int) -> str:
-			for ver in sorted(osCodenames, key=lambda v: v.build, reverse=True):
-				if buildNumber >= ver.build:
-					return ver.codename
-			return ""
+		def _getWinCodename(self, osInfo: "OSDetails._osInfo", buildNumber: int) -> str:
+			ver: OSDetails._osCodename = OSDetails._osInfo.findByBuild(osInfo.codenamesByBuild, buildNumber)
+			return ver.codename if ver else ""
 
 		def _getWinEdition(self, editionId: str, installType: str) -> str:
 			if editionId.startswith("Core"):
@@ -507,59 +614,201 @@ def _getWinEdition(self, editionId: str, installType: str) -> str:
 		# endregion
 
 elif OSDetails._getPlatform() in [OSDetails.PlatformLinux, OSDetails.PlatformBSD]:
-	from io import StringIO, TextIOBase
-	from shlex import shlex
-	import subprocess, shutil
 	class _OSDetailsNix(OSDetails):
-		def __init__(self):
+		"""
+		the values here are only figured out when they're first asked for (and related ones along with them, e.g.
+		reading the release files gets the id, description, release, etc. all at once). if created from
+		_loadFromSnapshot(), whatever was figured out last time is read from a snapshot file, as long as none of
+		the release files or the kernel release have changed since, and anything new is saved back at exit.
+		"""
+		_snapshotVersion = 1
+		_snapshotSourceFiles = ["/etc/lsb-release", "/etc/os-release", "/usr/lib/os-release", "/etc/debian_version", str(PyScript)]
+		# the external commands we might need to run; each one gets killed if it takes longer than probeTimeout secs
+		_probeCommands: dict[str, list[str]] = {
+			"lsb_release": ["lsb_release", "-a"],
+		}
+		probeTimeout: float = 2.0
+		# the most recent one from _loadFromSnapshot(), which gets saved at exit; only one atexit handler gets registered,
+		# so something long lived that keeps refreshing them (e.g. the daemon) doesn't pile up handlers and old instances:
+		_snapshotToSave: "_OSDetailsNix" = None
+		_snapshotAtExitRegistered = False
+
+		class _Probe:
+			"an external command that's been started; result() waits (up to the deadline) for its output"
+			def __init__(self, name: str, args: list[str], timeout: float):
+				import subprocess, shutil, time
+				self.name = name
+				self._proc: subprocess.Popen = None
+				self._deadline = time.monotonic() + timeout
+				exePath = shutil.which(args[0])
+				if not exePath:
+					logging.debug(f'no {args[0]} found')
+					return
+				logging.debug(f'starting probe "{name}": {exePath}')
+				# "file" output is locale dependent: force the usage of the C locale to get deterministic behavior. (from platform.py...)
+				env = dict(os.environ, LC_ALL="C")
+				try:
+					self._proc = subprocess.Popen([exePath] + args[1:], stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env)
+				except OSError as ex:
+					logging.debug(f'could not start probe "{name}": {ex}')
+
+			def result(self) -> str:
+				import subprocess, time
+				if not self._proc:
+					return ""
+				try:
+					output, _ = self._proc.communicate(timeout=max(0, self._deadline - time.monotonic()))
+				except subprocess.TimeoutExpired:
+					logging.warning(f'probe "{self.name}" timed out; ignoring it')
+					self.cancel()
+					return ""
+				returncode = self._proc.returncode
+				self._proc = None
+				if returncode != 0:
+					# same as check_output() would have done: whatever a failed command printed isn't worth parsing
+					logging.debug(f'probe "{self.name}" failed with exit code {returncode}; ignoring it')
+					return ""
+				# With the C locale, the output should be mostly ASCII-compatible. (from platform.py...)
+				# Decode from Latin-1 to prevent Unicode decode error. (because it's returning a byte string...)
+				return output.decode('latin-1') if output else ""
+
+			def cancel(self) -> None:
+				if self._proc:
+					self._proc.kill()
+					self._proc.communicate()
+					self._proc = None
+
+		def __init__(self, values: dict = None):
 			super().__init__()
-			self._distId, self._description, self._release, self._codename = self._getReleaseProps()
-			self._releaseLooksLikeVersion = OSDetails._looksLikeVersion(self._release)
-			# # special case(s):
-			if self._distId == "debian" and re.match(r"^\d+$", self._release):
-				# Debian's os-release VERSION_ID is too simple, so let's try to get fuller debian_version:
-				debianRelPath = pathlib.Path("/etc/debian_version")
-				if debianRelPath.exists():
-					self._release = debianRelPath.read_text()
-					self._release = self._release.strip()
-			self._distributor = (self._distId.title() if self.platform.find("BSD") < 0 else self._distId) if self._distId else ""
-			self._finalDescription = f"{self._description} {self._release}" if self._releaseLooksLikeVersion and self._description.find(self._release) < 0 else self._description
-			self._kernelVersion = self._getKernelVersion()
-			if self._releaseLooksLikeVersion:
-				self._id = f"{OSDetails._getPlatform().lower()}.{self._distId.lower()}.{self._release}"
-				self._releaseVersion,major,minor = OSDetails._convertVersion(self._release)
-			else:
-				self._id = f"{OSDetails._getPlatform().lower()}.{self._distId.lower()}"
-				self._releaseVersion = ""
-			self._osArch, self._is64BitOs = OSDetails._normalizeArchitecture(platform.machine())	# apparently "platform.machine()"/"uname -m" is the OS arch, not the processor/"machine" arch
+			self._values: dict = dict(values) if values else {}
+			self._dirty = False
+			self._snapshotPath: pathlib.Path = None
+			self._snapshotKey: dict = _OSDetailsNix._getSnapshotKey()
+
+		@staticmethod
+		def _loadFromSnapshot() -> "_OSDetailsNix":
+			import json
+			snapshotPath = OSDetails._getSnapshotFolder() / "osDetails.json"
+			key = _OSDetailsNix._getSnapshotKey()
+			# (the instance gets its own key when it's created, and that's what's saved with the values, so if the files
+			# change in between, we just end up figuring it out again next time)
+			values = None
+			try:
+				with open(snapshotPath, "r", encoding="utf-8") as f:
+					snapshot = json.load(f)
+				if snapshot.get("key") == key:
+					values = snapshot["values"]
+					logging.debug(f'using snapshot file "{snapshotPath}"')
+				else:
+					logging.debug(f'snapshot file "{snapshotPath}" is out of date')
+			except FileNotFoundError:
+				logging.debug(f'no snapshot file "{snapshotPath}"')
+			except (OSError, ValueError, KeyError) as ex:
+				logging.debug(f'could not read snapshot file "{snapshotPath}": {ex}')
+			result = _OSDetailsNix(values)
+			result._snapshotPath = snapshotPath
+			_OSDetailsNix._snapshotToSave = result
+			if not _OSDetailsNix._snapshotAtExitRegistered:
+				atexit.register(_OSDetailsNix._saveSnapshotAtExit)
+				_OSDetailsNix._snapshotAtExitRegistered = True
+			return result
+
+		@staticmethod
+		def _saveSnapshotAtExit() -> None:
+			if _OSDetailsNix._snapshotToSave is not None:
+				_OSDetailsNix._snapshotToSave._saveSnapshot()
+
+		@staticmethod
+		def _getSnapshotKey() -> dict:
+			mtimes = {}
+			for f in _OSDetailsNix._snapshotSourceFiles:
+				try:
+					mtimes[f] = os.stat(f).st_mtime_ns
+				except OSError:
+					mtimes[f] = None
+			return { "version": _OSDetailsNix._snapshotVersion, "kernel": platform.release(), "mtimes": mtimes }
+
+		def _saveSnapshot(self) -> None:
+			if not self._dirty or self._snapshotPath is None or self.isStale():
+				return
+			import json
+			try:
+				self._snapshotPath.parent.mkdir(parents=True, exist_ok=True)
+				tmpPath = self._snapshotPath.with_name(f"{self._snapshotPath.name}.{os.getpid()}.tmp")
+				with open(tmpPath, "w", encoding="utf-8") as f:
+					json.dump({ "key": self._snapshotKey, "values": self._values }, f)
+				os.replace(tmpPath, self._snapshotPath)
+				self._dirty = False
+			except OSError as ex:
+				logging.debug(f'could not write snapshot file "{self._snapshotPath}": {ex}')
+
+		def isStale(self) -> bool:
+			return _OSDetailsNix._getSnapshotKey() != self._snapshotKey
+
+		def _getValue(self, name: str, compute: Callable[[], dict]):
+			"returns the named value, calling compute to figure it out (and whatever else it figures out along with it) the first time"
+			if name not in self._values:
+				self._values.update(compute())
+				self._dirty = True
+			return self._values[name]
 
 		# region overridden methods
 		def _getId(self) -> str:
-			return self._id
+			return self._getValue("id", self._computeReleaseValues)
 
 		def _getDescription(self) -> str:
-			return self._finalDescription
+			return self._getValue("description", self._computeReleaseValues)
 
 		def _getRelease(self) -> str:
-			return self._release
+			return self._getValue("release", self._computeReleaseValues)
 
 		def _getReleaseVersion(self) -> str:
-			return self._releaseVersion
+			return self._getValue("releaseVersion", self._computeReleaseValues)
 
 		def _getKernelVersion(self) -> str:
-			return self._kernelVersion
+			return self._getValue("kernelVersion", self._computeKernelValues)
 
 		def _getDistributor(self) -> str:
-			return self._distributor
+			return self._getValue("distributor", self._computeReleaseValues)
 
 		def _getCodename(self) -> str:
-			return self._codename
+			return self._getValue("codename", self._computeReleaseValues)
 
 		def _getOsArchitecture(self) -> str:
-			return self._osArch
+			return self._getValue("osArch", self._computeArchValues)
 
 		def _getIs64BitOS(self) -> bool:
-			return self._is64BitOs
+			return self._getValue("is64BitOs", self._computeArchValues)
+		# endregion
+
+		# region value computations
+		def _computeReleaseValues(self) -> dict:
+			distId, description, release, codename = self._getReleaseProps()
+			releaseLooksLikeVersion = OSDetails._looksLikeVersion(release)
+			# # special case(s):
+			if distId == "debian" and re.match(r"^\d+$", release):
+				# Debian's os-release VERSION_ID is too simple, so let's try to get fuller debian_version:
+				debianRelPath = pathlib.Path("/etc/debian_version")
+				if debianRelPath.exists():
+					release = debianRelPath.read_text()
+					release = release.strip()
+			distributor = (distId.title() if self.platform.find("BSD") < 0 else distId) if distId else ""
+			finalDescription = f"{description} {release}" if releaseLooksLikeVersion and description.find(release) < 0 else description
+			if releaseLooksLikeVersion:
+				id = f"{OSDetails._getPlatform().lower()}.{distId.lower()}.{release}"
+				releaseVersion,major,minor = OSDetails._convertVersion(release)
+			else:
+				id = f"{OSDetails._getPlatform().lower()}.{distId.lower()}"
+				releaseVersion = ""
+			return { "id": id, "description": finalDescription, "release": release, "releaseVersion": releaseVersion,
+					"distributor": distributor, "codename": codename }
+
+		def _computeKernelValues(self) -> dict:
+			return { "kernelVersion": self._getNixKernelVersion() }
+
+		def _computeArchValues(self) -> dict:
+			osArch, is64BitOs = OSDetails._normalizeArchitecture(platform.machine())	# apparently "platform.machine()"/"uname -m" is the OS arch, not the processor/"machine" arch
+			return { "osArch": osArch, "is64BitOs": is64BitOs }
 		# endregion
 
 		# region helper methods
@@ -595,7 +844,7 @@ def _getReleaseProps(self) -> tuple[str, str, str, str]:
 
 			# some distros (e.g. fedora and opensuse tumbleweed) still don't have everything but it is returned by lsb_release (??), so let's try that:
 			if not distId or not description or not release or not codename:
-				lsbOutput = _OSDetailsNix._getLsbReleaseOutput()
+				lsbOutput = self._getProbeOutput("lsb_release")
 				lsb = _OSDetailsNix._parseLinesToDict(lsbOutput, separator=":") if lsbOutput else {}
 				if not distId and "Distributor ID" in lsb: distId = lsb["Distributor ID"]
 				if not description and "Description" in lsb: description = lsb["Description"]
@@ -617,6 +866,8 @@ def _getReleaseProps(self) -> tuple[str, str, str, str]:
 
 		@staticmethod
 		def _parseLinesToDict(lines: Union[TextIOBase, str], separator: str = "=") -> dict[str, str]:
+			from io import StringIO
+			from shlex import shlex
 			content = StringIO(lines) if isinstance(lines, str) else lines
 			lx = shlex(content, posix=True)	# with posix=True, it strips quotes, too, which is nice, just not sure what else it might do, but so far, seems okay ??
 			lx.whitespace_split = True				# with this and below, only splits on newlines, which wouldn't be any better tnan just iterating the lines,
@@ -628,27 +879,10 @@ def _parseLinesToDict(lines: Union[TextIOBase, str], separator: str = "=") -> di
 					results[k.strip()] = v.strip()
 			return results
 
-		@staticmethod
-		def _getLsbReleaseOutput() -> str:
-			lsbReleasePath = shutil.which("lsb_release")
-			result = ""
-			if lsbReleasePath:
-				logging.debug(f'lsb_release found at "{lsbReleasePath}"')
-				# "file" output is locale dependent: force the usage of the C locale to get deterministic behavior. (from platform.py...)
-				env = dict(os.environ, LC_ALL="C")
-				try:
-					output = subprocess.check_output([lsbReleasePath, "-a"], stderr=subprocess.DEVNULL, env=env)
-				except (OSError, subprocess.CalledProcessError):
-					output = ""
-				if output:
-					# With the C locale, the output should be mostly ASCII-compatible. (from platform.py...)
-					# Decode from Latin-1 to prevent Unicode decode error. (because it's returning a byte string...)
-					result = output.decode('latin-1')
-			else:
-				logging.debug("no lsb_release found")
-			return result
+		def _getProbeOutput(self, name: str) -> str:
+			return _OSDetailsNix._Probe(name, _OSDetailsNix._probeCommands[name], self.probeTimeout).result()
 
-		def _getKernelVersion(self) -> str:
+		def _getNixKernelVersion(self) -> str:
 			result = platform.release()
 			if OSDetails._getPlatform() == OSDetails.PlatformLinux:
 				# Debian, Kali, maybe others, are now apparently using a 'display' version that's above, but
@@ -663,7 +897,7 @@ def _getKernelVersion(self) -> str:
 		# endregion
 
 elif OSDetails._getPlatform() == OSDetails.PlatformMacOS:
-	import subprocess, shutil
+	import subprocess, shutil, json
 	class _OSDetailsMac(OSDetails):
 		def __init__(self):
 			super().__init__()
@@ -674,7 +908,7 @@ def __init__(self):
 			kern = self._getMacKernelVersion()
 			self._kernelVersion = kern if kern else ""
 			osLookups = OSDetails._getOsInfoLookups()
-			self._codename = self._getMacCodename(osLookups.macos.codenames, self._major, self._minor)
+			self._codename = self._getMacCodename(osLookups.macos, self._major, self._minor)
 			self._buildNumber = self._getMacBuildNumber()
 			self._updateRevision = self._getMacRevision()
 			self._osArch, self._is64BitOs = self._getMacOSArch()
@@ -741,11 +975,9 @@ def _getMacId(self, verMajor: int, verMinor: int) -> str:
 			result = f"mac.{verMajor}.{verMinor}"
 			return result
 
-		def _getMacCodename(self, osCodenames: list["OSDetails._osCodename"], verMajor: int, verMinor: int) -> str:
-			for ver in osCodenames:
-				if verMajor == ver.major and (verMinor == ver.minor or ver.minor < 0):
-					return ver.codename
-			return ""
+		def _getMacCodename(self, osInfo: "OSDetails._osInfo", verMajor: int, verMinor: int) -> str:
+			ver = osInfo.findCodenameByVersion(verMajor, verMinor)
+			return ver.codename if ver else ""
 
 		def _getMacBuildNumber(self) -> str:
 			tmp = _OSDetailsMac._getCommandOutput(["sysctl", "-hin", "kern.osversion"])
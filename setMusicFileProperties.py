@@ -1,8 +1,9 @@
 #!python3
 # -*- coding: utf-8 -*-
 
-import os, sys, pathlib, datetime, re, argparse, stat, sqlite3
-from typing import Any, Iterable, List, Iterator
+import os, sys, pathlib, datetime, re, argparse, stat, sqlite3, time, json, hashlib, contextlib
+from typing import Any, Callable, Iterable, List, Iterator
+from concurrent.futures import ProcessPoolExecutor
 from tabulate import tabulate	# https://pypi.org/project/tabulate/
 from operator import attrgetter
 
@@ -12,6 +13,8 @@
 _myMusicBaseFolder = pathlib.Path(pathlib.Path.home() / "Music/MyMusic")
 _musicAttributesDbPath = _myMusicBaseFolder / "musicAttributes.sqlite"
 _defaultTableFormat = "presto"#"simple"
+_processedFilesIndexPath = FileHelpers.GetUserCacheFolder("setMusicFileProperties") / "processedFiles.sqlite"
+_libraryCatalogPath = _processedFilesIndexPath.with_name("libraryCatalog.sqlite")
 
 class DbRowHelper:
 	def __init__(self, row : sqlite3.Row):
@@ -215,6 +218,7 @@ class MusicFolderHandler:
 	_supportedFileTypesForCopy: list[str] = [".m4a", ".opus", ".wma", ".flac", ".oga", ".ogg", ".ape",]	# ".mp3", ".wav",]
 	_supportedFileTypesGlob: list[str] = ["*.m4a", "*.opus", "*.wma", "*.flac", "*.oga", "*.ogg", "*.ape",]	# "*.mp3", "*.wav",]
 	_disableWriteAccess = (stat.S_ISUID|stat.S_ISGID|stat.S_ISVTX|stat.S_IRWXU|stat.S_IRWXG|stat.S_IRWXO) ^ (stat.S_IWRITE|stat.S_IWGRP|stat.S_IWOTH)
+	_writeAccessBits = stat.S_IWRITE|stat.S_IWGRP|stat.S_IWOTH
 	_commentsProducerRegex = re.compile(r"produce(r|d)", re.IGNORECASE)
 	_composerRegex = re.compile(r"\s*(;|/)\s*")
 	_badCharsRegex = re.compile(r"[‘’“”\u2014\u2013\u2010]")
@@ -259,11 +263,12 @@ class MusicFolderHandler:
 						TagNames.R128TrackGain, TagNames.R128AlbumGain, ]
 	_approvedTagsNativeNamesCache: dict[TagType, list[str]] = dict()
 	_keepOnCleanNativeNamesCache: dict[TagType, list[str]] = dict()
+	_workerLogSink: LogHelper.CaptureSink = None		# only set in worker processes, see _forEach()
 	#endregion
 
 	def __init__(self, folderPath : pathlib.Path = None, targetFolderPath : pathlib.Path = None, sourceFolderPath : pathlib.Path = None,
 				createPlaylist : bool = False, onlyPlaylist : bool = False, playlistName : str = None, onlyTimestamp : bool = False, enableSimpleLookup : bool = False,
-				whatIf : bool = False):
+				whatIf : bool = False, jobs : int = 1, inPlace : bool = False):
 		self._folderPath = folderPath
 		self._targetFolderPath = targetFolderPath
 		self._sourceFolderPath = sourceFolderPath
@@ -273,6 +278,8 @@ def __init__(self, folderPath : pathlib.Path = None, targetFolderPath : pathlib.
 		self._onlyTimestamp = onlyTimestamp
 		self._enableSimpleLookup = enableSimpleLookup
 		self._whatIf = whatIf
+		self._jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+		self._inPlace = inPlace		# write the tags over the existing padding if they fit, rather than always rewriting the whole file
 
 #	@deprecated("we're not using this any more, right?")
 	def SetFolderFilesFromDb(self):
@@ -298,13 +305,14 @@ def CreatePlaylist(self):
 		if renamedFolder:
 			self._folderPath = renamedFolder
 
-		MusicFolderHandler._createPlaylist(self._folderPath, self._playlistName, self._whatIf)
+		MusicFolderHandler._createPlaylist(self._folderPath, self._playlistName, self._whatIf, self._jobs)
 
 	def CopyFolderProperties(self, noRenames: bool = False, tweakModTimeBySecs: int = 0, keepTags: bool = False, onlyJunkTags: bool = False) -> int:
 		if not noRenames:
 			self.CleanUpPathNames()
 
 		filesNotFound = 0
+		filePairs: list[tuple] = []
 		for tf in FileHelpers.MultiGlob(self._targetFolderPath, MusicFolderHandler._supportedFileTypesGlob):
 			sf = self._sourceFolderPath / tf.name
 			if not sf.is_file():
@@ -317,39 +325,146 @@ def CopyFolderProperties(self, noRenames: bool = False, tweakModTimeBySecs: int
 				LogHelper.Warning(f'no source file found for file "{tf.name}"')
 				filesNotFound += 1
 				continue
-			trg = MusicFileProperties(tf)
-			src = MusicFileProperties(sf)
-			self._copyFileProperties(trg, src, tweakModTimeBySecs=tweakModTimeBySecs, keepTags=keepTags, onlyJunkTags=onlyJunkTags)
+			filePairs.append((tf, sf, tweakModTimeBySecs, keepTags, onlyJunkTags))
+
+		changed = sum(MusicFolderHandler._forEach(self._jobs, self._copyFilePathProperties, filePairs))
+		LogHelper.Message(f"{changed} file(s) {'would be ' if self._whatIf else ''}changed, {len(filePairs) - changed} already up to date")
 
 		return 1 if filesNotFound > 0 else 0
 
-	def CleanFolderFiles(self, onlyJunkTags: bool = False, extraTagsToClean: list[str] = None) -> int:
-		"""returns 0 if no issues, or 1 if anything like unexpected tags"""
+	def CleanFolderFiles(self, onlyJunkTags: bool = False, extraTagsToClean: list[str] = None, indexPath: pathlib.Path = None) -> int:
+		"""
+		returns 0 if no issues, or 1 if anything like unexpected tags; if indexPath is given, files that haven't changed
+		since they were last cleaned (with the same options) are skipped, using what was recorded for them in that index
+		"""
 		renamedFolder = MusicFolderHandler._cleanUpPathNames(self._folderPath, self._whatIf)
 		if renamedFolder:
 			self._folderPath = renamedFolder
 
 		result = 0
-		for f in FileHelpers.MultiGlob(self._folderPath, MusicFolderHandler._supportedFileTypesGlob):
-			mf = MusicFileProperties(f)
-			tmpResult = self._cleanFile(mf, onlyJunkTags, extraTagsToClean)
-			if tmpResult > result: result = tmpResult
+		operation = "cleanFiles" + (":onlyJunk" if onlyJunkTags else "") + (f":{','.join(sorted(extraTagsToClean))}" if extraTagsToClean else "")
+		with (ProcessedFilesIndex(indexPath) if indexPath else contextlib.nullcontext()) as index:
+			files = []
+			for f in FileHelpers.MultiGlob(self._folderPath, MusicFolderHandler._supportedFileTypesGlob):
+				previous = index.getUnchanged(f, operation) if index else None
+				if previous:
+					tmpResult, unexpectedTags = previous
+					LogHelper.Verbose('skipping unchanged file "{0}"', f.name)
+					MusicFolderHandler._logUnexpectedTags(f, unexpectedTags)
+					if tmpResult > result: result = tmpResult
+				else:
+					files.append((f, onlyJunkTags, extraTagsToClean))
+
+			for (f, _, _), (tmpResult, unexpectedTags) in zip(files, MusicFolderHandler._forEach(self._jobs, self._cleanFilePath, files)):
+				if tmpResult > result: result = tmpResult
+				if index and not self._whatIf:
+					index.record(f, operation, tmpResult, unexpectedTags)
 
 		return result
 
 	def CleanFile(self, filePath : pathlib.Path, onlyJunkTags: bool = False, extraTagsToClean: list[str] = None) -> int:
 		"""returns 0 if no issues, or 1 if anything like unexpected tags"""
+		return self._cleanFilePath(filePath, onlyJunkTags, extraTagsToClean)[0]
+
+	def _cleanFilePath(self, filePath : pathlib.Path, onlyJunkTags: bool, extraTagsToClean: list[str]) -> tuple[int, list[tuple[str, str]]]:
 		mf = MusicFileProperties(filePath)
 		return self._cleanFile(mf, onlyJunkTags, extraTagsToClean)
 
+	def CompactFolderFiles(self) -> int:
+		"""
+		rewrites the music files in the folder without any padding (e.g. after cleaning/copying them with inPlace);
+		returns 0 if no issues, or 1 if there were files we couldn't tell the padding for (those are left alone)
+		"""
+		files = [(f,) for f in FileHelpers.MultiGlob(self._folderPath, MusicFolderHandler._supportedFileTypesGlob)]
+		result = 0
+		compacted = 0
+		for fileCompacted, tmpResult in MusicFolderHandler._forEach(self._jobs, self._compactFilePath, files):
+			if fileCompacted: compacted += 1
+			if tmpResult > result: result = tmpResult
+		LogHelper.Verbose('compacted {0} of {1} file(s)', compacted, len(files))
+		return result
+
+	def CompactFile(self, filePath: pathlib.Path) -> int:
+		"""rewrites the file without any padding, if it has any; returns 0 if no issues, or 1 if we couldn't tell the padding for it"""
+		return self._compactFilePath(filePath)[1]
+
+	def _compactFilePath(self, filePath: pathlib.Path) -> tuple[bool, int]:
+		"""returns (whether it was (or would be, for whatIf) compacted, result code like CompactFile())"""
+		mf = MusicFileProperties(filePath)
+		padding = mf.PaddingBytes
+		if padding is None:
+			# not going to rewrite it blindly:
+			LogHelper.Warning(f'can\'t tell how much padding is in file "{filePath.name}"; leaving it alone')
+			return False, 1
+		if padding == 0:
+			LogHelper.Verbose('no padding in file "{0}"', filePath.name)
+			return False, 0
+		if self._whatIf:
+			LogHelper.WhatIf(f'removing {padding:,} bytes of padding from file "{filePath.name}"')
+			return True, 0
+		LogHelper.Message(f'removing {padding:,} bytes of padding from file "{filePath.name}"')
+		st = filePath.stat()
+		filePath.chmod(st.st_mode | stat.S_IWRITE)		# make sure it's NOT readonly
+		try:
+			compacted = mf.compact()
+		finally:
+			os.utime(filePath, ns=(st.st_atime_ns, st.st_mtime_ns))
+			filePath.chmod(st.st_mode)
+		return compacted, 0
+
 	def CleanUpPathNames(self) -> int:
 		renamedFolder = MusicFolderHandler._cleanUpPathNames(self._targetFolderPath, self._whatIf)
 		if renamedFolder:
 			self._targetFolderPath = renamedFolder
 		return 0
 
-	def _saveFile(self, musicFile: MusicFileProperties, originalLastModTime: float, originalLastAccessTime: float, quiet: bool, ignoreOnlyTimestamp: bool) -> None:
-		if not musicFile.HasChanges:
+	@staticmethod
+	def FindAlbumFolders(rootFolder: pathlib.Path) -> list[pathlib.Path]:
+		"""returns all the folders under rootFolder (including rootFolder) that have any supported music files directly in them, sorted"""
+		results = []
+		for folder, subfolders, files in os.walk(rootFolder):
+			subfolders[:] = sorted(d for d in subfolders if not d.startswith('.'))
+			if any(os.path.splitext(f)[1].lower() in MusicFolderHandler._supportedFileTypesForCopy for f in files):
+				results.append(pathlib.Path(folder))
+		return results
+
+	@staticmethod
+	def _forEach(jobs: int, func: Callable[..., Any], argsList: list[tuple]) -> Iterator[Any]:
+		"""
+		calls func with each of the args in argsList and yields the results, in the same order as argsList; if we're
+		doing more than one job at a time, the calls are spread over a pool of processes (so func and the args have to be
+		picklable, e.g. a method on this object, which is just paths and flags), with each one's log messages held back
+		and then written out with its result, so the output reads the same as if they'd been done one at a time
+		"""
+		if jobs <= 1 or len(argsList) <= 1:
+			for args in argsList:
+				yield func(*args)
+			return
+		LogHelper.Flush()	# so the workers don't inherit anything that's still sitting in the sink's buffer
+		with ProcessPoolExecutor(max_workers=min(jobs, len(argsList)), initializer=MusicFolderHandler._initWorker,
+								initargs=(LogHelper.IsVerbose(), LogHelper.IsStructured())) as pool:
+			for result, lines, ex in pool.map(MusicFolderHandler._runInWorker, [func] * len(argsList), argsList):
+				LogHelper.WriteLines(lines)
+				if ex is not None:
+					raise ex
+				yield result
+
+	@staticmethod
+	def _initWorker(verbose: bool, structured: bool) -> None:
+		MusicFolderHandler._workerLogSink = LogHelper.CaptureSink()
+		LogHelper.Init(verbose, sink=MusicFolderHandler._workerLogSink, structured=structured)
+
+	@staticmethod
+	def _runInWorker(func: Callable[..., Any], args: tuple) -> tuple[Any, list[str], BaseException|None]:
+		try:
+			result = func(*args)
+			return result, MusicFolderHandler._workerLogSink.takeLines(), None
+		except Exception as ex:
+			return None, MusicFolderHandler._workerLogSink.takeLines(), ex
+
+	def _saveFile(self, musicFile: MusicFileProperties, originalLastModTimeNs: int, originalLastAccessTimeNs: int, quiet: bool, ignoreOnlyTimestamp: bool,
+					force: bool = False) -> None:
+		if not musicFile.HasChanges and not force:
 			LogHelper.Verbose('no changes in file "{0}"', musicFile.FilePath.name)
 			return
 		if self._whatIf:
@@ -361,14 +476,42 @@ def _saveFile(self, musicFile: MusicFileProperties, originalLastModTime: float,
 				LogHelper.Message(f'saving changes to file "{musicFile.FilePath.name}"')
 			musicFile.FilePath.chmod(musicFile.FilePath.stat().st_mode | stat.S_IWRITE)		# make sure it's NOT readonly
 			if ignoreOnlyTimestamp or not self._onlyTimestamp:
-				musicFile.save(True)
-			os.utime(musicFile.FilePath, (originalLastAccessTime, originalLastModTime))
-			musicFile.FilePath.chmod(musicFile.FilePath.stat().st_mode & MusicFolderHandler._disableWriteAccess)		# now make sure it IS readonly
+				musicFile.save(removePadding = not self._inPlace, inPlace = self._inPlace)
+			MusicFolderHandler._setTimestampAndReadOnly(musicFile.FilePath, originalLastModTimeNs, originalLastAccessTimeNs)
+
+	def _updateTimestampOnly(self, filePath: pathlib.Path, lastModTimeNs: int, lastAccessTimeNs: int) -> None:
+		"""
+		for when the tags didn't change: still make the mod time match (and the file readonly), without saving the file;
+		if it's already right, the file isn't touched at all (not even its ctime, which ProcessedFilesIndex/LibraryCatalog go by)
+		"""
+		st = filePath.stat()
+		if st.st_mtime_ns == lastModTimeNs and not (st.st_mode & MusicFolderHandler._writeAccessBits):
+			return
+		if self._whatIf:
+			LogHelper.WhatIf(f'updating timestamp of file "{filePath.name}"')
+			return
+		LogHelper.Verbose('updating timestamp of file "{0}"', filePath.name)
+		MusicFolderHandler._setTimestampAndReadOnly(filePath, lastModTimeNs, lastAccessTimeNs)
+
+	@staticmethod
+	def _setTimestampAndReadOnly(filePath: pathlib.Path, lastModTimeNs: int, lastAccessTimeNs: int) -> None:
+		st = filePath.stat()
+		if st.st_mtime_ns != lastModTimeNs:
+			os.utime(filePath, ns=(lastAccessTimeNs, lastModTimeNs))
+		if st.st_mode & MusicFolderHandler._writeAccessBits:
+			filePath.chmod(stat.S_IMODE(st.st_mode) & MusicFolderHandler._disableWriteAccess)		# now make sure it IS readonly
 
 	def _copyFileProperties(self, targetMusicFile : MusicFileProperties, sourceMusicFile : MusicFileProperties, tweakModTimeBySecs: int = 0,
-						 	forceOverwrite: bool = False, keepTags: bool = False, onlyJunkTags: bool = False):
-		lastModTime = os.path.getmtime(sourceMusicFile.FilePath) + tweakModTimeBySecs
-		currLastAccessTime = os.path.getatime(targetMusicFile.FilePath)
+						 	forceOverwrite: bool = False, keepTags: bool = False, onlyJunkTags: bool = False) -> bool:
+		"""
+		returns True if the target file's tags were (or would be, for whatIf) changed; the cleaning and copying all happens
+		in memory first, and then the file is only saved if its tags actually came out different from what they were
+		(so re-copying to files that are already in sync doesn't rewrite them), or if forceOverwrite; either way, the
+		file's mod time is set from the source file's (plus tweakModTimeBySecs), and it's made readonly
+		"""
+		lastModTimeNs = sourceMusicFile.FilePath.stat().st_mtime_ns + tweakModTimeBySecs * 1_000_000_000
+		currLastAccessTimeNs = targetMusicFile.FilePath.stat().st_atime_ns
+		originalTags = targetMusicFile.getNativeTagsSnapshot()
 		if not keepTags:
 			if onlyJunkTags:
 				self._cleanJunkProperties(targetMusicFile)
@@ -380,7 +523,20 @@ def _copyFileProperties(self, targetMusicFile : MusicFileProperties, sourceMusic
 			LogHelper.Verbose('>>> copying tag "{0}" from source (if present)', tag)
 			self._copyTag(tag, sourceMusicFile, targetMusicFile)
 
-		self._saveFile(targetMusicFile, lastModTime, currLastAccessTime, False, True)
+		differences = MusicFileProperties.diffNativeTagsSnapshots(originalTags, targetMusicFile.getNativeTagsSnapshot())
+		if not differences and not forceOverwrite:
+			LogHelper.Verbose('tags in file "{0}" already match the source file; not saving it', targetMusicFile.FilePath.name)
+			self._updateTimestampOnly(targetMusicFile.FilePath, lastModTimeNs, currLastAccessTimeNs)
+			return False
+		if differences:
+			MusicFolderHandler._logTagDifferences(targetMusicFile.FilePath, differences, self._whatIf)
+		self._saveFile(targetMusicFile, lastModTimeNs, currLastAccessTimeNs, False, True, force = forceOverwrite)
+		return True
+
+	def _copyFilePathProperties(self, targetFilePath: pathlib.Path, sourceFilePath: pathlib.Path, tweakModTimeBySecs: int, keepTags: bool, onlyJunkTags: bool) -> bool:
+		trg = MusicFileProperties(targetFilePath)
+		src = MusicFileProperties(sourceFilePath, metadataOnly=True)		# not copying the cover, so don't need to load it
+		return self._copyFileProperties(trg, src, tweakModTimeBySecs=tweakModTimeBySecs, keepTags=keepTags, onlyJunkTags=onlyJunkTags)
 
 #	@deprecated("we're not using this any more, right?")
 	def _setMusicFileFromDb(self, musicFile : MusicFileProperties, sqliteConn : sqlite3.Connection):
@@ -388,8 +544,9 @@ def _setMusicFileFromDb(self, musicFile : MusicFileProperties, sqliteConn : sqli
 		# this should be updated, if we ever use it again...; or just get rid of it...
 		___obsolete___
 		#
-		lastModTime = os.path.getmtime(musicFile.FilePath)
-		currLastAccessTime = os.path.getatime(musicFile.FilePath)
+		st = musicFile.FilePath.stat()
+		lastModTimeNs = st.st_mtime_ns
+		currLastAccessTimeNs = st.st_atime_ns
 
 		if not self._onlyTimestamp:
 			self._cleanJunkProperties(musicFile)
@@ -416,7 +573,7 @@ def _setMusicFileFromDb(self, musicFile : MusicFileProperties, sqliteConn : sqli
 				if not self._onlyTimestamp:
 					self._setFileProperties(musicFile, row)
 				if row.ModifyTimeUTC:
-					lastModTime = MusicFolderHandler._dbModifyTimeToTimestamp(row.ModifyTimeUTC)
+					lastModTimeNs = int(MusicFolderHandler._dbModifyTimeToTimestamp(row.ModifyTimeUTC)) * 1_000_000_000
 			else:
 				LogHelper.Warning(f"skipping setting properties for file '{musicFile.FilePath.name}'")
 		else:
@@ -425,9 +582,9 @@ def _setMusicFileFromDb(self, musicFile : MusicFileProperties, sqliteConn : sqli
 			if not self._onlyTimestamp:
 				self._setFileProperties(musicFile, row)
 			if row.ModifyTimeUTC:
-				lastModTime = MusicFolderHandler._dbModifyTimeToTimestamp(row.ModifyTimeUTC)
+				lastModTimeNs = int(MusicFolderHandler._dbModifyTimeToTimestamp(row.ModifyTimeUTC)) * 1_000_000_000
 
-		self._saveFile(musicFile, lastModTime, currLastAccessTime, True, False)
+		self._saveFile(musicFile, lastModTimeNs, currLastAccessTimeNs, True, False)
 
 #	@deprecated("we're not using this any more, right?")
 	def _setFileProperties(self, musicFile : MusicFileProperties, dbRow : DbRowHelper):
@@ -533,19 +690,22 @@ def _setFileProperties(self, musicFile : MusicFileProperties, dbRow : DbRowHelpe
 		#	self._logSetProperty("TotalDiscs", "1")
 		#	musicFile.TotalDiscs = 1
 
-	def _cleanFile(self, musicFile : MusicFileProperties, onlyJunkTags: bool, extraTagsToClean: list[str] = None) -> int:
-		lastModTime = os.path.getmtime(musicFile.FilePath)
-		currLastAccessTime = os.path.getatime(musicFile.FilePath)
+	def _cleanFile(self, musicFile : MusicFileProperties, onlyJunkTags: bool, extraTagsToClean: list[str] = None) -> tuple[int, list[tuple[str, str]]]:
+		"""returns 0 if no issues, or 1 if anything like unexpected tags, along with the unexpected tags (name, value)"""
+		st = musicFile.FilePath.stat()
+		lastModTimeNs = st.st_mtime_ns
+		currLastAccessTimeNs = st.st_atime_ns
 
 		if onlyJunkTags:
 			self._cleanJunkProperties(musicFile, extraTagsToClean)
 		else:
 			self._cleanAllTags(musicFile)
 
-		result = self._showUnexpectedTags(musicFile)
-		self._saveFile(musicFile, lastModTime, currLastAccessTime, False, True)
+		unexpectedTags = self._getUnexpectedTags(musicFile)
+		MusicFolderHandler._logUnexpectedTags(musicFile.FilePath, unexpectedTags)
+		self._saveFile(musicFile, lastModTimeNs, currLastAccessTimeNs, False, True)
 
-		return result
+		return (1 if unexpectedTags else 0), unexpectedTags
 
 	def _cleanJunkProperties(self, musicFile : MusicFileProperties, extraTagsToClean: list[str] = None) -> None:
 		LogHelper.Verbose('XXX removing junk tags from file "{0}"', musicFile.FilePath)
@@ -579,7 +739,7 @@ def _cleanAllTags(self, musicFile: MusicFileProperties) -> None:
 			LogHelper.Verbose('XXX removing native tag "{0}"', t)
 			musicFile.deleteNativeTagValue(t)
 
-	def _showUnexpectedTags(self, musicFile: MusicFileProperties) -> int:
+	def _getUnexpectedTags(self, musicFile: MusicFileProperties) -> list[tuple[str, str]]:
 		nativeApprovedTags = MusicFolderHandler._getListOfApprovedTags(musicFile)
 		unexpectedTags = []
 		for t,v in musicFile.getNativeTagValues():
@@ -589,13 +749,31 @@ def _showUnexpectedTags(self, musicFile: MusicFileProperties) -> int:
 				if len(strV) > 120:
 					strV = strV[:117] + "..."
 				unexpectedTags.append((t, strV))
+		return unexpectedTags
+
+	@staticmethod
+	def _logUnexpectedTags(filePath: pathlib.Path, unexpectedTags: list[tuple[str, str]]) -> None:
 		if unexpectedTags:
-			msg = f"unexpected tag(s) in file '{musicFile.FilePath.name}':"
+			msg = f"unexpected tag(s) in file '{filePath.name}':"
 			for tup in unexpectedTags:
 				msg += f"{os.linesep}      tag: {tup[0]}{os.linesep}    value: {tup[1]}"
 			LogHelper.Warning(msg)
-			return 1
-		return 0
+
+	@staticmethod
+	def _logTagDifferences(filePath: pathlib.Path, differences: list[tuple[str, str|None, str|None]], whatIf: bool) -> None:
+		msg = f"tag changes for file '{filePath.name}':"
+		for name, old, new in differences:
+			if old is None:
+				msg += f"{os.linesep}    + {name}: {new}"
+			elif new is None:
+				msg += f"{os.linesep}    - {name}: {old}"
+			else:
+				msg += f"{os.linesep}    ~ {name}: {old} => {new}"
+		# for whatIf, this is the whole point, so always show it:
+		if whatIf:
+			LogHelper.Message(msg)
+		else:
+			LogHelper.Verbose(msg)
 
 	@staticmethod
 	def _cleanUpPathNames(folderPath: pathlib.Path, whatIf: bool) -> pathlib.Path|None:
@@ -634,15 +812,15 @@ def _cleanUpFilenames(folderPath: pathlib.Path, whatIf: bool) -> None:
 					f = f.rename((f.parent / filename))
 
 	@staticmethod
-	def _createPlaylist(folderPath: pathlib.Path, playlistName: str|None, whatIf: bool):
+	def _createPlaylist(folderPath: pathlib.Path, playlistName: str|None, whatIf: bool, jobs: int = 1):
 		entries: list[PlaylistEntry] = []; isFirst = True; albumTitle = ''; albumArtist = ''
-		for f in FileHelpers.MultiGlob(folderPath, MusicFolderHandler._supportedFileTypesGlob):
-			mf = MusicFileProperties(f)
+		files = [(f,) for f in FileHelpers.MultiGlob(folderPath, MusicFolderHandler._supportedFileTypesGlob)]
+		for entry, fileAlbumTitle, fileAlbumArtist in MusicFolderHandler._forEach(jobs, MusicFolderHandler._getPlaylistEntry, files):
 			if isFirst:
-				albumTitle = playlistName if playlistName else "/".join(mf.AlbumTitle)
-				albumArtist = "/".join(mf.AlbumArtist) if len(mf.AlbumArtist) > 0 else "/".join(mf.TrackArtist)
+				albumTitle = playlistName if playlistName else fileAlbumTitle
+				albumArtist = fileAlbumArtist
 				isFirst = False
-			entries.append(PlaylistEntry(mf, f.name))
+			entries.append(entry)
 
 		albumArtistForFile = albumArtist
 		if (albumArtistForFile.lower().startswith("the ")):
@@ -681,6 +859,14 @@ def _createPlaylist(folderPath: pathlib.Path, playlistName: str|None, whatIf: bo
 					pl.write(f"{e.filename}\n")
 			playlist.chmod(playlist.stat().st_mode & MusicFolderHandler._disableWriteAccess)
 
+	@staticmethod
+	def _getPlaylistEntry(filePath: pathlib.Path) -> tuple[PlaylistEntry, str, str]:
+		"""returns the playlist entry for the file, plus the album title and artist from it"""
+		mf = MusicFileProperties(filePath, metadataOnly=True)
+		albumTitle = "/".join(mf.AlbumTitle)
+		albumArtist = "/".join(mf.AlbumArtist) if len(mf.AlbumArtist) > 0 else "/".join(mf.TrackArtist)
+		return PlaylistEntry(mf, filePath.name), albumTitle, albumArtist
+
 	def _logSetProperty(self, propertyName : str, value : str):
 		LogHelper.Verbose('    setting "{propertyName}" to "{value}"', propertyName = propertyName, value = lambda: MusicFolderHandler._ellipsify(value))
 
@@ -812,6 +998,188 @@ def __exit__(self, exc_type, exc_value, traceback):
 			self._cursor = None
 		self._conn = None
 
+class ProcessedFilesIndex:
+	"""
+	remembers which files have already been processed (e.g. cleaned), what options were used, and how it turned out,
+	so later runs can skip the ones that haven't changed since without even opening them.
+
+	a file counts as unchanged if its size and mtime are the same, but that's not enough on its own, because we
+	put the original mtime back after saving (see MusicFolderHandler._saveFile()), and some taggers do too; so also
+	uses the inode change time (which can't be set back) on Linux/macOS, or on Windows (where st_ctime is the
+	creation time), a hash of the start and end of the file, where the tags live.
+
+	NOTE: on Linux/macOS that means anything that so much as does a chmod or utime on a file makes it count as changed;
+	so the other commands have to leave files alone when there's nothing to do (e.g. copyFolderProperties only touches
+	the timestamp/readonly bit when they're actually wrong, see MusicFolderHandler._updateTimestampOnly()), or every
+	file they go over gets processed again here
+	"""
+	_fingerprintBytes = 64 * 1024
+
+	def __init__(self, indexPath: pathlib.Path):
+		self._indexPath = indexPath
+		self._conn: sqlite3.Connection = None
+
+	def __enter__(self) -> "ProcessedFilesIndex":
+		self._indexPath.parent.mkdir(parents=True, exist_ok=True)
+		# the worker processes in --recursive mode can all be writing to this at once, so give them time to wait on each other:
+		self._conn = sqlite3.connect(self._indexPath, timeout=60)
+		self._conn.execute("PRAGMA journal_mode=WAL")
+		self._conn.execute("""CREATE TABLE IF NOT EXISTS ProcessedFiles (
+								Path TEXT NOT NULL, Operation TEXT NOT NULL, Size INTEGER NOT NULL, MtimeNs INTEGER NOT NULL,
+								ChangeKey TEXT NOT NULL, Result INTEGER NOT NULL, UnexpectedTags TEXT, ProcessedUtc TEXT NOT NULL,
+								PRIMARY KEY (Path, Operation))""")
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		if self._conn:
+			self._conn.commit()
+			self._conn.close()
+			self._conn = None
+
+	def getUnchanged(self, filePath: pathlib.Path, operation: str) -> tuple[int, list[tuple[str, str]]]|None:
+		"""if the file hasn't changed since it was recorded for the operation, returns the (result, unexpectedTags) from then, else None"""
+		row = self._conn.execute("SELECT Size, MtimeNs, ChangeKey, Result, UnexpectedTags FROM ProcessedFiles WHERE Path = ? AND Operation = ?",
+								(str(filePath.absolute()), operation)).fetchone()
+		if not row:
+			return None
+		st = filePath.stat()
+		if row[0] != st.st_size or row[1] != st.st_mtime_ns or row[2] != ProcessedFilesIndex.GetChangeKey(filePath, st):
+			return None
+		return row[3], [tuple(t) for t in json.loads(row[4])] if row[4] else []
+
+	def record(self, filePath: pathlib.Path, operation: str, result: int, unexpectedTags: list[tuple[str, str]]) -> None:
+		"""records the file's current state (so call this after it's been saved) along with how the operation turned out"""
+		st = filePath.stat()
+		self._conn.execute("INSERT OR REPLACE INTO ProcessedFiles VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+							(str(filePath.absolute()), operation, st.st_size, st.st_mtime_ns, ProcessedFilesIndex.GetChangeKey(filePath, st), result,
+							json.dumps(unexpectedTags, ensure_ascii=False) if unexpectedTags else None, datetime.datetime.now(datetime.timezone.utc).isoformat()))
+
+	@staticmethod
+	def GetChangeKey(filePath: pathlib.Path, st: os.stat_result) -> str:
+		"""the part of the 'has it changed' test that still works when the mtime gets put back (see above); LibraryCatalog uses it too"""
+		if sys.platform != "win32":
+			return str(st.st_ctime_ns)
+		hasher = hashlib.sha1()
+		with open(filePath, "rb") as f:
+			hasher.update(f.read(ProcessedFilesIndex._fingerprintBytes))
+			if st.st_size > ProcessedFilesIndex._fingerprintBytes:
+				f.seek(max(ProcessedFilesIndex._fingerprintBytes, st.st_size - ProcessedFilesIndex._fingerprintBytes))
+				hasher.update(f.read())
+		return hasher.hexdigest()
+
+class LibraryCatalog:
+	"""
+	a sqlite db with one row per track in the library: the file's path, size, mtime, tag type and duration, plus a column
+	for each of the TagNames (multiple values joined with '; '), so questions like 'which tracks don't have an AlbumArtist'
+	are just a query, instead of opening every file again:
+
+		SELECT Path FROM Tracks WHERE AlbumArtist IS NULL
+
+	refresh() only reads the files that are new or have changed since they were last exported (same test as
+	ProcessedFilesIndex), and drops the rows for files that aren't there anymore.
+	"""
+	_batchSize = 50		# files per call to _readTracks(), so the worker processes aren't passing back one row at a time
+	_fixedColumns: list[tuple[str, str]] = [ ("Path", "TEXT NOT NULL PRIMARY KEY"), ("Folder", "TEXT NOT NULL"), ("Filename", "TEXT NOT NULL"),
+											("Extension", "TEXT NOT NULL"), ("TagType", "TEXT"), ("DurationSecs", "REAL"), ("HasCover", "INTEGER"),
+											("Size", "INTEGER NOT NULL"), ("MtimeNs", "INTEGER NOT NULL"), ("ChangeKey", "TEXT NOT NULL"),
+											("ExportedUtc", "TEXT NOT NULL"), ]
+	# the tag values (Cover is just the HasCover flag, since we don't load the pictures):
+	_tagColumns: list[str] = sorted({ getattr(TagNames, t) for t in dir(TagNames) if not t.startswith("_") } - { TagNames.Cover })
+
+	def __init__(self, dbPath: pathlib.Path):
+		self._dbPath = dbPath
+		self._conn: sqlite3.Connection = None
+
+	def __enter__(self) -> "LibraryCatalog":
+		self._dbPath.parent.mkdir(parents=True, exist_ok=True)
+		self._conn = sqlite3.connect(self._dbPath, timeout=60)
+		self._conn.execute("PRAGMA journal_mode=WAL")
+		columns = LibraryCatalog._fixedColumns + [(c, "") for c in LibraryCatalog._tagColumns]
+		self._conn.execute(f"""CREATE TABLE IF NOT EXISTS Tracks ({', '.join(f'"{n}" {t}'.rstrip() for n,t in columns)})""")
+		# if we've added TagNames since the db was created, add columns for them:
+		existing = { row[1] for row in self._conn.execute("PRAGMA table_info(Tracks)") }
+		for c in LibraryCatalog._tagColumns:
+			if c not in existing:
+				self._conn.execute(f'ALTER TABLE Tracks ADD COLUMN "{c}"')
+		self._conn.execute("CREATE INDEX IF NOT EXISTS TracksFolder ON Tracks (Folder)")
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		if self._conn:
+			self._conn.commit()
+			self._conn.close()
+			self._conn = None
+
+	def refresh(self, rootFolder: pathlib.Path, jobs: int = 1, full: bool = False) -> tuple[int, int, int, int]:
+		"""
+		brings the rows for the music files under rootFolder up to date; if full is True, all the files are read again,
+		not just the new/changed ones. returns (files exported, unchanged, removed, failed)
+		"""
+		rootFolder = rootFolder.absolute()
+		known: dict[str, tuple[int, int, str]] = {}
+		rootPrefix = os.path.join(str(rootFolder), "")
+		for path, size, mtimeNs, changeKey in self._conn.execute("SELECT Path, Size, MtimeNs, ChangeKey FROM Tracks"):
+			if path.startswith(rootPrefix):
+				known[path] = (size, mtimeNs, changeKey)
+
+		toRead: list[pathlib.Path] = []
+		unchanged = 0
+		for folder in MusicFolderHandler.FindAlbumFolders(rootFolder):
+			for f in FileHelpers.MultiGlob(folder, MusicFolderHandler._supportedFileTypesGlob):
+				previous = known.pop(str(f), None)
+				if previous and not full:
+					st = f.stat()
+					if previous[0] == st.st_size and previous[1] == st.st_mtime_ns and previous[2] == ProcessedFilesIndex.GetChangeKey(f, st):
+						unchanged += 1
+						continue
+				toRead.append(f)
+
+		# anything left in known wasn't found this time:
+		if known:
+			LogHelper.Verbose('removing {0} file(s) that are no longer there', len(known))
+			self._conn.executemany("DELETE FROM Tracks WHERE Path = ?", [(p,) for p in known])
+
+		exported = 0
+		batches = [(toRead[i:i + LibraryCatalog._batchSize],) for i in range(0, len(toRead), LibraryCatalog._batchSize)]
+		columns = [n for n,_ in LibraryCatalog._fixedColumns] + LibraryCatalog._tagColumns
+		insert = f"""INSERT OR REPLACE INTO Tracks ({', '.join(f'"{c}"' for c in columns)}) VALUES ({', '.join('?' * len(columns))})"""
+		for rows in MusicFolderHandler._forEach(jobs, LibraryCatalog._readTracks, batches):
+			self._conn.executemany(insert, [[row.get(c) for c in columns] for row in rows])
+			self._conn.commit()
+			exported += len(rows)
+		return exported, unchanged, len(known), len(toRead) - exported
+
+	@staticmethod
+	def _readTracks(files: list[pathlib.Path]) -> list[dict[str, Any]]:
+		"""reads the rows for the files; the ones that can't be read are logged and left out (so they'll be tried again next time)"""
+		rows = []
+		exportedUtc = datetime.datetime.now(datetime.timezone.utc).isoformat()
+		for f in files:
+			try:
+				# stat first: if the file gets changed while we're reading it, the next refresh will see that it's changed:
+				st = f.stat()
+				mf = MusicFileProperties(f, metadataOnly=True)
+				row = { "Path": str(f), "Folder": str(f.parent), "Filename": f.name, "Extension": f.suffix, "TagType": mf.TagType.name,
+						"DurationSecs": mf.DurationSeconds, "HasCover": 1 if mf.HasCover else 0, "Size": st.st_size, "MtimeNs": st.st_mtime_ns,
+						"ChangeKey": ProcessedFilesIndex.GetChangeKey(f, st), "ExportedUtc": exportedUtc }
+				for tagName, values in mf.getTagValues():
+					if tagName != TagNames.Cover:
+						row[tagName] = LibraryCatalog._getColumnValue(values)
+				rows.append(row)
+				LogHelper.Verbose('exported file "{0}"', f)
+			except Exception as ex:
+				LogHelper.Error(f'could not read file "{f}": {ex!r}')
+		return rows
+
+	@staticmethod
+	def _getColumnValue(values: list[Any]) -> str|int|None:
+		values = [v for v in values if not isinstance(v, (bytes, bytearray))]
+		if len(values) == 0:
+			return None
+		if len(values) == 1 and isinstance(values[0], int):
+			return values[0]
+		return "; ".join(str(v) for v in values)
+
 class queryHelper:
 	@staticmethod
 	def _normalizeString(value : str):
@@ -919,51 +1287,149 @@ def setFolderPropertiesFromDbCommand(args) -> int:
 		.SetFolderFilesFromDb()
 	return 0
 
+def _runForLibrary(args: argparse.Namespace, rootFolder: pathlib.Path, albumFunc: Callable[[pathlib.Path, argparse.Namespace, pathlib.Path], int]|None, cleanNames: bool) -> int:
+	"""
+	for --recursive: runs albumFunc(albumFolder, args, originalFolder) for every album folder under rootFolder, all in this one
+	process (or spread over --jobs worker processes, one album at a time each), then prints a summary; returns the worst return code.
+	originalFolder is where the album folder was before any renames (e.g. for finding its source folder)
+	"""
+	started = time.monotonic()
+	albums = MusicFolderHandler.FindAlbumFolders(rootFolder)
+	LogHelper.Message(f'found {len(albums)} album folder(s) under "{rootFolder}"')
+	originals = albums
+	if cleanNames:
+		# the renames are done up front, deepest folders first, so renaming a folder can't pull the rug out
+		# from under one of its subfolders that's being worked on (e.g. 'Album/CD1' while 'Album' is renamed);
+		# and we keep track of them, so each album still knows where it was (the root might get renamed, too):
+		renames: list[tuple[pathlib.Path, pathlib.Path]] = []
+		for album in sorted(albums, key=lambda a: len(a.parts), reverse=True):
+			renamed = MusicFolderHandler._cleanUpPathNames(album, args.whatIf)
+			if renamed:
+				renames.append((album, renamed))
+		albums = [_applyRenames(a, renames) for a in originals]
+
+	results: dict[int, list[pathlib.Path]] = {}
+	if albumFunc:
+		jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+		argsList = [(albumFunc, album, original, args) for album, original in zip(albums, originals)]
+		for album, rc in zip(albums, MusicFolderHandler._forEach(jobs, _runForAlbum, argsList)):
+			results.setdefault(rc, []).append(album)
+	else:
+		results[0] = albums
+
+	LogHelper.Message(LogHelper.MediumDivider)
+	ok = len(results.get(0, [])); failed = len(results.get(2, [])); warnings = len(albums) - ok - failed
+	LogHelper.Message(f"processed {len(albums)} album folder(s) in {time.monotonic() - started:,.1f} secs: {ok} ok, {warnings} with warnings, {failed} failed")
+	for rc in sorted(results):
+		if rc == 0: continue
+		LogHelper.Warning(f"{'failed' if rc >= 2 else 'warnings'} (return code {rc}):" + "".join(f"{os.linesep}    {a}" for a in results[rc]))
+	return max(results) if results else 0
+
+def _applyRenames(folder: pathlib.Path, renames: list[tuple[pathlib.Path, pathlib.Path]]) -> pathlib.Path:
+	"""returns where folder is now, after the (old path, new path) renames, in the order they were done (deepest first)"""
+	for old, new in renames:
+		if folder == old or old in folder.parents:
+			folder = new / folder.relative_to(old)
+	return folder
+
+def _runForAlbum(albumFunc: Callable[[pathlib.Path, argparse.Namespace, pathlib.Path], int], albumFolder: pathlib.Path, originalFolder: pathlib.Path,
+					args: argparse.Namespace) -> int:
+	LogHelper.MessageMagenta('processing folder "{0}"', albumFolder)
+	try:
+		return albumFunc(albumFolder, args, originalFolder)
+	except Exception as ex:
+		# keep going with the rest of the library:
+		LogHelper.Error(f'processing folder "{albumFolder}" failed: {ex!r}')
+		return 2
+
+def _createAlbumPlaylist(albumFolder: pathlib.Path, args: argparse.Namespace, originalFolder: pathlib.Path) -> int:
+	MusicFolderHandler(folderPath = albumFolder, whatIf = args.whatIf).CreatePlaylist()
+	return 0
+
+def _copyAlbumProperties(albumFolder: pathlib.Path, args: argparse.Namespace, originalFolder: pathlib.Path) -> int:
+	if args.sourceFolderPath:
+		# (the source library has the folders as they were before we cleaned up their names)
+		sourceFolder = pathlib.Path(args.sourceFolderPath) / originalFolder.relative_to(args.targetFolderPath)
+	else:
+		sourceFolder = _findSourceFolder(originalFolder)
+	if not sourceFolder or not sourceFolder.is_dir():
+		LogHelper.Warning(f'no source folder found for folder "{albumFolder}"')
+		return 1
+	LogHelper.MessageMagenta('using "{0}" as source folder', sourceFolder)
+	return MusicFolderHandler(targetFolderPath = albumFolder, sourceFolderPath = sourceFolder, whatIf = args.whatIf, inPlace = args.inPlace)\
+		.CopyFolderProperties(True, args.tweakModTimeSecs, args.keepTags, args.onlyCleanJunkTags)
+
+def _cleanAlbumFiles(albumFolder: pathlib.Path, args: argparse.Namespace, originalFolder: pathlib.Path) -> int:
+	return MusicFolderHandler(folderPath = albumFolder, whatIf = args.whatIf, inPlace = args.inPlace).CleanFolderFiles(args.onlyJunk, indexPath = _getIndexPath(args))
+
+def _compactAlbumFiles(albumFolder: pathlib.Path, args: argparse.Namespace, originalFolder: pathlib.Path) -> int:
+	return MusicFolderHandler(folderPath = albumFolder, whatIf = args.whatIf).CompactFolderFiles()
+
+def _getIndexPath(args: argparse.Namespace) -> pathlib.Path|None:
+	if not args.incremental:
+		return None
+	return pathlib.Path(args.indexPath) if args.indexPath else _processedFilesIndexPath
+
 def createPlaylistCommand(args) -> int:
 	LogHelper.Init(verbose=args.verbose)
 	folder = pathlib.Path(args.folderPath)#.resolve()
 	if not folder.is_dir():
 		print(f'folder "{args.folderPath}" does not exist, is not a folder or could not be accessed')
 		return 2
+	if args.recursive:
+		if args.playlistName:
+			LogHelper.Warning("ignoring --playlistName with --recursive")
+		return _runForLibrary(args, folder, _createAlbumPlaylist, True)
 
-	MusicFolderHandler(folderPath = folder, playlistName = args.playlistName, whatIf = args.whatIf)\
+	MusicFolderHandler(folderPath = folder, playlistName = args.playlistName, whatIf = args.whatIf, jobs = args.jobs)\
 		.CreatePlaylist()
 	return 0
 
+def _findSourceFolder(targetFolder: pathlib.Path) -> pathlib.Path|None:
+	sourceFolder = None
+	LogHelper.Verbose('no source folder specified, trying to figure one out from target "{0}":', targetFolder)
+	# some assumptions about targetFolder here...
+	album = targetFolder.absolute()
+	artist = album.parent
+	LogHelper.Verbose('using artist name "{0}", album name "{1}"', artist.name, album.name)
+	targetArtistFldr = _myMusicBaseFolder / artist.name
+	if targetArtistFldr.is_dir():
+		LogHelper.Verbose('artist folder "{0}" exists, looking for album', targetArtistFldr)
+		maybeTargetAlbumFldr = targetArtistFldr / album.name
+		if maybeTargetAlbumFldr.is_dir():	# probably not, but maybe
+			LogHelper.Verbose('found album folder "{0}"', maybeTargetAlbumFldr)
+			sourceFolder = maybeTargetAlbumFldr
+		else:
+			#tempRe = re.compile(rf'^\[[\w\-]+\]\s+{ re.escape(album.name) }$', re.IGNORECASE)
+			#for f in targetArtistFldr.iterdir():
+			#	if not f.is_dir(): continue
+			#	if tempRe.match(f.name):
+			#		sourceFolder = f
+			#		break
+			for f in targetArtistFldr.glob(f"[[]*[]] {album.name}"):
+				LogHelper.Verbose('found album folder "{0}"', f)
+				sourceFolder = f
+				break
+	return sourceFolder
+
 def copyFolderPropertiesCommand(args) -> int:
 	LogHelper.Init(verbose=args.verbose)
 	targetFolder = pathlib.Path(args.targetFolderPath)#.resolve()
 	if not targetFolder.is_dir():
 		print(f'folder "{args.targetFolderPath}" does not exist, is not a folder or could not be accessed')
 		return 2
+	if args.recursive:
+		# with a source folder, each album's source is the same relative path under it; without, they're looked up like below:
+		if args.sourceFolderPath and not pathlib.Path(args.sourceFolderPath).is_dir():
+			print(f'folder "{args.sourceFolderPath}" does not exist, is not a folder or could not be accessed')
+			return 2
+		return _runForLibrary(args, targetFolder, _copyAlbumProperties, not args.skipRenames)
 
 	sourceFolder = None
 	if args.sourceFolderPath:
 		sourceFolder = pathlib.Path(args.sourceFolderPath)#.resolve()
 	else:
-		LogHelper.Verbose('no source folder specified, trying to figure one out from target "{0}":', targetFolder)
-		# some assumptions about targetFolder here...
-		album = targetFolder.absolute()
-		artist = album.parent
-		LogHelper.Verbose('using artist name "{0}", album name "{1}"', artist.name, album.name)
-		targetArtistFldr = _myMusicBaseFolder / artist.name
-		if targetArtistFldr.is_dir():
-			LogHelper.Verbose('artist folder "{0}" exists, looking for album', targetArtistFldr)
-			maybeTargetAlbumFldr = targetArtistFldr / album.name
-			if maybeTargetAlbumFldr.is_dir():	# probably not, but maybe
-				LogHelper.Verbose('found album folder "{0}"', maybeTargetAlbumFldr)
-				sourceFolder = maybeTargetAlbumFldr
-			else:
-				#tempRe = re.compile(rf'^\[[\w\-]+\]\s+{ re.escape(album.name) }$', re.IGNORECASE)
-				#for f in targetArtistFldr.iterdir():
-				#	if not f.is_dir(): continue
-				#	if tempRe.match(f.name):
-				#		sourceFolder = f
-				#		break
-				for f in targetArtistFldr.glob(f"[[]*[]] {album.name}"):
-					LogHelper.Verbose('found album folder "{0}"', f)
-					sourceFolder = f
-					break
+		sourceFolder = _findSourceFolder(targetFolder)
 		if sourceFolder:
 			LogHelper.MessageMagenta('using "{0}" as source folder', sourceFolder)
 		else:
@@ -976,24 +1442,55 @@ def copyFolderPropertiesCommand(args) -> int:
 		print(f'folder "{args.sourceFolderPath}" does not exist, is not a folder or could not be accessed')
 		return 2
 
-	return MusicFolderHandler(targetFolderPath = targetFolder, sourceFolderPath = sourceFolder, whatIf = args.whatIf)\
+	return MusicFolderHandler(targetFolderPath = targetFolder, sourceFolderPath = sourceFolder, whatIf = args.whatIf, jobs = args.jobs, inPlace = args.inPlace)\
 		.CopyFolderProperties(args.skipRenames, args.tweakModTimeSecs, args.keepTags, args.onlyCleanJunkTags)
 
 def cleanFilesCommand(args) -> int:
 	LogHelper.Init(verbose=args.verbose)
 	p = pathlib.Path(args.path)#.resolve()
-	if p.is_dir():
-		return MusicFolderHandler(folderPath = p, whatIf = args.whatIf).CleanFolderFiles(args.onlyJunk)
+	if p.is_dir() and args.recursive:
+		return _runForLibrary(args, p, _cleanAlbumFiles, True)
+	elif p.is_dir():
+		return MusicFolderHandler(folderPath = p, whatIf = args.whatIf, jobs = args.jobs, inPlace = args.inPlace).CleanFolderFiles(args.onlyJunk, indexPath = _getIndexPath(args))
+	elif p.is_file():
+		return MusicFolderHandler(whatIf = args.whatIf, inPlace = args.inPlace).CleanFile(p, args.onlyJunk)
+	else:
+		print(f'path "{args.path}" does not exist, is not a folder or could not be accessed')
+		return 2
+
+def compactFilesCommand(args) -> int:
+	LogHelper.Init(verbose=args.verbose)
+	p = pathlib.Path(args.path)#.resolve()
+	if p.is_dir() and args.recursive:
+		return _runForLibrary(args, p, _compactAlbumFiles, False)
+	elif p.is_dir():
+		return MusicFolderHandler(folderPath = p, whatIf = args.whatIf, jobs = args.jobs).CompactFolderFiles()
 	elif p.is_file():
-		return MusicFolderHandler(whatIf = args.whatIf).CleanFile(p, args.onlyJunk)
+		return MusicFolderHandler(whatIf = args.whatIf).CompactFile(p)
 	else:
 		print(f'path "{args.path}" does not exist, is not a folder or could not be accessed')
 		return 2
 
+def exportLibraryCommand(args) -> int:
+	LogHelper.Init(verbose=args.verbose)
+	rootFolder = pathlib.Path(args.rootFolder)#.resolve()
+	if not rootFolder.is_dir():
+		print(f'folder "{args.rootFolder}" does not exist, is not a folder or could not be accessed')
+		return 2
+	dbPath = pathlib.Path(args.dbPath) if args.dbPath else _libraryCatalogPath
+	jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+	started = time.monotonic()
+	with LibraryCatalog(dbPath) as catalog:
+		exported, unchanged, removed, failed = catalog.refresh(rootFolder, jobs, args.full)
+	LogHelper.Message(f'exported {exported} file(s) to "{dbPath}" in {time.monotonic() - started:,.1f} secs: {unchanged} unchanged, {removed} removed, {failed} failed')
+	return 1 if failed > 0 else 0
+
 def cleanNamesCommand(args) -> int:
 	LogHelper.Init(verbose=args.verbose)
 	p = pathlib.Path(args.path)#.resolve()
-	if p.is_dir():
+	if p.is_dir() and args.recursive:
+		return _runForLibrary(args, p, None, True)
+	elif p.is_dir():
 		return MusicFolderHandler(targetFolderPath = p, whatIf = args.whatIf).CleanUpPathNames()
 	else:
 		print(f'path "{args.path}" does not exist, is not a folder or could not be accessed')
@@ -1008,7 +1505,7 @@ def showFolderPropertiesCommand(args : argparse.Namespace) -> int:
 	headers = ['Filename', 'AlbumTitle', 'TrackArtist', 'TrackTitle', 'Year']
 	results = []
 	for f in FileHelpers.MultiGlob(folder, MusicFolderHandler._supportedFileTypesGlob):
-		props = MusicFileProperties(f)
+		props = MusicFileProperties(f, metadataOnly=True)
 		results.append([f.name, props.AlbumTitle, props.TrackArtist, props.TrackTitle, props.Year])
 		props = None
 	print(tabulate(sorted(results, key=lambda r: r[0]), headers=headers, tablefmt=_defaultTableFormat))
@@ -1020,7 +1517,7 @@ def showFilePropertiesCommand(args : argparse.Namespace) -> int:
 	if not file.is_file():
 		print(f'file "{args.filePath}" does not exist, is not a folder or could not be accessed')
 		return 2
-	props = MusicFileProperties(file)
+	props = MusicFileProperties(file, metadataOnly=True)
 	printData = []
 	if args.raw:
 		printData.append(["$$TagType", props.TagType.name])
@@ -1032,6 +1529,11 @@ def showFilePropertiesCommand(args : argparse.Namespace) -> int:
 				printData.append([p,'<lyrics>'])
 			else:
 				printData.append([p,v])
+		# the pictures weren't loaded, but still show that they're there:
+		for p in props.SkippedPictureTags:
+			printData.append([p,'<binary (cover)>'])
+		if args.sort:
+			printData[1:] = sorted(printData[1:], key=lambda p: p[0].upper())
 	else:
 		for p,v in props.getTagValues():
 			if p == TagNames.Cover:
@@ -1043,6 +1545,9 @@ def showFilePropertiesCommand(args : argparse.Namespace) -> int:
 					printData.append([p,v[0]])
 				else:
 					printData.append([p,v])
+		if props.SkippedPictureTags:
+			printData.append([TagNames.Cover,'[<binary (cover)>]'])
+			printData.sort(key=lambda p: p[0])		# same order getTagValues() returns them in
 	#print(tabulate(printData, headers=['Property','Value'], tablefmt='fancy_grid'))
 	print(tabulate(printData, headers=['Property','Value'], tablefmt=_defaultTableFormat))
 	props = None
@@ -1074,7 +1579,9 @@ def buildArguments():
 	setFolderCmd.add_argument("folderPath")
 	setFolderCmd.add_argument("-pn", "--playlistName", help="override playlist name")
 	setFolderCmd.add_argument("-w", "--whatIf", action="store_true", help="do the lookups, but don't actually save anything")
+	setFolderCmd.add_argument("-J", "--jobs", type=int, default=1, help="number of files to process at a time (in separate processes); 0 means one per CPU")
 	setFolderCmd.add_argument("-v", "--verbose", action="store_true", help="enable verbose logging")
+	setFolderCmd.add_argument("-r", "--recursive", action="store_true", help="treat the folder as the root of a library, and do every album folder (any folder with music files in it) under it")
 	setFolderCmd.set_defaults(func=createPlaylistCommand)
 
 	setFolderCmd = subparsers.add_parser("copyFolderProperties", aliases=["copy", "cp"], help="enumerates music files in the target folder, looks for a matching file in source folder, and copies properties from source to target")
@@ -1085,20 +1592,45 @@ def buildArguments():
 	setFolderCmd.add_argument("-n", "--skipRenames", action="store_true", help="skip doing folder and file name cleanups")
 	setFolderCmd.add_argument("-t", "--tweakModTimeSecs", type=int, default=0, help="when saving files, by default the source file's modification time is copied. If this flag is specified and non-zero, the mod time will tweaked by this many seconds")
 	setFolderCmd.add_argument("-w", "--whatIf", action="store_true", help="look up properties, but don't actually save anything")
+	setFolderCmd.add_argument("-J", "--jobs", type=int, default=1, help="number of files to process at a time (in separate processes); 0 means one per CPU")
 	setFolderCmd.add_argument("-v", "--verbose", action="store_true", help="enable verbose logging")
+	setFolderCmd.add_argument("-r", "--recursive", action="store_true", help="treat the folder as the root of a library, and do every album folder (any folder with music files in it) under it")
+	setFolderCmd.add_argument("-p", "--inPlace", action="store_true", help="if the new tags fit in the file's existing padding, just write them there instead of rewriting the whole file without padding (use compactFiles when done)")
 	setFolderCmd.set_defaults(func=copyFolderPropertiesCommand)
 
 	setFolderCmd = subparsers.add_parser("cleanFiles", aliases=["clean", "cl", "cf"], help="cleans out all tags (with a small list of exceptions) from the music files in the target folder")
 	setFolderCmd.add_argument("path")
 	setFolderCmd.add_argument("-j", "--onlyJunk", action="store_true", help="remove only junk tags for the files, leaving most tags")
 	setFolderCmd.add_argument("-w", "--whatIf", action="store_true", help="go thru cleaning properties, but don't actually save anything")
+	setFolderCmd.add_argument("-J", "--jobs", type=int, default=1, help="number of files to process at a time (in separate processes); 0 means one per CPU")
 	setFolderCmd.add_argument("-v", "--verbose", action="store_true", help="enable verbose logging")
+	setFolderCmd.add_argument("-r", "--recursive", action="store_true", help="treat the folder as the root of a library, and do every album folder (any folder with music files in it) under it")
+	setFolderCmd.add_argument("-i", "--incremental", action="store_true", help="skip files that haven't changed since they were last cleaned (with the same options), and remember the ones cleaned this time")
+	setFolderCmd.add_argument("--indexPath", help=f"the file to keep track of cleaned files in for --incremental (default: {_processedFilesIndexPath})")
+	setFolderCmd.add_argument("-p", "--inPlace", action="store_true", help="if the new tags fit in the file's existing padding, just write them there instead of rewriting the whole file without padding (use compactFiles when done)")
 	setFolderCmd.set_defaults(func=cleanFilesCommand)
 
+	setFolderCmd = subparsers.add_parser("compactFiles", aliases=["compact", "cmp"], help="rewrites the music files without any padding after the tags (e.g. after using --inPlace)")
+	setFolderCmd.add_argument("path")
+	setFolderCmd.add_argument("-w", "--whatIf", action="store_true", help="show which files have padding, but don't actually change anything")
+	setFolderCmd.add_argument("-J", "--jobs", type=int, default=1, help="number of files to process at a time (in separate processes); 0 means one per CPU")
+	setFolderCmd.add_argument("-v", "--verbose", action="store_true", help="enable verbose logging")
+	setFolderCmd.add_argument("-r", "--recursive", action="store_true", help="treat the folder as the root of a library, and do every album folder (any folder with music files in it) under it")
+	setFolderCmd.set_defaults(func=compactFilesCommand)
+
+	setFolderCmd = subparsers.add_parser("exportLibrary", aliases=["export", "exp"], help="exports the tags for all the music files under the folder to a sqlite db (one row per track), for querying; only new/changed files are read again")
+	setFolderCmd.add_argument("rootFolder")
+	setFolderCmd.add_argument("-d", "--dbPath", help=f"the sqlite db to export to (default: {_libraryCatalogPath})")
+	setFolderCmd.add_argument("-f", "--full", action="store_true", help="read all the files again, not just the ones that are new or have changed since the last export")
+	setFolderCmd.add_argument("-J", "--jobs", type=int, default=1, help="number of files to process at a time (in separate processes); 0 means one per CPU")
+	setFolderCmd.add_argument("-v", "--verbose", action="store_true", help="enable verbose logging")
+	setFolderCmd.set_defaults(func=exportLibraryCommand)
+
 	setFolderCmd = subparsers.add_parser("cleanUpFileNames", aliases=["names", "n"], help="cleans up folder and file names (e.g. removes fancy quotes, other fancy chars)")
 	setFolderCmd.add_argument("path")
 	setFolderCmd.add_argument("-w", "--whatIf", action="store_true", help="go thru cleaning properties, but don't actually save anything")
 	setFolderCmd.add_argument("-v", "--verbose", action="store_true", help="enable verbose logging")
+	setFolderCmd.add_argument("-r", "--recursive", action="store_true", help="treat the folder as the root of a library, and do every album folder (any folder with music files in it) under it")
 	setFolderCmd.set_defaults(func=cleanNamesCommand)
 
 	setFolderCmd = subparsers.add_parser("showFolderProperties", aliases=["folder", "fld"], help="enumerates music files in the folder and shows properties for each")